@@ -3,6 +3,7 @@ import os
 import psutil
 from fastapi import APIRouter
 from gamma_engine.core.logger import logger
+from gamma_engine.core.rag_service import rag_providers_status
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from starlette.responses import Response
 
@@ -28,7 +29,8 @@ def get_system_status():
                 "total": disk.total,
                 "free": disk.free,
                 "percent": disk.percent
-            }
+            },
+            "rag": rag_providers_status()
         }
     except Exception as e:
         logger.error(f"Error fetching system status: {e}")
@@ -0,0 +1 @@
+"""Offline performance benchmarks for the Gamma Engine (no network or model access required)."""
@@ -0,0 +1,146 @@
+"""
+Offline benchmark of the agent loop: Agent.run, PlanningFlow.execute and Brain.decompose.
+
+All LLM traffic is served by ReplayLLMProvider, so the numbers reflect the
+engine's own overhead (memory, tools, event emission, serialization) plus
+whatever simulated model latency is configured.
+
+Usage:
+    python -m benchmarks.agent_loop --iterations 50
+    python -m benchmarks.agent_loop --cassette recordings/agent.json --latency-ms 800
+    python -m benchmarks.agent_loop --max-overhead-ms 5   # exit 1 on regression
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from gamma_engine.core.agent import Agent
+from gamma_engine.core.brain import Brain
+from gamma_engine.core.replay_llm import ReplayLLMProvider, fixed_latency, no_latency
+from gamma_engine.flow.planning import PlanningFlow
+from gamma_engine.interfaces.llm_provider import Message
+from gamma_engine.tools.base import Tool
+
+from .harness import BenchmarkResult, format_results, run_benchmark, to_json
+
+GOAL = "Summarize the project layout"
+
+
+class EchoTool(Tool):
+    """Trivial tool so the benchmark measures dispatch, not tool work."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            name="echo",
+            description="Echoes back the input text",
+            parameters={"type": "object", "properties": {"text": {"type": "string"}}, "required": ["text"]}
+        )
+
+    @property
+    def schema(self) -> Dict[str, Any]:
+        return self.to_schema()
+
+    def execute(self, text: str = "") -> str:
+        return f"Echo: {text}"
+
+
+def _tool_call(index: int, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": f"call_{index}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def agent_script(tool_steps: int = 5) -> List[Message]:
+    """Plan, ``tool_steps`` tool-calling turns, then a final answer."""
+    script = [Message(role="assistant", content=json.dumps(["Inspect the workspace", "Report findings"]))]
+    for i in range(tool_steps):
+        script.append(Message(
+            role="assistant",
+            content=f"Looking at part {i} of the workspace.",
+            tool_calls=[_tool_call(i, "echo", {"text": f"part {i}"})]
+        ))
+    script.append(Message(role="assistant", content="All parts inspected; the layout is summarized above."))
+    return script
+
+
+def planning_flow_script(plan_steps: int = 2, tool_steps: int = 3) -> List[Message]:
+    steps = [f"Step {i + 1}" for i in range(plan_steps)]
+    script = [Message(
+        role="assistant",
+        content=None,
+        tool_calls=[_tool_call(0, "planning", {"command": "create", "title": "Benchmark Plan", "steps": steps})]
+    )]
+    for _ in steps:
+        script.extend(agent_script(tool_steps))
+    return script
+
+
+def brain_script() -> List[Message]:
+    tasks = [{"id": str(i), "description": f"Task {i}", "dependencies": [str(i - 1)] if i > 1 else []} for i in range(1, 6)]
+    return [
+        Message(role="assistant", content="<thought>Split the goal into sequential tasks.</thought>"),
+        Message(role="assistant", content=json.dumps({"goal": GOAL, "tasks": tasks}))
+    ]
+
+
+async def run_agent(llm: ReplayLLMProvider) -> None:
+    agent = Agent(tools=[EchoTool()], llm_provider=llm)
+    await agent.run(GOAL)
+
+
+async def run_planning_flow(llm: ReplayLLMProvider) -> None:
+    agent = Agent(tools=[EchoTool()], llm_provider=llm)
+    await PlanningFlow(primary_agent=agent).execute(GOAL)
+
+
+def run_brain(llm: ReplayLLMProvider) -> None:
+    Brain(llm).decompose(GOAL, [EchoTool().to_schema()])
+
+
+def run_all(iterations: int = 20, latency_ms: float = 0.0, cassette: Optional[str] = None) -> List[BenchmarkResult]:
+    latency = fixed_latency(latency_ms / 1000) if latency_ms else no_latency()
+    if cassette:
+        agent_llm = ReplayLLMProvider(cassette, latency=latency)
+    else:
+        agent_llm = ReplayLLMProvider.from_messages(agent_script(), latency=latency)
+    return [
+        run_benchmark("agent.run", run_agent, agent_llm, iterations),
+        run_benchmark("planning_flow", run_planning_flow, ReplayLLMProvider.from_messages(planning_flow_script(), latency=latency), iterations),
+        run_benchmark("brain.decompose", run_brain, ReplayLLMProvider.from_messages(brain_script(), latency=latency), iterations),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency per LLM call")
+    parser.add_argument("--cassette", help="Recorded cassette to replay for the agent.run benchmark")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--max-overhead-ms", type=float, help="Fail if any benchmark exceeds this overhead per step")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    cassette = os.path.abspath(args.cassette) if args.cassette else None
+    # Agents persist their memory under ./file_storage; keep that out of the working tree
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            results = run_all(args.iterations, args.latency_ms, cassette)
+        finally:
+            os.chdir(cwd)
+
+    print(to_json(results) if args.json else format_results(results))
+    if args.max_overhead_ms is not None:
+        slow = [r.name for r in results if r.overhead_ms_per_step > args.max_overhead_ms]
+        if slow:
+            print(f"Overhead regression (> {args.max_overhead_ms} ms/step): {', '.join(slow)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+ANN benchmark: recall@k and latency of the IVF index vs. exact search.
+
+Builds two NumpyVectorStores over the same synthetic, clustered unit vectors
+(one flat, one IVF) and sweeps ``nprobe``. Recall@k is the fraction of the
+exact top-k the IVF search returns. Runs on CPU with NumPy only.
+
+Usage:
+    python -m benchmarks.ann --rows 200000 --dim 384
+    python -m benchmarks.ann --rows 1000000 --nprobe 4 8 16 32 --json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from gamma_engine.core.ingestion.numpy_store import NumpyVectorStore
+
+
+def make_vectors(rows: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors around random cluster centres, like embeddings of a topical corpus."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, rows)] + 0.5 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class _QueryVectors:
+    """embedding_function serving precomputed query vectors by name ("q<i>")."""
+
+    def __init__(self, queries: np.ndarray):
+        self.queries = queries
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        return self.queries[[int(t[1:]) for t in texts]]
+
+
+def build_store(path: str, vectors: np.ndarray, queries: np.ndarray, index: str, batch: int = 50000, **kwargs: Any) -> NumpyVectorStore:
+    store = NumpyVectorStore(path, embedding_function=_QueryVectors(queries), dtype="float16", index=index, **kwargs)
+    for start in range(0, len(vectors), batch):
+        ids = [str(i) for i in range(start, min(start + batch, len(vectors)))]
+        store.upsert_texts(ids, None, ids, embeddings=vectors[start:start + batch])
+    store.wait_for_maintenance()
+    return store
+
+
+def run(
+    rows: int = 100000,
+    dim: int = 128,
+    clusters: int = 500,
+    queries: int = 200,
+    k: int = 10,
+    nprobes: Sequence[int] = (1, 4, 8, 16, 32, 64),
+    nlist: int = 0
+) -> Dict[str, Any]:
+    vectors = make_vectors(rows, dim, clusters)
+    rng = np.random.default_rng(1)
+    query_vectors = vectors[rng.integers(0, rows, queries)] + 0.1 * rng.standard_normal((queries, dim)).astype(np.float32)
+    names = [f"q{i}" for i in range(queries)]
+
+    with tempfile.TemporaryDirectory() as flat_dir, tempfile.TemporaryDirectory() as ivf_dir:
+        flat = build_store(flat_dir, vectors, query_vectors, "flat")
+        start = time.perf_counter()
+        ivf = build_store(ivf_dir, vectors, query_vectors, "ivf", nlist=nlist, index_train_size=min(rows, 50000))
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        NumpyVectorStore(ivf_dir, embedding_function=_QueryVectors(query_vectors), index="ivf")
+        open_ms = (time.perf_counter() - start) * 1000
+
+        exact, exact_ms = _search_all(flat, names, k)
+        results = {
+            "rows": rows, "dim": dim, "k": k, "nlist": ivf.ivf.nlist,
+            "ivf_build_seconds": round(build_seconds, 2), "ivf_open_ms": round(open_ms, 1),
+            "exact": {"p50_ms": _pct(exact_ms, 50), "p95_ms": _pct(exact_ms, 95)},
+            "ivf": []
+        }
+        for nprobe in nprobes:
+            found, latencies = _search_all(ivf, names, k, nprobe=nprobe)
+            recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(found, exact) if e])
+            results["ivf"].append({
+                "nprobe": nprobe,
+                f"recall@{k}": round(float(recall), 3),
+                "p50_ms": _pct(latencies, 50),
+                "p95_ms": _pct(latencies, 95)
+            })
+    return results
+
+
+def _search_all(store: NumpyVectorStore, names: List[str], k: int, nprobe: Optional[int] = None):
+    found, latencies = [], []
+    for name in names:
+        start = time.perf_counter()
+        ids = store.similarity_search(name, k=k, nprobe=nprobe)["ids"][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids)
+    return found, latencies
+
+
+def _pct(values: List[float], q: int) -> float:
+    return round(float(np.percentile(values, q)), 2)
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    k = results["k"]
+    lines = [
+        f"{results['rows']} x {results['dim']} vectors, {results['nlist']} lists, "
+        f"IVF build {results['ivf_build_seconds']}s, open {results['ivf_open_ms']} ms",
+        f"exact search: p50 {results['exact']['p50_ms']} ms, p95 {results['exact']['p95_ms']} ms",
+        f"{'nprobe':>8}{f'recall@{k}':>12}{'p50 ms':>10}{'p95 ms':>10}",
+    ]
+    for row in results["ivf"]:
+        lines.append(f"{row['nprobe']:>8}{row[f'recall@{k}']:>12.3f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Vectors in the store")
+    parser.add_argument("--dim", type=int, default=128, help="Vector dimension")
+    parser.add_argument("--clusters", type=int, default=500, help="Synthetic topic clusters")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per setting")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (0 = ~4*sqrt(rows))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64], help="nprobe values to sweep")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    results = run(args.rows, args.dim, args.clusters, args.queries, args.k, args.nprobe, args.nlist)
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Shared timing/allocation harness for the offline benchmarks.
+
+Each benchmark runs a scenario against a ReplayLLMProvider. Timing and
+allocation tracking are measured in separate passes because tracemalloc
+slows Python code down considerably.
+"""
+
+import asyncio
+import inspect
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Union
+
+from gamma_engine.core.replay_llm import ReplayLLMProvider
+
+Scenario = Callable[[ReplayLLMProvider], Union[Awaitable[Any], Any]]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    steps: int
+    wall_seconds: float
+    simulated_llm_seconds: float
+    peak_alloc_bytes: int
+    retained_bytes_per_step: float
+
+    @property
+    def steps_per_second(self) -> float:
+        return self.steps / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def overhead_ms_per_step(self) -> float:
+        """Wall time per LLM step that was not spent in (simulated) model latency."""
+        if not self.steps:
+            return 0.0
+        return max(0.0, self.wall_seconds - self.simulated_llm_seconds) * 1000 / self.steps
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["steps_per_second"] = round(self.steps_per_second, 2)
+        data["overhead_ms_per_step"] = round(self.overhead_ms_per_step, 3)
+        return data
+
+
+def _run_once(scenario: Scenario, llm: ReplayLLMProvider) -> None:
+    llm.rewind()
+    result = scenario(llm)
+    if inspect.isawaitable(result):
+        asyncio.run(result)
+
+
+def run_benchmark(name: str, scenario: Scenario, llm: ReplayLLMProvider, iterations: int = 20, warmup: int = 1) -> BenchmarkResult:
+    """Run ``scenario`` ``iterations`` times and measure throughput, overhead and allocations."""
+    for _ in range(warmup):
+        _run_once(scenario, llm)
+
+    steps = 0
+    simulated = 0.0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _run_once(scenario, llm)
+        steps += llm.calls
+        simulated += llm.simulated_seconds
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        _run_once(scenario, llm)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        steps=steps,
+        wall_seconds=wall,
+        simulated_llm_seconds=simulated,
+        peak_alloc_bytes=peak,
+        retained_bytes_per_step=retained / max(llm.calls, 1)
+    )
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    header = f"{'benchmark':<20}{'steps/s':>12}{'overhead ms/step':>18}{'peak KiB':>12}{'retained B/step':>17}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.name:<20}{r.steps_per_second:>12.1f}{r.overhead_ms_per_step:>18.3f}"
+            f"{r.peak_alloc_bytes / 1024:>12.1f}{r.retained_bytes_per_step:>17.0f}"
+        )
+    return "\n".join(lines)
+
+
+def to_json(results: List[BenchmarkResult]) -> str:
+    return json.dumps([r.as_dict() for r in results], indent=2)
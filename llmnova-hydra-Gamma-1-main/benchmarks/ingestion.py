@@ -0,0 +1,161 @@
+"""
+Bulk ingestion benchmark: per-document ingestion vs. the pipelined BulkIngestor.
+
+Runs on a synthetic corpus (or a real directory with --dir) and reports
+chunks/second and peak RSS (including encode pool workers). Without
+--model, the dependency-free HashingEmbeddings is used so the benchmark
+runs anywhere; pass a sentence-transformers model and --processes -1 to
+measure multi-process encoding on the host's CPUs.
+
+Usage:
+    python -m benchmarks.ingestion --files 200 --words 4000
+    python -m benchmarks.ingestion --dir ./manuals --model all-MiniLM-L6-v2 --processes -1
+    python -m benchmarks.ingestion --chroma /tmp/chroma   # include real Chroma upserts
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from gamma_engine.core.ingestion.bulk import BulkIngestor, IngestionStats, current_rss
+from gamma_engine.core.ingestion.embeddings import EmbeddingService, HashingEmbeddings
+from gamma_engine.core.ingestion.loaders import LoaderFactory
+from gamma_engine.core.ingestion.processors import TextProcessor
+from gamma_engine.core.ingestion.vector_store import VectorStore
+
+_WORDS = (
+    "agent memory vector index query chunk document embedding model latency throughput "
+    "batch store corpus retrieval context token planner tool result error cache page"
+).split()
+
+
+class CountingVectorStore(VectorStore):
+    """Discards writes, counting them; isolates ingestion cost from storage cost."""
+
+    def __init__(self) -> None:
+        self.records = 0
+        self.writes = 0
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        self.upsert_texts(texts, metadatas, ids)
+
+    def upsert_texts(self, texts, metadatas=None, ids=None, embeddings=None):
+        self.records += len(texts)
+        self.writes += 1
+
+    def similarity_search(self, query, k=5):
+        return []
+
+
+def make_corpus(directory: str, files: int, words: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"doc_{i:04d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(" ".join(rng.choice(_WORDS) + str(rng.randrange(1000)) for _ in range(words)))
+        paths.append(path)
+    return paths
+
+
+def per_document(embedder: EmbeddingService, store: VectorStore, paths: List[str]) -> IngestionStats:
+    """The upload_document_to_corpus path: one file at a time, all of its chunks in one call."""
+    stats = IngestionStats(peak_rss_bytes=current_rss())
+    start = time.perf_counter()
+    for path in paths:
+        chunks = TextProcessor.chunk_text(LoaderFactory.get_loader(path).load(path), chunk_size=500, overlap=50)
+        name = os.path.basename(path)
+        store.upsert_texts(
+            texts=chunks,
+            metadatas=[{"source": name, "chunk_index": i} for i in range(len(chunks))],
+            ids=[f"{name}_{i}" for i in range(len(chunks))],
+            embeddings=embedder.embed_text(chunks)
+        )
+        stats.files += 1
+        stats.chunks += len(chunks)
+        stats.batches += 1
+        stats.peak_rss_bytes = max(stats.peak_rss_bytes, current_rss())
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def build_embedder(model: Optional[str], processes: int, batch_size: int) -> EmbeddingService:
+    if not model:
+        return HashingEmbeddings()
+    from gamma_engine.core.ingestion.embeddings import SentenceTransformerEmbeddings
+    return SentenceTransformerEmbeddings(model, batch_size=batch_size, processes=processes)
+
+
+def build_store(chroma: Optional[str], name: str) -> VectorStore:
+    if not chroma:
+        return CountingVectorStore()
+    from gamma_engine.core.ingestion.vector_store import ChromaVectorStore
+    return ChromaVectorStore(collection_name=name, embedding_function=None, persist_directory=chroma)
+
+
+def run_all(
+    paths: List[str],
+    model: Optional[str] = None,
+    processes: int = 0,
+    batch_size: int = 256,
+    chroma: Optional[str] = None
+) -> Dict[str, IngestionStats]:
+    embedder = build_embedder(model, processes, batch_size)
+    try:
+        results = {"per_document": per_document(embedder, build_store(chroma, "bench_per_document"), paths)}
+        ingestor = BulkIngestor(embedder, build_store(chroma, "bench_bulk"), batch_size=batch_size)
+        results["bulk"] = ingestor.ingest_files(paths)
+    finally:
+        if hasattr(embedder, "close"):
+            embedder.close()
+    return results
+
+
+def format_results(results: Dict[str, IngestionStats]) -> str:
+    header = f"{'mode':<16}{'files':>8}{'chunks':>10}{'seconds':>10}{'chunks/s':>12}{'peak RSS MiB':>14}"
+    lines = [header, "-" * len(header)]
+    for name, s in results.items():
+        lines.append(
+            f"{name:<16}{s.files:>8}{s.chunks:>10}{s.seconds:>10.2f}"
+            f"{s.chunks_per_second:>12.1f}{s.peak_rss_bytes / 2**20:>14.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="Ingest this directory instead of a synthetic corpus")
+    parser.add_argument("--files", type=int, default=100, help="Synthetic corpus: number of files")
+    parser.add_argument("--words", type=int, default=3000, help="Synthetic corpus: words per file")
+    parser.add_argument("--model", help="sentence-transformers model (default: hashing embeddings)")
+    parser.add_argument("--processes", type=int, default=0, help="Encode processes (-1 = one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding batch")
+    parser.add_argument("--chroma", help="Also write to a Chroma store in this directory")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.dir:
+            paths = sorted(
+                os.path.join(root, name) for root, _, names in os.walk(args.dir) for name in names
+            )
+        else:
+            paths = make_corpus(workdir, args.files, args.words)
+        results = run_all(paths, args.model, args.processes, args.batch_size, args.chroma)
+
+    if args.json:
+        print(json.dumps({name: s.as_dict() for name, s in results.items()}, indent=2))
+    else:
+        print(format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Quantization benchmark: memory vs. recall@k of int8 and PQ codes.
+
+Builds NumpyVectorStores over the same synthetic, clustered unit vectors
+with no quantization, int8 and PQ, and reports the bytes scanned per vector,
+recall@k against exact float32 search (with and without the full-precision
+re-rank) and query latency. Runs on CPU with NumPy only.
+
+Usage:
+    python -m benchmarks.quantization --rows 200000 --dim 384
+    python -m benchmarks.quantization --pq-subspaces 24 48 96 --rerank 1 4 16 --json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.ann import build_store, make_vectors
+
+
+def run(
+    rows: int = 100000,
+    dim: int = 128,
+    clusters: int = 500,
+    queries: int = 200,
+    k: int = 10,
+    pq_subspaces: Sequence[int] = (0,),
+    rerank_factors: Sequence[int] = (1, 4, 16)
+) -> Dict[str, Any]:
+    vectors = make_vectors(rows, dim, clusters)
+    rng = np.random.default_rng(1)
+    query_vectors = vectors[rng.integers(0, rows, queries)] + 0.1 * rng.standard_normal((queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    names = [f"q{i}" for i in range(queries)]
+    # Ground truth at float32, independent of the store's storage dtype
+    exact = [list(map(str, np.argsort(-(vectors @ q))[:k])) for q in query_vectors]
+
+    configs = [("none", 0)] + [("int8", 0)] + [("pq", m) for m in pq_subspaces]
+    results = {"rows": rows, "dim": dim, "k": k, "float32_bytes": dim * 4, "settings": []}
+    for quantization, subspaces in configs:
+        with tempfile.TemporaryDirectory() as path:
+            start = time.perf_counter()
+            store = build_store(
+                path, vectors, query_vectors, "flat",
+                quantization=quantization, pq_subspaces=subspaces, index_train_size=min(rows, 50000)
+            )
+            build_seconds = time.perf_counter() - start
+            if store.quantizer is not None:
+                code_bytes = store.quantizer.code_size * store.quantizer.code_dtype.itemsize
+                label = f"pq{store.quantizer.code_size}" if quantization == "pq" else quantization
+            else:
+                code_bytes, label = dim * store.dtype.itemsize, f"none ({store.dtype.name})"
+            for rerank in (rerank_factors if quantization != "none" else (1,)):
+                store.rerank_factor = rerank
+                found, latencies = [], []
+                for name in names:
+                    begin = time.perf_counter()
+                    found.append(store.similarity_search(name, k=k)["ids"][0])
+                    latencies.append((time.perf_counter() - begin) * 1000)
+                recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(found, exact)])
+                results["settings"].append({
+                    "quantization": label,
+                    "bytes_per_vector": code_bytes,
+                    "compression": round(dim * 4 / code_bytes, 1),
+                    "rerank_factor": rerank,
+                    f"recall@{k}": round(float(recall), 3),
+                    "p50_ms": _pct(latencies, 50),
+                    "p95_ms": _pct(latencies, 95),
+                    "build_seconds": round(build_seconds, 2)
+                })
+    return results
+
+
+def _pct(values: List[float], q: int) -> float:
+    return round(float(np.percentile(values, q)), 2)
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    k = results["k"]
+    lines = [
+        f"{results['rows']} x {results['dim']} vectors ({results['float32_bytes']} bytes each at float32)",
+        f"{'codes':>16}{'bytes':>8}{'ratio':>8}{'rerank':>8}{f'recall@{k}':>12}{'p50 ms':>10}{'p95 ms':>10}",
+    ]
+    for row in results["settings"]:
+        lines.append(
+            f"{row['quantization']:>16}{row['bytes_per_vector']:>8}{row['compression']:>8.1f}{row['rerank_factor']:>8}"
+            f"{row[f'recall@{k}']:>12.3f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Vectors in the store")
+    parser.add_argument("--dim", type=int, default=128, help="Vector dimension")
+    parser.add_argument("--clusters", type=int, default=500, help="Synthetic topic clusters")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per setting")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--pq-subspaces", type=int, nargs="+", default=[0], help="PQ bytes per vector to try (0 = dim / 8)")
+    parser.add_argument("--rerank", type=int, nargs="+", default=[1, 4, 16], help="Re-rank factors to sweep")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    results = run(args.rows, args.dim, args.clusters, args.queries, args.k, args.pq_subspaces, args.rerank)
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -46,8 +46,24 @@ export default function NeuralInterface({ ws, sessionId }: NeuralInterfaceProps)
 
       if (data.type === 'session_info') {
          // Session ID handled by parent
+      } else if (data.type === 'thought_delta') {
+        // Streamed tokens: grow the in-progress assistant bubble
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          if (last && last.streaming) {
+            return [...prev.slice(0, -1), { ...last, content: last.content + data.content }];
+          }
+          return [...prev, { role: 'assistant', content: data.content, streaming: true }];
+        });
       } else if (data.type === 'message' || data.type === 'thought') {
-        setMessages(prev => [...prev, { role: 'assistant', content: data.content }]);
+        // A full thought finalizes any bubble built from deltas
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          if (last && last.streaming) {
+            return [...prev.slice(0, -1), { role: 'assistant', content: data.content }];
+          }
+          return [...prev, { role: 'assistant', content: data.content }];
+        });
       } else if (data.type === 'final-answer') {
         setMessages(prev => [...prev, { role: 'final-answer', content: data.content }]);
       } else if (data.type === 'tool_call') {
@@ -3,6 +3,7 @@ Robust Agent implementation integrating OpenManus-style autonomous execution loo
 """
 
 import asyncio
+import inspect
 import json
 import logging
 import uuid
@@ -12,7 +13,7 @@ from typing import Any, Callable, Dict, List, Optional
 from ..interfaces.tool import ToolInterface
 from .memory import EpisodicMemory
 from .planner import Planner
-from ..interfaces.llm_provider import Message
+from ..interfaces.llm_provider import Message, async_chat
 from .browser_helper import BrowserContextHelper
 
 logger = logging.getLogger(__name__)
@@ -30,15 +31,24 @@ class Agent:
         llm_provider: Optional[Any] = None,
         session_id: Optional[str] = None,
         event_callback: Optional[Callable[..., Any]] = None,
-        max_steps: int = 30
+        max_steps: int = 30,
+        stream: bool = False
     ) -> None:
         self.session_id = session_id or str(uuid.uuid4())
         self.tools: Dict[str, ToolInterface] = {t.name: t for t in tools}
         self.event_callback = event_callback
         self.llm = llm_provider
-        self.memory = EpisodicMemory(session_id=self.session_id)
+        model = getattr(llm_provider, "model", None)
+        # Budget the history against the target model's real context window
+        self.memory = EpisodicMemory(
+            session_id=self.session_id,
+            llm_provider=self.llm,
+            model=model if isinstance(model, str) else None
+        )
         self.planner = Planner(llm_provider=self.llm)
         self.max_steps = max_steps
+        # When enabled, LLM output is forwarded token-by-token as 'thought_delta' events
+        self.stream = stream
         self.browser_helper = BrowserContextHelper(self)
         self.system_prompt = (
             "You are Gamma, an advanced AI assistant capable of solving complex tasks. "
@@ -66,6 +76,25 @@ class Agent:
             except Exception as e:
                 logger.error(f"Error in event callback: {e}")
 
+    async def _stream_llm(self, context: List[Dict[str, Any]]) -> Message:
+        """Consume the provider stream, forwarding deltas as they arrive."""
+        response: Optional[Message] = None
+        async for event in self.llm.astream(context, tools=self.tool_schemas):
+            if event.type == "text":
+                await self._emit("thought_delta", {"content": event.content})
+            elif event.type == "tool_call":
+                await self._emit("tool_call_delta", {
+                    "index": event.tool_call_index,
+                    "tool": event.tool_name,
+                    "args": event.content
+                })
+            elif event.type == "message":
+                response = event.message
+
+        if response is None:
+            raise RuntimeError("LLM stream ended without a final message.")
+        return response
+
     async def execute_tool(self, name: str, **kwargs: Any) -> Any:
         """Execute a named tool."""
         tool = self.tools.get(name)
@@ -95,12 +124,12 @@ class Agent:
         has_system = any(m.role == "system" for m in self.memory.messages)
         if not has_system:
              # Prepend system prompt (a bit hacky with current memory, but works)
-             self.memory.messages.insert(0, Message(role="system", content=self.system_prompt))
+             self.memory.insert(0, Message(role="system", content=self.system_prompt))
 
         # 2. Planning Phase
         await self._emit("status", {"content": "planning"})
         try:
-            plan = await asyncio.to_thread(self.planner.create_plan, user_input)
+            plan = await self.planner.acreate_plan(user_input)
             plan_str = "\n".join([f"{step.id}. {step.description}" for step in plan])
 
             self.add_message("system", f"The initial plan to achieve the goal is:\n{plan_str}")
@@ -131,6 +160,8 @@ class Agent:
                 # without persisting it permanently if it's just transient state?
                 # For now, let's treat it as a transient system message for this turn.
 
+                # Only blocks if background summarization has fallen behind the hard limit
+                await self.memory.ensure_within_budget()
                 context = self.memory.get_context()
 
                 # If the helper didn't add an image but returned text (prompt), we can append it
@@ -138,11 +169,14 @@ class Agent:
                 if browser_prompt and "Current Browser State" in browser_prompt:
                      context.append({"role": "system", "content": browser_prompt})
 
-                response = await asyncio.to_thread(
-                    self.llm.chat,
-                    history=context,
-                    tools=self.tool_schemas
-                )
+                if self.stream and inspect.isasyncgenfunction(getattr(self.llm, "astream", None)):
+                    response = await self._stream_llm(context)
+                else:
+                    response = await async_chat(
+                        self.llm,
+                        history=context,
+                        tools=self.tool_schemas
+                    )
             except Exception as e:
                 logger.error(f"LLM Chat error: {e}")
                 await self._emit("error", {"content": f"LLM Error: {e}"})
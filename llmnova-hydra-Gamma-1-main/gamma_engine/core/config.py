@@ -10,8 +10,91 @@ class Settings(BaseSettings):
 
     # LLM & RAG
     llm_model: str = Field(default="gpt-4o", env="LLM_MODEL")
+    # "vertex", "local" (Chroma) or "numpy" (local, memory-mapped NumPy vector store)
     rag_provider: str = Field(default="vertex", env="RAG_PROVIDER")
 
+    # LLM response cache (in-process LRU tier in front of Redis)
+    llm_cache_max_entries: int = 1024
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    llm_cache_ttl_seconds: int = 3600
+    # Share one upstream call between identical requests issued by different workers
+    llm_coalesce_across_workers: bool = False
+
+    # Client-side rate limiting per provider/model (adapted down on 429s)
+    llm_requests_per_minute: float = 500
+    llm_tokens_per_minute: float = 150_000
+    llm_max_concurrency: int = 32
+    llm_max_retries: int = 5
+
+    # Opt-in hedging/failover: comma-separated equivalent models tried after llm_model
+    # (streams are hedged only until their first event)
+    llm_fallback_models: str = Field(default="", env="LLM_FALLBACK_MODELS")
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_default_delay: float = 10.0
+    llm_breaker_error_rate: float = 0.5
+    llm_breaker_latency_seconds: float = 60.0
+    llm_breaker_cooldown_seconds: float = 30.0
+
+    # Memory token accounting
+    tokenizer_bpe_path: str = Field(default="", env="TOKENIZER_BPE_PATH")
+    memory_reserved_output_tokens: int = 4096
+    # Fraction of the budget at which background summarization starts
+    memory_summary_soft_ratio: float = 0.75
+    # Session journal durability: "always", "interval" (~1s) or "never"
+    memory_journal_fsync: str = "interval"
+    # Redis session history: tail size loaded on reconnect, validation depth, write batch size
+    memory_redis_tail_messages: int = 200
+    memory_redis_validate_recent: int = 20
+    memory_redis_batch_size: int = 16
+    # LongTermMemory write-behind: facts per batch and max seconds a fact waits
+    ltm_write_batch_size: int = 32
+    ltm_write_flush_interval: float = 2.0
+    # Persistent episode store (SQLite + memory-mapped embeddings), shared across sessions
+    episodic_store_path: str = "file_storage/episodes"
+    # Content-hash embedding cache shared by all ingestion (empty path disables it)
+    embedding_cache_path: str = "file_storage/embedding_cache"
+    embedding_cache_dtype: str = "float16"
+    # Bulk ingestion: encode batch size, encode processes (0 = in-process, -1 = one per CPU),
+    # chunks per embedding batch / vector store write, parsed batches buffered ahead of the encoder
+    embedding_batch_size: int = 64
+    embedding_processes: int = 0
+    ingest_batch_size: int = 256
+    ingest_upsert_batch_size: int = 1000
+    ingest_max_in_flight_batches: int = 4
+    # Hybrid retrieval (local RAG): candidates fetched per retriever, RRF constant, and the
+    # minimum cosine similarity of passages the knowledge base tool returns (fused RRF scores
+    # only reflect rank, so an unrelated query's best match would still score ~0.5)
+    rag_hybrid_candidates: int = 20
+    rag_rrf_k: int = 60
+    rag_min_similarity: float = 0.25
+    # Multi-corpus queries drop passages whose word 3-shingles overlap a better one's this much (Jaccard)
+    rag_dedup_threshold: float = 0.9
+    # Query-side caches: retrieved passages per (corpora, query, k), invalidated on writes to a
+    # corpus (the TTL bounds staleness from other processes), and query embeddings; 0 disables
+    rag_query_cache_max_entries: int = 1024
+    rag_query_cache_ttl_seconds: int = 300
+    rag_query_embedding_cache_size: int = 1024
+    # Corpus namespaces (collection + keyword index + manifest) the local provider keeps open
+    rag_max_open_corpora: int = 256
+    # Queries of a corpus that has no namespace yet read the default corpus instead, where
+    # data written before corpora had their own namespaces lives (all corpora shared it)
+    rag_legacy_corpus_fallback: bool = True
+    # Vector store of the "numpy" RAG provider (memory-mapped segments): storage dtype
+    # and the segment count above which segments are merged in the background
+    vector_store_dtype: str = "float16"
+    vector_store_max_segments: int = 8
+    # Its ANN index: "flat" (exact) or "ivf", trained once the store holds vector_index_train_size
+    # rows; nprobe lists are scored per query (recall vs latency), nlist 0 = ~4*sqrt(rows)
+    vector_index: str = "flat"
+    vector_index_nprobe: int = 16
+    vector_index_nlist: int = 0
+    vector_index_train_size: int = 50000
+    # Compressed codes scanned at search time: "none", "int8" (4x smaller) or "pq" (pq_subspaces
+    # bytes per vector, 0 = dim / 8); the best k * rerank_factor are re-ranked at full precision
+    vector_quantization: str = "none"
+    vector_pq_subspaces: int = 0
+    vector_rerank_factor: int = 4
+
     # Google Cloud
     google_cloud_project: str = Field(default="", env="GOOGLE_CLOUD_PROJECT")
     google_cloud_location: str = Field(default="", env="GOOGLE_CLOUD_LOCATION")
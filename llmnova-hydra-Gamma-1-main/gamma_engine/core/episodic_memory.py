@@ -2,16 +2,36 @@
 
 This module defines the data structures and store for managing the agent's
 episodic memory, which records past experiences, actions, and reflections.
+
+Episodes are persisted in SQLite and their goal + reflection embeddings in a
+flat float32 matrix file that is memory-mapped for search, so finding the
+most similar past experience is one matrix-vector product over all episodes
+(no LLM call), even with hundreds of thousands of them.
+
+A store directory has a single writer: row numbers and the vector file are
+tracked in memory, so a process opens each path once, through
+:func:`get_shared_episodic_store`.
 """
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
 from uuid import uuid4
 import datetime
+import json
 import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from .ingestion.embeddings import HashingEmbeddings
 
 logger = logging.getLogger(__name__)
 
+# Rows scored per block, bounding temporary memory during search
+_SEARCH_BLOCK = 65536
+
 @dataclass
 class Action:
     """Represents a single action taken by the agent within an episode."""
@@ -22,44 +42,318 @@ class Action:
 @dataclass
 class Episode:
     """Represents a single episode of the agent's experience."""
-    id: str = field(default_factory=lambda: str(uuid4()))
     goal: str
     context: Dict[str, Any] # Initial state and objective
-    actions: List[Action] = field(default_factory=list)
     outcome: str # e.g., "success", "failure"
+    actions: List[Action] = field(default_factory=list)
     reflection: Optional[str] = None # Why it worked or failed
+    id: str = field(default_factory=lambda: str(uuid4()))
     timestamp: datetime.datetime = field(default_factory=datetime.datetime.now)
 
-@dataclass
+    @property
+    def search_text(self) -> str:
+        """Text embedded for similarity search."""
+        return f"{self.goal}\n{self.reflection or ''}"
+
 class EpisodicStore:
-    """Manages the storage and retrieval of agent episodes."""
-    episodes: List[Episode] = field(default_factory=list)
-    # In a real system, this would be backed by a persistent store (e.g., database, vector DB)
+    """
+    Manages the storage and retrieval of agent episodes.
+
+    Args:
+        path: Directory holding ``episodes.db`` and ``embeddings.f32``. When
+            None, the store lives in memory only.
+        embed_fn: Batch embedding function (texts -> vectors). Defaults to
+            dependency-free hashing embeddings; pass e.g.
+            ``SentenceTransformerEmbeddings().embed_text`` for semantic matches.
+        embedding_model: Name of the model behind ``embed_fn``. A store
+            written by a different model is re-embedded when opened.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        embedding_model: str = "hashing"
+    ):
+        self.path = path
+        self.embed_fn = embed_fn or HashingEmbeddings().embed_text
+        self.embedding_model = embedding_model if embed_fn else "hashing"
+        self._lock = threading.RLock()
+        self._dim: Optional[int] = None
+        self._count = 0
+        # Per-row filter columns, kept in memory for vectorized masking
+        self._outcome_codes: Dict[str, int] = {}
+        self._outcomes = np.empty(0, dtype=np.int32)
+        self._timestamps = np.empty(0, dtype=np.float64)
+        self._matrix: Optional[np.memmap] = None  # read-only map of embeddings.f32
+        self._buffer = np.empty((0, 0), dtype=np.float32)  # in-memory stores: grown by doubling
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._vectors_path = os.path.join(path, "embeddings.f32")
+            self._db = sqlite3.connect(os.path.join(path, "episodes.db"), check_same_thread=False)
+        else:
+            self._vectors_path = None
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS episodes ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE, goal TEXT, context TEXT, actions TEXT, "
+            "outcome TEXT, reflection TEXT, timestamp REAL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _load(self) -> None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self._dim = int(row[0]) if row else None
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'model'").fetchone()
+        if self._dim and (row[0] if row else "hashing") != self.embedding_model:
+            self._reembed()
+        rows = self._db.execute("SELECT outcome, timestamp FROM episodes ORDER BY row").fetchall()
+        count = len(rows)
+
+        if self._vectors_path and self._dim:
+            stored = os.path.getsize(self._vectors_path) // (4 * self._dim) if os.path.exists(self._vectors_path) else 0
+            if stored < count:
+                # Vector file lost its tail (e.g. restored from an older copy): drop unindexed rows
+                self._db.execute("DELETE FROM episodes WHERE row >= ?", (stored,))
+                self._db.commit()
+                rows, count = rows[:stored], stored
+            elif stored > count:
+                with open(self._vectors_path, "r+b") as f:
+                    f.truncate(count * 4 * self._dim)
+
+        self._outcomes = np.array([self._outcome_code(o) for o, _ in rows], dtype=np.int32)
+        self._timestamps = np.array([t for _, t in rows], dtype=np.float64)
+        self._count = count
+        self._matrix = None
+        if count:
+            logger.info(f"EpisodicStore loaded {count} episodes from {self.path}")
+
+    def _reembed(self) -> None:
+        """Rewrites every embedding with ``embed_fn`` (the store was written by another model)."""
+        texts = [
+            Episode(goal=goal, context={}, outcome="", reflection=reflection).search_text
+            for goal, reflection in self._db.execute("SELECT goal, reflection FROM episodes ORDER BY row")
+        ]
+        if not texts:
+            # Nothing to keep; the next save sets dimension and model
+            self._dim = None
+            self._db.execute("DELETE FROM meta")
+            self._db.commit()
+            if self._vectors_path and os.path.exists(self._vectors_path):
+                os.remove(self._vectors_path)
+            return
+        vectors = self._embed(texts)
+        self._dim = vectors.shape[1]
+        if self._vectors_path:
+            tmp_path = f"{self._vectors_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._vectors_path)
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self._dim),))
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('model', ?)", (self.embedding_model,))
+        self._db.commit()
+        logger.info(f"EpisodicStore re-embedded {len(texts)} episodes with {self.embedding_model}")
+
+    def _outcome_code(self, outcome: str) -> int:
+        return self._outcome_codes.setdefault(outcome, len(self._outcome_codes))
+
+    def _vectors(self) -> np.ndarray:
+        """Normalized embedding matrix of shape (count, dim)."""
+        if self._count == 0 or self._dim is None:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        if not self._vectors_path:
+            return self._buffer[:self._count]
+        if self._matrix is None or self._matrix.shape[0] != self._count:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._count, self._dim))
+        return self._matrix
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
 
     def save_episode(self, episode: Episode) -> None:
         """Saves a new episode to the store."""
-        self.episodes.append(episode)
+        self.save_episodes([episode])
         logger.info(f"Episode saved: {episode.id} for goal '{episode.goal}' with outcome '{episode.outcome}'")
 
-    def find_similar_episodes(self, current_goal: str, n_results: int = 1) -> List[Episode]:
+    def save_episodes(self, episodes: List[Episode]) -> None:
+        """Saves episodes with a single embedding call and transaction."""
+        if not episodes:
+            return
+        vectors = self._embed([e.search_text for e in episodes])
+        with self._lock:
+            new_dim = self._dim is None
+            if new_dim:
+                self._dim = vectors.shape[1]
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self._dim),))
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('model', ?)", (self.embedding_model,))
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self._dim}")
+
+            start = self._count
+            size = os.path.getsize(self._vectors_path) if self._vectors_path and os.path.exists(self._vectors_path) else 0
+            try:
+                self._append(start, vectors, episodes)
+            except BaseException:
+                # e.g. a duplicate id: drop only this call's vectors so later rows stay aligned
+                self._db.rollback()
+                if self._vectors_path and os.path.exists(self._vectors_path):
+                    with open(self._vectors_path, "r+b") as f:
+                        f.truncate(size)
+                if new_dim:
+                    self._dim = None
+                raise
+
+            self._outcomes = np.concatenate([self._outcomes, [self._outcome_code(e.outcome) for e in episodes]]).astype(np.int32)
+            self._timestamps = np.concatenate([self._timestamps, [e.timestamp.timestamp() for e in episodes]])
+            self._count += len(episodes)
+
+    def _append(self, start: int, vectors: np.ndarray, episodes: List[Episode]) -> None:
+        """Writes ``vectors`` and then the rows of ``episodes`` at row ``start`` onwards."""
+        # Vectors first: vectors without a committed row are truncated on load
+        if self._vectors_path:
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            needed = start + len(vectors)
+            if needed > self._buffer.shape[0]:
+                grown = np.empty((max(needed, 2 * self._buffer.shape[0], 64), self._dim), dtype=np.float32)
+                if start:
+                    grown[:start] = self._buffer[:start]
+                self._buffer = grown
+            self._buffer[start:needed] = vectors
+
+        self._db.executemany(
+            "INSERT INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    start + i, e.id, e.goal, json.dumps(e.context, default=str),
+                    json.dumps([asdict(a) for a in e.actions], default=str),
+                    e.outcome, e.reflection, e.timestamp.timestamp()
+                )
+                for i, e in enumerate(episodes)
+            ]
+        )
+        self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def find_similar_episodes(
+        self,
+        current_goal: str,
+        n_results: int = 1,
+        outcome: Optional[str] = "success",
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None
+    ) -> List[Episode]:
         """
-        Finds and returns similar past episodes based on the current goal.
-        This is a placeholder for a more sophisticated similarity search (e.g., using embeddings).
+        Finds the past episodes most similar to the current goal (cosine
+        similarity of goal + reflection embeddings).
+
+        Args:
+            current_goal: Goal to match.
+            n_results: Maximum number of episodes to return.
+            outcome: Only consider episodes with this outcome (None for any).
+            since, until: Only consider episodes recorded in this time range.
         """
         logger.info(f"Searching for similar episodes for goal: '{current_goal}'")
-        # For demonstration, return the most recent successful episode if any
-        successful_episodes = [e for e in self.episodes if e.outcome == "success"]
-        if successful_episodes:
-            # Sort by timestamp descending
-            successful_episodes.sort(key=lambda x: x.timestamp, reverse=True)
-            return successful_episodes[:n_results]
-        return []
+        with self._lock:
+            if self._count == 0 or n_results <= 0:
+                return []
+            if outcome is not None and outcome not in self._outcome_codes:
+                return []
+
+            mask = np.ones(self._count, dtype=bool)
+            if outcome is not None:
+                mask &= self._outcomes == self._outcome_codes[outcome]
+            if since is not None:
+                mask &= self._timestamps >= since.timestamp()
+            if until is not None:
+                mask &= self._timestamps <= until.timestamp()
+            candidates = int(mask.sum())
+            if candidates == 0:
+                return []
+
+            query = self._embed([current_goal])[0]
+            matrix = self._vectors()
+            scores = np.empty(self._count, dtype=np.float32)
+            for start in range(0, self._count, _SEARCH_BLOCK):
+                scores[start:start + _SEARCH_BLOCK] = matrix[start:start + _SEARCH_BLOCK] @ query
+            scores[~mask] = -np.inf
+
+            k = min(n_results, candidates)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return self._fetch([int(r) for r in top])
+
+    def _fetch(self, rows: List[int]) -> List[Episode]:
+        placeholders = ",".join("?" * len(rows))
+        records = {
+            r[0]: r for r in self._db.execute(f"SELECT * FROM episodes WHERE row IN ({placeholders})", rows)
+        }
+        return [self._to_episode(records[row]) for row in rows if row in records]
+
+    @staticmethod
+    def _to_episode(record: tuple) -> Episode:
+        _, episode_id, goal, context, actions, outcome, reflection, timestamp = record
+        return Episode(
+            id=episode_id,
+            goal=goal,
+            context=json.loads(context),
+            actions=[Action(**a) for a in json.loads(actions)],
+            outcome=outcome,
+            reflection=reflection,
+            timestamp=datetime.datetime.fromtimestamp(timestamp)
+        )
+
+    @property
+    def episodes(self) -> List[Episode]:
+        """All episodes, oldest first (loads every record; prefer find_similar_episodes)."""
+        with self._lock:
+            return [self._to_episode(r) for r in self._db.execute("SELECT * FROM episodes ORDER BY row")]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        """Deletes every stored episode."""
+        with self._lock:
+            self._db.execute("DELETE FROM episodes")
+            self._db.execute("DELETE FROM meta")
+            self._db.commit()
+            if self._vectors_path and os.path.exists(self._vectors_path):
+                os.remove(self._vectors_path)
+            self._dim = None
+            self._buffer = np.empty((0, 0), dtype=np.float32)
+            self._outcome_codes = {}
+            self._load()
+
+    def close(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._db.close()
 
     def __str__(self) -> str:
-        if not self.episodes:
+        if not self._count:
             return "No episodes recorded."
-        s = "Episodic Memory:\n"
-        for episode in self.episodes:
+        s = f"Episodic Memory ({self._count} episodes, most recent first):\n"
+        recent = self._db.execute("SELECT * FROM episodes ORDER BY row DESC LIMIT 10").fetchall()
+        for episode in map(self._to_episode, recent):
             s += f"- ID: {episode.id}\n"
             s += f"  Goal: {episode.goal}\n"
             s += f"  Outcome: {episode.outcome}\n"
@@ -68,3 +362,25 @@ class EpisodicStore:
                 s += f"  Reflection: {episode.reflection[:100]}...\n"
             s += f"  Actions: {len(episode.actions)} actions\n"
         return s
+
+
+_shared_stores: Dict[str, EpisodicStore] = {}
+_shared_stores_lock = threading.Lock()
+
+def get_shared_episodic_store(
+    path: str,
+    embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    embedding_model: str = "hashing"
+) -> EpisodicStore:
+    """
+    Return the process-wide store for ``path``, opening it on first use
+    (``embed_fn`` and ``embedding_model`` only apply then). Every session
+    writes through this one instance, so row numbers never go stale.
+    """
+    key = os.path.abspath(path)
+    with _shared_stores_lock:
+        store = _shared_stores.get(key)
+        if store is None:
+            store = EpisodicStore(path=path, embed_fn=embed_fn, embedding_model=embedding_model)
+            _shared_stores[key] = store
+        return store
@@ -0,0 +1,149 @@
+"""
+On-disk BM25 keyword index, maintained alongside the vector store.
+
+Dense retrieval misses exact identifiers (error codes, file and function
+names); this index catches them. Postings live in SQLite:
+
+    docs(id, length)                 one row per stored chunk
+    postings(term, doc_id, tf)       clustered by term for query lookups
+
+The tokenizer keeps compound identifiers whole (``err_conn_reset``,
+``config.yaml``, ``v1.2.3``) and also indexes their parts, so both the
+exact string and its components match.
+"""
+
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+_TOKEN = re.compile(r"\w+(?:[.\-/:]\w+)*")
+_PART_SEPARATORS = re.compile(r"[.\-/:_]+")
+
+# SQLite host parameters per statement
+_IN_BATCH = 500
+
+
+def tokenize(text: str) -> Iterator[str]:
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        yield token
+        if not token.isalnum():
+            parts = [p for p in _PART_SEPARATORS.split(token) if p]
+            if len(parts) > 1:
+                yield from parts
+
+
+class BM25Index:
+    """
+    Args:
+        path: SQLite file of the index (None keeps it in memory).
+        k1, b: BM25 term-frequency saturation and length normalization.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, length INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+            """
+        )
+        self._docs, self._total_length = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+
+    def __len__(self) -> int:
+        return self._docs
+
+    def upsert(self, ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Index ``texts`` under ``ids``, replacing any previous text of those ids."""
+        if not ids:
+            return
+        docs = []
+        postings = []
+        for doc_id, text in dict(zip(ids, texts)).items():  # last text wins for repeated ids
+            counts = Counter(tokenize(text))
+            docs.append((doc_id, sum(counts.values())))
+            postings.extend((term, doc_id, tf) for term, tf in counts.items())
+        with self._lock, self._conn:
+            self._remove([doc_id for doc_id, _ in docs])
+            self._conn.executemany("INSERT INTO docs (id, length) VALUES (?, ?)", docs)
+            self._conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)", postings)
+            self._docs += len(docs)
+            self._total_length += sum(length for _, length in docs)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        if not ids:
+            return
+        with self._lock, self._conn:
+            self._remove(list(ids))
+
+    def _remove(self, ids: List[str]) -> None:
+        for start in range(0, len(ids), _IN_BATCH):
+            batch = ids[start:start + _IN_BATCH]
+            marks = ",".join("?" * len(batch))
+            count, length = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE id IN ({marks})", batch
+            ).fetchone()
+            self._conn.execute(f"DELETE FROM postings WHERE doc_id IN ({marks})", batch)
+            self._conn.execute(f"DELETE FROM docs WHERE id IN ({marks})", batch)
+            self._docs -= count
+            self._total_length -= length
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top ``k`` (id, BM25 score) pairs, best first."""
+        terms = Counter(tokenize(query))
+        if not terms or not self._docs:
+            return []
+        with self._lock:
+            average_length = self._total_length / self._docs
+            scores: Counter = Counter()
+            for term, query_tf in terms.items():
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id WHERE p.term = ?",
+                    (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (self._docs - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[doc_id] += query_tf * idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def rebuild(self, records: Iterable[Tuple[Sequence[str], Sequence[str]]]) -> int:
+        """Re-index from ``(ids, texts)`` batches, e.g. an existing collection. Returns the document count."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM docs")
+            self._docs = self._total_length = 0
+        for ids, texts in records:
+            self.upsert(ids, texts)
+        return self._docs
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def drop(self) -> None:
+        """Close the index and delete its file."""
+        self.close()
+        if self.path:
+            for path in (self.path, f"{self.path}-journal"):
+                if os.path.exists(path):
+                    os.remove(path)
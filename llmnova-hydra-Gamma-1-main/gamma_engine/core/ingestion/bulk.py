@@ -0,0 +1,248 @@
+"""
+Bulk ingestion of many documents into a vector store.
+
+Loading/chunking and embedding/upserting run as a two-stage pipeline:
+a producer thread streams pages out of each file (PDF extraction is
+CPU-bound Python), chunks them and fills fixed-size batches, while the
+caller's thread embeds each batch in one call (optionally fanned out to a
+multi-process encode pool by the embedder) and upserts it in chunks. The queue between the stages holds
+at most ``max_in_flight_batches`` batches, which bounds memory no matter
+how large the corpus is.
+
+With a :class:`DocumentManifest`, unchanged files are skipped and changed
+files only send their new chunks down the pipeline; a file's orphaned
+chunks are deleted (and its manifest entry written) once the batch holding
+its last chunk has been stored.
+
+Each document is keyed (manifest entry, chunk ids and ``source`` metadata)
+by its path relative to the ingest root, so files with the same name in
+different directories stay distinct.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+from ..metrics import get_metrics_collector
+from .embeddings import EmbeddingService
+from .loaders import LoaderFactory
+from .manifest import DocumentManifest, DocumentUpdate, file_fingerprint
+from .processors import TextProcessor
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# texts, metadatas, ids, documents completed by this batch
+Batch = Tuple[List[str], List[Dict[str, Any]], List[str], List[DocumentUpdate]]
+
+_DONE = object()
+
+
+@dataclass
+class IngestionStats:
+    files: int = 0
+    failed_files: int = 0
+    skipped_files: int = 0
+    chunks: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    peak_rss_bytes: int = 0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["chunks_per_second"] = round(self.chunks_per_second, 1)
+        data["peak_rss_mb"] = round(self.peak_rss_bytes / (1024 * 1024), 1)
+        return data
+
+
+def current_rss() -> int:
+    """Resident memory of this process plus its children (e.g. encode pool workers)."""
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
+
+def document_names(paths: List[str], root: Optional[str] = None) -> List[str]:
+    """Document keys of ``paths``: their paths relative to ``root`` (default: their common directory), "/"-separated."""
+    if not paths:
+        return []
+    absolute = [os.path.abspath(p) for p in paths]
+    base = os.path.abspath(root) if root else os.path.commonpath([os.path.dirname(p) for p in absolute])
+    return [os.path.relpath(p, base).replace(os.sep, "/") for p in absolute]
+
+
+class BulkIngestor:
+    """
+    Args:
+        embedder: Embeds each batch with one ``embed_text`` call.
+        vector_store: Receives the chunks with their precomputed embeddings.
+        batch_size: Chunks per embedding call.
+        upsert_batch_size: Chunks per vector store write.
+        max_in_flight_batches: Parsed batches allowed to wait for embedding.
+        chunk_size, overlap: Chunking parameters (in words).
+        manifest: Enables incremental re-ingestion (see module docstring).
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        vector_store: VectorStore,
+        batch_size: int = 256,
+        upsert_batch_size: int = 1000,
+        max_in_flight_batches: int = 4,
+        chunk_size: int = 500,
+        overlap: int = 50,
+        manifest: Optional[DocumentManifest] = None
+    ):
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.max_in_flight_batches = max_in_flight_batches
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.manifest = manifest
+        self.metrics = get_metrics_collector()
+
+    def ingest_directory(self, directory: str, extensions: Optional[Iterable[str]] = None) -> IngestionStats:
+        """Ingest every file under ``directory`` (optionally only these extensions)."""
+        wanted = {e.lower() for e in extensions} if extensions else None
+        paths = []
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if wanted is None or os.path.splitext(name)[1].lower() in wanted:
+                    paths.append(os.path.join(root, name))
+        return self.ingest_files(sorted(paths), root=directory)
+
+    def ingest_files(self, paths: List[str], root: Optional[str] = None) -> IngestionStats:
+        """Ingest ``paths``, keyed relative to ``root`` (default: their common directory)."""
+        stats = IngestionStats()
+        batches: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_in_flight_batches)
+        stop = threading.Event()
+        start = time.perf_counter()
+        stats.peak_rss_bytes = current_rss()
+
+        names = document_names(paths, root)
+        producer = threading.Thread(target=self._produce, args=(paths, names, batches, stop, stats), name="bulk-ingest-loader", daemon=True)
+        producer.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is _DONE:
+                    break
+                if batch[0]:
+                    self._write(batch)
+                    stats.chunks += len(batch[0])
+                    stats.batches += 1
+                if self.manifest is not None:
+                    for update in batch[3]:
+                        update.apply(self.vector_store, self.manifest, save=False)
+                stats.peak_rss_bytes = max(stats.peak_rss_bytes, current_rss())
+        finally:
+            stop.set()
+            producer.join()
+            if self.manifest is not None:
+                self.manifest.save()
+
+        stats.seconds = time.perf_counter() - start
+        self.metrics.record("ingestion.bulk.chunks_per_second", stats.chunks_per_second)
+        self.metrics.set_gauge("ingestion.bulk.peak_rss_bytes", stats.peak_rss_bytes)
+        logger.info(
+            f"Bulk ingestion: {stats.files} files ({stats.skipped_files} unchanged), {stats.chunks} chunks in {stats.seconds:.1f}s "
+            f"({stats.chunks_per_second:.1f} chunks/s, peak RSS {stats.peak_rss_bytes / 2**20:.0f} MiB)"
+        )
+        return stats
+
+    def _put(self, batches: "queue.Queue[Any]", item: Any, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, paths: List[str], names: List[str], batches: "queue.Queue[Any]", stop: threading.Event, stats: IngestionStats) -> None:
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        ids: List[str] = []
+        completed: List[DocumentUpdate] = []
+        try:
+            for path, display_name in zip(paths, names):
+                if stop.is_set():
+                    return
+                try:
+                    update = self._start_document(path, display_name)
+                    if update is None:
+                        stats.skipped_files += 1
+                        continue
+                    blocks = LoaderFactory.get_loader(path).iter_blocks(path)
+                    for chunk in TextProcessor.iter_chunks(blocks, chunk_size=self.chunk_size, overlap=self.overlap):
+                        record = update.add(chunk)
+                        if record is None:
+                            continue
+                        texts.append(chunk.text)
+                        metadatas.append(record.metadata)
+                        ids.append(record.id)
+                        if len(texts) >= self.batch_size:
+                            if not self._put(batches, (texts, metadatas, ids, completed), stop):
+                                return
+                            texts, metadatas, ids, completed = [], [], [], []
+                except Exception as e:
+                    # Chunks read before the error are kept; the rest of the file is skipped
+                    # and, as its manifest entry is not updated, retried on the next run
+                    logger.error(f"Bulk ingestion could not load '{path}': {e}")
+                    stats.failed_files += 1
+                    continue
+                completed.append(update)
+                stats.files += 1
+            if texts or completed:
+                self._put(batches, (texts, metadatas, ids, completed), stop)
+        finally:
+            # Unblocks the consumer even if loading failed unexpectedly
+            while True:
+                try:
+                    batches.put(_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    if stop.is_set():
+                        break
+
+    def _start_document(self, path: str, display_name: str) -> Optional[DocumentUpdate]:
+        """The diff to build for ``path``, or None if the manifest says it is unchanged."""
+        if self.manifest is None:
+            return DocumentUpdate(display_name, file_hash="")
+        file_hash = file_fingerprint(path)
+        previous = self.manifest.get(display_name)
+        if previous is not None and previous.file_hash == file_hash:
+            return None
+        return DocumentUpdate(display_name, file_hash, previous)
+
+    def _write(self, batch: Batch) -> None:
+        texts, metadatas, ids, _ = batch
+        embeddings = self.embedder.embed_text(texts)
+        if len(embeddings) != len(texts):
+            raise RuntimeError(f"Embedder returned {len(embeddings)} vectors for {len(texts)} chunks")
+        for start in range(0, len(texts), self.upsert_batch_size):
+            end = start + self.upsert_batch_size
+            self.vector_store.upsert_texts(
+                texts=texts[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end],
+                embeddings=embeddings[start:end]
+            )
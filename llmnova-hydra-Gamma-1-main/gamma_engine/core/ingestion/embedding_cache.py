@@ -0,0 +1,182 @@
+"""
+Content-addressed on-disk cache of embeddings.
+
+Chunks are keyed by a hash of their whitespace-normalized text, one cache
+directory per embedding model, so re-ingesting a document (or ingesting the
+same boilerplate again) reuses vectors instead of running the model:
+
+    <root>/<model>/keys.bin      16-byte BLAKE2b digests, one per row
+    <root>/<model>/vectors.bin   float16/float32 rows, memory-mapped for reads
+    <root>/<model>/meta.json     {"dim": ..., "dtype": ...}
+
+Both data files are append-only; vectors are written before their keys, so
+a crash can only leave unreferenced vector rows (or a partial trailing row),
+which are truncated on load.
+
+A cache directory is single-writer: one EmbeddingCache per directory per
+process, and one process writing at a time. Appends are not locked across
+processes, so two writers would interleave rows and keys.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..metrics import get_metrics_collector
+
+KEY_BYTES = 16
+
+
+def content_key(text: str) -> bytes:
+    """Cache key of a chunk: its text with whitespace runs collapsed."""
+    normalized = " ".join(text.split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    """
+    Append-only key -> vector store for one embedding model.
+
+    Args:
+        path: Directory of this model's cache (created on first write).
+        dtype: "float16" (half the disk and page cache, ample precision for
+            cosine search) or "float32".
+    """
+
+    def __init__(self, path: str, dtype: str = "float16"):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported cache dtype '{dtype}'")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.dim: Optional[int] = None
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0
+        self._matrix: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._keys_path = os.path.join(path, "keys.bin")
+        self._vectors_path = os.path.join(path, "vectors.bin")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._load()
+
+    @classmethod
+    def for_model(cls, root: str, model_name: str, dtype: str = "float16") -> "EmbeddingCache":
+        return cls(os.path.join(root, re.sub(r"[^\w.-]+", "_", model_name)), dtype=dtype)
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.dtype = np.dtype(meta["dtype"])
+        row_bytes = self.dim * self.dtype.itemsize
+        vector_rows = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        keys = b""
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "rb") as f:
+                keys = f.read()
+        rows = min(len(keys) // KEY_BYTES, vector_rows)
+        # Drop vectors whose keys never made it to disk and partial trailing
+        # rows of either file, so later appends stay aligned
+        for path, size in ((self._vectors_path, rows * row_bytes), (self._keys_path, rows * KEY_BYTES)):
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        keys = keys[:rows * KEY_BYTES]
+        self._index = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(rows)}
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._index
+
+    def _vectors(self) -> np.memmap:
+        if self._matrix is None or self._matrix.shape[0] != self._rows:
+            self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self.dim))
+        return self._matrix
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        """Cached float32 vectors for ``keys`` (None where missing)."""
+        with self._lock:
+            rows = [self._index.get(k) for k in keys]
+            hits = [r for r in rows if r is not None]
+            if not hits:
+                return [None] * len(keys)
+            found = np.asarray(self._vectors()[hits], dtype=np.float32)
+        vectors = iter(found)
+        return [next(vectors) if r is not None else None for r in rows]
+
+    def put_many(self, keys: Sequence[bytes], vectors: Sequence[Sequence[float]]) -> None:
+        if not keys:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                os.makedirs(self.path, exist_ok=True)
+                self.dim = array.shape[1]
+                with open(self._meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": self.dim, "dtype": self.dtype.name}, f)
+            elif array.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {array.shape[1]} does not match cache dimension {self.dim}")
+
+            fresh = {}
+            for key, vector in zip(keys, array):
+                if key not in self._index and key not in fresh:
+                    fresh[key] = vector
+            if not fresh:
+                return
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.stack(list(fresh.values())).astype(self.dtype).tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(fresh))
+            for key in fresh:
+                self._index[key] = self._rows
+                self._rows += 1
+
+
+def cached_embed(
+    cache: Optional[EmbeddingCache],
+    model_name: str,
+    texts: List[str],
+    compute: Callable[[List[str]], List[List[float]]]
+) -> List[List[float]]:
+    """
+    Embed ``texts``, serving repeats from ``cache`` and running ``compute``
+    once for the distinct misses. Hit/miss counts go to the metrics collector.
+    """
+    if cache is None or not texts:
+        return compute(texts)
+
+    keys = [content_key(t) for t in texts]
+    cached = cache.get_many(keys)
+    missing: Dict[bytes, str] = {}
+    for key, text, vector in zip(keys, texts, cached):
+        if vector is None and key not in missing:
+            missing[key] = text
+
+    computed: Dict[bytes, np.ndarray] = {}
+    if missing:
+        vectors = np.asarray(compute(list(missing.values())), dtype=np.float32)
+        if len(vectors) != len(missing):
+            return compute(texts)  # embedder failed; don't cache a partial result
+        computed = dict(zip(missing, vectors))
+        cache.put_many(list(computed), vectors)
+
+    metrics = get_metrics_collector()
+    labels = {"model": model_name}
+    hits = len(texts) - sum(1 for v in cached if v is None)
+    metrics.increment("embedding_cache.hits", hits, labels=labels)
+    metrics.increment("embedding_cache.misses", len(texts) - hits, labels=labels)
+    metrics.record("embedding_cache.hit_ratio", hits / len(texts), labels=labels)
+
+    return [
+        (vector if vector is not None else computed[key]).tolist()
+        for key, vector in zip(keys, cached)
+    ]
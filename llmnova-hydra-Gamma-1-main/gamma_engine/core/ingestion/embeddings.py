@@ -1,14 +1,61 @@
 
+import math
+import os
+import re
+import zlib
 from abc import ABC, abstractmethod
 from typing import List, Optional
 
+from .embedding_cache import EmbeddingCache, cached_embed
+
 class EmbeddingService(ABC):
     @abstractmethod
     def embed_text(self, texts: List[str]) -> List[List[float]]:
         pass
 
+class HashingEmbeddings(EmbeddingService):
+    """
+    Dependency-free embeddings via signed feature hashing of word unigrams and bigrams.
+    Captures lexical overlap only, but needs no model and costs microseconds per text.
+    """
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed_text(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        words = re.findall(r"\w+", (text or "").lower())
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
 class SentenceTransformerEmbeddings(EmbeddingService):
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    """
+    Local sentence-transformers model.
+
+    ``batch_size`` is the encode batch size. With ``processes`` > 1 (or -1
+    for one per CPU), inputs of at least ``min_pool_texts`` texts are encoded
+    by a multi-process pool, which is started on first use and stopped by
+    :meth:`close`.
+    """
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 64,
+        processes: int = 0,
+        min_pool_texts: int = 256
+    ):
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        self.processes = (os.cpu_count() or 1) if processes < 0 else processes
+        self.min_pool_texts = min_pool_texts
+        self._pool = None
         try:
             from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer(model_name)
@@ -18,11 +65,24 @@ class SentenceTransformerEmbeddings(EmbeddingService):
 
     def embed_text(self, texts: List[str]) -> List[List[float]]:
         if self.model:
-            return self.model.encode(texts).tolist()
+            return cached_embed(self.cache, self.model_name, texts, self._encode)
         return []
 
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        if self.processes > 1 and len(texts) >= self.min_pool_texts:
+            if self._pool is None:
+                self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.processes)
+            return self.model.encode_multi_process(texts, self._pool, batch_size=self.batch_size).tolist()
+        return self.model.encode(texts, batch_size=self.batch_size).tolist()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
 class OpenAIEmbeddings(EmbeddingService):
-    def __init__(self, model: str = "text-embedding-ada-002", api_key: str = None):
+    def __init__(self, model: str = "text-embedding-ada-002", api_key: str = None, cache: Optional[EmbeddingCache] = None):
+        self.cache = cache
         try:
             import openai
             self.client = openai.OpenAI(api_key=api_key)
@@ -33,6 +93,17 @@ class OpenAIEmbeddings(EmbeddingService):
 
     def embed_text(self, texts: List[str]) -> List[List[float]]:
         if self.client:
-            response = self.client.embeddings.create(input=texts, model=self.model)
-            return [d.embedding for d in response.data]
+            return cached_embed(self.cache, self.model, texts, self._create)
         return []
+
+    def _create(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(input=texts, model=self.model)
+        return [d.embedding for d in response.data]
+
+class ChromaEmbeddingFunction:
+    """Adapts an EmbeddingService (and its cache) to Chroma's embedding function protocol."""
+    def __init__(self, embedder: EmbeddingService):
+        self.embedder = embedder
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self.embedder.embed_text(list(input))
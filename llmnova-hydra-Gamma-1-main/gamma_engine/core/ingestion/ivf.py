@@ -0,0 +1,144 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbour index, in plain NumPy.
+
+Vectors are partitioned by their nearest of ``nlist`` centroids (spherical
+k-means on a sample). A query scores the centroids, then only the rows of
+the ``nprobe`` best lists, so search cost drops from N to about
+N * nprobe / nlist row scores. ``nprobe`` trades recall for latency:
+``nprobe == nlist`` is exact search.
+
+The centroids are one ``.npy`` file; each segment's lists are two flat
+arrays (list offsets and row order), all memory-mapped on load.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Rows assigned per block, bounding temporary memory
+_ASSIGN_BLOCK = 65536
+
+Lists = Tuple[np.ndarray, np.ndarray]  # offsets (nlist + 1), rows ordered by list
+
+
+def default_nlist(rows: int) -> int:
+    """About 4 * sqrt(N) lists, the usual IVF sizing."""
+    return int(np.clip(4 * np.sqrt(rows), 16, 65536))
+
+
+class IVFIndex:
+    """
+    Args:
+        path: ``.npy`` file of the centroids (loaded memory-mapped if present).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.centroids: Optional[np.ndarray] = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else self.centroids.shape[0]
+
+    def train(self, sample: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+        """Spherical k-means over unit-length ``sample`` rows. Returns the centroids; :meth:`save` installs them."""
+        return kmeans(sample, nlist, iterations=iterations, seed=seed, spherical=True)
+
+    def save(self, centroids: np.ndarray) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp.npy"
+        np.save(temp_path, np.asarray(centroids, dtype=np.float32))
+        os.replace(temp_path, self.path)
+        self.centroids = np.load(self.path, mmap_mode="r")
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest list of each row."""
+        return nearest(vectors, np.asarray(self.centroids))
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """The ``nprobe`` lists closest to a unit-length query."""
+        scores = np.asarray(self.centroids) @ query
+        if nprobe >= len(scores):
+            return np.arange(len(scores))
+        return np.argpartition(-scores, nprobe - 1)[:nprobe]
+
+    def build_lists(self, vectors: np.ndarray) -> Lists:
+        assign = self.assign(vectors)
+        order = np.argsort(assign, kind="stable").astype(np.uint32)
+        offsets = np.zeros(self.nlist + 1, dtype=np.uint64)
+        np.cumsum(np.bincount(assign, minlength=self.nlist), out=offsets[1:])
+        return offsets, order
+
+
+def kmeans(sample: np.ndarray, k: int, iterations: int = 10, seed: int = 0, spherical: bool = False) -> np.ndarray:
+    """
+    Lloyd's k-means; ``spherical`` keeps centroids unit length (cosine
+    assignment). Empty clusters are re-seeded with random points.
+    """
+    sample = np.asarray(sample, dtype=np.float32)
+    k = min(k, len(sample))
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = nearest(sample, centroids, spherical)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        nonempty = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+        if spherical:
+            sums[~nonempty] = sample[rng.choice(len(sample), int((~nonempty).sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+        else:
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+            centroids[~nonempty] = sample[rng.choice(len(sample), int((~nonempty).sum()))]
+    return centroids.astype(np.float32)
+
+
+def nearest(vectors: np.ndarray, centroids: np.ndarray, spherical: bool = True) -> np.ndarray:
+    """Index of the nearest centroid of each row (max inner product, or min L2 distance)."""
+    # argmin |x - c|^2 == argmax x.c - |c|^2 / 2
+    bias = 0.0 if spherical else -0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK):
+        block = np.asarray(vectors[start:start + _ASSIGN_BLOCK], dtype=np.float32)
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T + bias, axis=1)
+    return assign
+
+
+def write_lists(prefix: str, lists: Lists) -> None:
+    """Write a segment's lists; the order file is renamed into place last and marks them complete."""
+    offsets, order = lists
+    for suffix, array in ((".ivf-offsets", offsets.astype(np.uint64)), (".ivf-order", order.astype(np.uint32))):
+        with open(f"{prefix}{suffix}.tmp", "wb") as f:
+            f.write(array.tobytes())
+        os.replace(f"{prefix}{suffix}.tmp", f"{prefix}{suffix}")
+
+
+def load_lists(prefix: str, rows: int, nlist: int) -> Optional[Lists]:
+    """A segment's lists, or None if missing or built for a different index."""
+    if nlist == 0 or not os.path.exists(f"{prefix}.ivf-order"):
+        return None
+    offsets = np.memmap(f"{prefix}.ivf-offsets", dtype=np.uint64, mode="r")
+    order = np.memmap(f"{prefix}.ivf-order", dtype=np.uint32, mode="r")
+    if len(offsets) != nlist + 1 or len(order) != rows:
+        return None
+    return offsets, order
+
+
+def list_rows(lists: Lists, probes: np.ndarray) -> np.ndarray:
+    """Rows of the probed lists, in row order (sequential reads of the vector map)."""
+    offsets, order = lists
+    parts = [order[int(offsets[p]):int(offsets[p + 1])] for p in probes]
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(parts).astype(np.int64))
@@ -1,40 +1,69 @@
-
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import Iterator, List, Dict, Any, Optional
 import os
 
+# Text files are streamed in blocks of about this many characters
+TEXT_BLOCK_CHARS = 64 * 1024
+
+@dataclass
+class Block:
+    """A piece of a document as it is read: a PDF page, a paragraph, a run of text."""
+    text: str
+    page: Optional[int] = None
+
 class DocumentLoader(ABC):
     @abstractmethod
-    def load(self, file_path: str) -> str:
+    def iter_blocks(self, file_path: str) -> Iterator[Block]:
+        """Yield the document lazily, one page/block at a time."""
         pass
 
+    def load(self, file_path: str) -> str:
+        return "\n".join(block.text for block in self.iter_blocks(file_path))
+
 class TextLoader(DocumentLoader):
+    def iter_blocks(self, file_path: str) -> Iterator[Block]:
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            carry = ""
+            while True:
+                data = f.read(TEXT_BLOCK_CHARS)
+                if not data:
+                    break
+                data = carry + data
+                # Cut at the last whitespace so no word is split across blocks
+                cut = max(data.rfind(" "), data.rfind("\n"))
+                if cut <= 0:
+                    carry = data
+                    continue
+                carry = data[cut:]
+                yield Block(data[:cut])
+            if carry:
+                yield Block(carry)
+
     def load(self, file_path: str) -> str:
         with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
             return f.read()
 
 class PDFLoader(DocumentLoader):
-    def load(self, file_path: str) -> str:
+    def iter_blocks(self, file_path: str) -> Iterator[Block]:
         try:
             import pypdf
-            with open(file_path, "rb") as f:
-                reader = pypdf.PdfReader(f)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
         except ImportError:
-            return "Error: pypdf not installed."
+            raise ImportError("pypdf not installed.") from None
+        with open(file_path, "rb") as f:
+            reader = pypdf.PdfReader(f)
+            for number, page in enumerate(reader.pages, start=1):
+                yield Block(page.extract_text() or "", page=number)
 
 class DocxLoader(DocumentLoader):
-    def load(self, file_path: str) -> str:
+    def iter_blocks(self, file_path: str) -> Iterator[Block]:
         try:
             import docx
-            doc = docx.Document(file_path)
-            return "\n".join([para.text for para in doc.paragraphs])
         except ImportError:
-            return "Error: python-docx not installed."
-
+            raise ImportError("python-docx not installed.") from None
+        doc = docx.Document(file_path)
+        for para in doc.paragraphs:
+            yield Block(para.text)
 class LoaderFactory:
     @staticmethod
     def get_loader(file_path: str) -> DocumentLoader:
@@ -0,0 +1,195 @@
+"""
+Document manifest for incremental re-ingestion.
+
+The manifest lives next to the vector store (one JSON file per collection)
+and records, for every ingested document, the hash of the source file and
+the id, content hash and metadata of each of its chunks:
+
+    {"version": 1, "documents": {"report.pdf": {"file_hash": "...",
+        "chunks": [{"id": "report.pdf_<hash>", "hash": "<hash>", "metadata": {...}}]}}}
+
+Chunk ids are derived from the chunk's content hash, so an unchanged chunk
+keeps its id wherever it moves in the document. Re-ingesting a file then
+skips it entirely when its hash is unchanged, and otherwise embeds and
+upserts only new chunks, relabels moved ones and deletes the ones that
+disappeared.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ..metrics import get_metrics_collector
+from .embedding_cache import content_key
+from .processors import Chunk
+from .vector_store import VectorStore
+
+MANIFEST_VERSION = 1
+
+_READ_BLOCK = 1 << 20
+
+
+def file_fingerprint(path: str) -> str:
+    """BLAKE2b hash of a file's bytes, read in 1 MiB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ChunkRecord:
+    id: str
+    hash: str
+    metadata: Dict[str, Any]
+
+
+@dataclass
+class DocumentRecord:
+    file_hash: str
+    chunks: List[ChunkRecord] = field(default_factory=list)
+
+
+class DocumentManifest:
+    """File-backed map of document name -> :class:`DocumentRecord` (thread-safe)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._documents: Dict[str, DocumentRecord] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def for_store(cls, directory: str, collection_name: str) -> "DocumentManifest":
+        return cls(os.path.join(directory, f"{collection_name}.manifest.json"))
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version {data.get('version')} in {self.path}")
+        self._documents = {
+            name: DocumentRecord(doc["file_hash"], [ChunkRecord(**c) for c in doc["chunks"]])
+            for name, doc in data["documents"].items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._documents
+
+    def get(self, name: str) -> Optional[DocumentRecord]:
+        with self._lock:
+            return self._documents.get(name)
+
+    def set(self, name: str, record: DocumentRecord) -> None:
+        with self._lock:
+            self._documents[name] = record
+
+    def remove(self, name: str) -> Optional[DocumentRecord]:
+        with self._lock:
+            return self._documents.pop(name, None)
+
+    def save(self) -> None:
+        """Write the manifest atomically (temp file + rename)."""
+        with self._lock:
+            data = {
+                "version": MANIFEST_VERSION,
+                "documents": {name: asdict(record) for name, record in self._documents.items()}
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+
+    def drop(self) -> None:
+        """Forget every document and delete the manifest file."""
+        with self._lock:
+            self._documents = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class DocumentUpdate:
+    """
+    The chunks of one (re-)ingested document, diffed against its previous
+    manifest record as they stream in.
+
+    Call :meth:`add` for every chunk and upsert the records it returns; once
+    they are stored, :meth:`apply` deletes orphaned chunks, fixes metadata of
+    chunks that only moved and records the document in the manifest.
+    """
+
+    def __init__(self, display_name: str, file_hash: str, previous: Optional[DocumentRecord] = None):
+        self.display_name = display_name
+        self.file_hash = file_hash
+        self.previous = previous
+        self.chunks: List[ChunkRecord] = []
+        self.relabeled: List[ChunkRecord] = []
+        self._previous = {c.id: c for c in previous.chunks} if previous else {}
+        self._occurrences: Dict[str, int] = {}
+
+    @property
+    def reused(self) -> int:
+        return len(self.chunks) - self.changed
+
+    @property
+    def changed(self) -> int:
+        return sum(1 for c in self.chunks if c.id not in self._previous)
+
+    def add(self, chunk: Chunk) -> Optional[ChunkRecord]:
+        """Record ``chunk``; returns its record if it has to be embedded and upserted."""
+        digest = content_key(chunk.text).hex()
+        # Repeated content within one document gets distinct ids
+        seen = self._occurrences.get(digest, 0)
+        self._occurrences[digest] = seen + 1
+        chunk_id = f"{self.display_name}_{digest}" + (f"_{seen}" if seen else "")
+
+        record = ChunkRecord(chunk_id, digest, chunk.metadata(self.display_name))
+        self.chunks.append(record)
+        old = self._previous.get(chunk_id)
+        if old is None:
+            return record
+        if old.metadata != record.metadata:
+            self.relabeled.append(record)
+        return None
+
+    def orphans(self, vector_store: VectorStore) -> List[str]:
+        """Ids stored for this document that are no longer part of it."""
+        current = {c.id for c in self.chunks}
+        if self.previous is None:
+            # First manifest entry: sweep chunks written under the old "<name>_<i>" id scheme
+            legacy = re.compile(rf"{re.escape(self.display_name)}_\d+")
+            stored = [id_ for id_ in vector_store.find_ids({"source": self.display_name}) if legacy.fullmatch(id_)]
+        else:
+            stored = list(self._previous)
+        return sorted(set(stored) - current)
+
+    def apply(self, vector_store: VectorStore, manifest: DocumentManifest, save: bool = True) -> None:
+        orphans = self.orphans(vector_store)
+        if orphans:
+            vector_store.delete(orphans)
+        if self.relabeled:
+            vector_store.update_metadatas(
+                ids=[c.id for c in self.relabeled],
+                metadatas=[c.metadata for c in self.relabeled]
+            )
+        manifest.set(self.display_name, DocumentRecord(self.file_hash, self.chunks))
+        if save:
+            manifest.save()
+
+        metrics = get_metrics_collector()
+        metrics.increment("ingestion.manifest.chunks_upserted", self.changed)
+        metrics.increment("ingestion.manifest.chunks_reused", self.reused)
+        metrics.increment("ingestion.manifest.chunks_deleted", len(orphans))
@@ -0,0 +1,660 @@
+"""
+Dependency-light vector store on memory-mapped NumPy segments.
+
+A store is a directory of immutable segments, each written by one
+write call:
+
+    store.json               {"dim", "dtype", "next_segment", "segments": [...]}
+    seg-<n>.vectors          unit-length float16/float32 rows
+    seg-<n>.records          JSON text + metadata of each row, concatenated
+    seg-<n>.offsets          uint64 byte offsets into .records (rows + 1)
+    seg-<n>.ids.json         ids of the rows, in row order
+    tombstones.bin           uint32 (segment, row) pairs of dead rows
+
+Opening a store only reads ``store.json`` and the tombstones and maps the
+vector files, so it takes milliseconds regardless of size. Upserts append a
+segment and tombstone the rows they replace; deletes only add tombstones.
+When there are more than ``max_segments`` segments, a background thread
+merges the smallest ones, dropping dead rows. Search is a blocked
+matrix-vector product per segment with ``argpartition`` top-k.
+
+With ``index="ivf"``, an inverted-file index (see :mod:`.ivf`) is trained in
+the background once the store holds ``index_train_size`` rows; from then on
+every segment is written with its inverted lists (``seg-<n>.ivf-*``) and
+queries score only the ``nprobe`` closest lists. Until then, and for any
+segment without lists, search stays exact.
+
+With ``quantization="int8"`` or ``"pq"`` (see :mod:`.quantization`), a
+quantizer is trained the same way and each segment also gets compact codes
+(``seg-<n>.codes``). Search then scans the codes, keeps the best
+``k * rerank_factor`` candidates and re-ranks them with the full-precision
+vectors, which are only paged in for those rows.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bm25 import BM25Index
+from .ivf import IVFIndex, Lists, default_nlist, list_rows, load_lists, write_lists
+from .quantization import QUANTIZATIONS, load_quantizer, make_quantizer, save_quantizer
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block, bounding temporary memory during search
+_SEARCH_BLOCK = 65536
+
+
+class _Segment:
+    """One immutable, memory-mapped segment."""
+
+    def __init__(self, directory: str, number: int, dim: int, dtype: np.dtype, nlist: int = 0, quantizer=None):
+        self.number = number
+        self.prefix = os.path.join(directory, f"seg-{number:06d}")
+        self.paths = [
+            f"{self.prefix}.vectors", f"{self.prefix}.records", f"{self.prefix}.offsets", f"{self.prefix}.ids.json",
+            f"{self.prefix}.ivf-offsets", f"{self.prefix}.ivf-order", f"{self.prefix}.codes"
+        ]
+        self.offsets = np.memmap(self.paths[2], dtype=np.uint64, mode="r")
+        self.rows = len(self.offsets) - 1
+        self.vectors = np.memmap(self.paths[0], dtype=dtype, mode="r", shape=(self.rows, dim))
+        self.records = np.memmap(self.paths[1], dtype=np.uint8, mode="r")
+        # IVF lists, when the store has a trained index
+        self.lists: Optional[Lists] = load_lists(self.prefix, self.rows, nlist)
+        # Quantized codes, when the store has a trained quantizer
+        self.codes: Optional[np.ndarray] = self.load_codes(quantizer)
+        self._ids: Optional[List[str]] = None
+
+    def load_codes(self, quantizer) -> Optional[np.ndarray]:
+        path = self.paths[6]
+        if quantizer is None or not os.path.exists(path):
+            return None
+        if os.path.getsize(path) != self.rows * quantizer.code_size * quantizer.code_dtype.itemsize:
+            return None  # written for a different quantizer
+        return np.memmap(path, dtype=quantizer.code_dtype, mode="r", shape=(self.rows, quantizer.code_size))
+
+    def write_codes(self, codes: np.ndarray, quantizer) -> None:
+        with open(f"{self.paths[6]}.tmp", "wb") as f:
+            f.write(np.ascontiguousarray(codes).tobytes())
+        os.replace(f"{self.paths[6]}.tmp", self.paths[6])
+        self.codes = self.load_codes(quantizer)
+
+    @classmethod
+    def write(
+        cls,
+        directory: str,
+        number: int,
+        vectors: np.ndarray,
+        ids: Sequence[str],
+        records: Sequence[bytes],
+        dtype: np.dtype,
+        lists: Optional[Lists] = None,
+        quantizer=None
+    ) -> "_Segment":
+        prefix = os.path.join(directory, f"seg-{number:06d}")
+        with open(f"{prefix}.vectors", "wb") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=dtype).tobytes())
+        with open(f"{prefix}.records", "wb") as f:
+            f.write(b"".join(records))
+        offsets = np.zeros(len(records) + 1, dtype=np.uint64)
+        np.cumsum([len(r) for r in records], out=offsets[1:])
+        with open(f"{prefix}.offsets", "wb") as f:
+            f.write(offsets.tobytes())
+        with open(f"{prefix}.ids.json", "w", encoding="utf-8") as f:
+            json.dump(list(ids), f)
+        if lists is not None:
+            write_lists(prefix, lists)
+        if quantizer is not None:
+            with open(f"{prefix}.codes", "wb") as f:
+                f.write(np.ascontiguousarray(quantizer.encode(vectors)).tobytes())
+        return cls(directory, number, vectors.shape[1], dtype, nlist=len(lists[0]) - 1 if lists is not None else 0, quantizer=quantizer)
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            with open(self.paths[3], "r", encoding="utf-8") as f:
+                self._ids = json.load(f)
+        return self._ids
+
+    def raw_record(self, row: int) -> bytes:
+        return bytes(self.records[int(self.offsets[row]):int(self.offsets[row + 1])])
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return json.loads(self.raw_record(row))
+
+    def remove_files(self) -> None:
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _encode_record(text: str, metadata: Optional[Dict[str, Any]]) -> bytes:
+    return json.dumps({"text": text, "metadata": metadata or {}}, ensure_ascii=False).encode("utf-8")
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Args:
+        path: Store directory (created on first write).
+        embedding_function: Called with a list of texts when no precomputed
+            embeddings are given, and for queries.
+        dtype: "float16" or "float32" storage of the (unit-length) vectors.
+        max_segments: Segment count above which a background merge starts.
+        keyword_index: Kept in step with every write and delete, for hybrid retrieval.
+        index: "flat" (exact search) or "ivf" (approximate, see module docstring).
+        nprobe: IVF lists scored per query (more = higher recall, slower).
+        nlist: IVF list count (0 = about 4 * sqrt(rows) at training time).
+        index_train_size: Rows needed before the IVF index and the quantizer are trained.
+        quantization: "none", "int8" or "pq" codes for search (see module docstring).
+        pq_subspaces: PQ bytes per vector (0 = dim / 8, rounded to a divisor of dim).
+        rerank_factor: With quantization, candidates re-ranked at full precision per result.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        embedding_function: Callable[[List[str]], List[List[float]]],
+        dtype: str = "float16",
+        max_segments: int = 8,
+        keyword_index: Optional[BM25Index] = None,
+        index: str = "flat",
+        nprobe: int = 16,
+        nlist: int = 0,
+        index_train_size: int = 50000,
+        quantization: str = "none",
+        pq_subspaces: int = 0,
+        rerank_factor: int = 4
+    ):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported vector dtype '{dtype}'")
+        if index not in ("flat", "ivf"):
+            raise ValueError(f"Unsupported vector index '{index}'")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unsupported quantization '{quantization}'")
+        self.path = path
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self.max_segments = max_segments
+        self.keyword_index = keyword_index
+        self.nprobe = nprobe
+        self.nlist = nlist
+        self.index_train_size = index_train_size
+        self.ivf = IVFIndex(os.path.join(path, "ivf-centroids.npy")) if index == "ivf" else None
+        self.quantization = quantization
+        self.pq_subspaces = pq_subspaces
+        self.rerank_factor = rerank_factor
+        self._quantizer_path = os.path.join(path, f"quantizer-{quantization}.npy")
+        self.quantizer = load_quantizer(self._quantizer_path, quantization) if quantization != "none" else None
+        self.dim: Optional[int] = None
+        self._next_segment = 1
+        self._segments: Dict[int, _Segment] = {}
+        # Per-segment alive masks; replaced (never mutated) so searches can use a snapshot
+        self._alive: Dict[int, np.ndarray] = {}
+        self._locations: Optional[Dict[str, Tuple[int, int]]] = None  # id -> (segment, row), built lazily
+        self._lock = threading.RLock()
+        self._merge_lock = threading.Lock()
+        self._maintenance_thread: Optional[threading.Thread] = None
+        self._meta_path = os.path.join(path, "store.json")
+        self._tombstones_path = os.path.join(path, "tombstones.bin")
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Loading and persistence
+    # ------------------------------------------------------------------
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.dtype = np.dtype(meta["dtype"])
+        self._next_segment = meta["next_segment"]
+        for number in meta["segments"]:
+            segment = _Segment(self.path, number, self.dim, self.dtype, nlist=self.ivf.nlist if self.ivf else 0, quantizer=self.quantizer)
+            self._segments[number] = segment
+            self._alive[number] = np.ones(segment.rows, dtype=bool)
+        if os.path.exists(self._tombstones_path):
+            pairs = np.fromfile(self._tombstones_path, dtype=np.uint32).reshape(-1, 2)
+            for number in np.unique(pairs[:, 0]):
+                if int(number) in self._alive:
+                    self._alive[int(number)][pairs[pairs[:, 0] == number, 1]] = False
+            if not np.isin(pairs[:, 0], list(self._alive)).all():
+                # Left by a merge that did not commit; its segment number will be reused
+                self._rewrite_tombstones()
+
+    def _save_meta(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = f"{self._meta_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "next_segment": self._next_segment,
+                "segments": sorted(self._segments)
+            }, f)
+        os.replace(temp_path, self._meta_path)
+
+    def _kill(self, locations: Sequence[Tuple[int, int]]) -> None:
+        """Tombstone rows (caller holds the lock)."""
+        if not locations:
+            return
+        by_segment: Dict[int, List[int]] = {}
+        for number, row in locations:
+            by_segment.setdefault(number, []).append(row)
+        for number, rows in by_segment.items():
+            alive = self._alive[number].copy()
+            alive[rows] = False
+            self._alive[number] = alive
+        with open(self._tombstones_path, "ab") as f:
+            f.write(np.asarray(locations, dtype=np.uint32).tobytes())
+
+    def _index(self) -> Dict[str, Tuple[int, int]]:
+        """id -> live (segment, row). A crash can leave an id live twice; the newest row wins."""
+        if self._locations is None:
+            locations: Dict[str, Tuple[int, int]] = {}
+            stale = []
+            for number in sorted(self._segments):
+                alive = self._alive[number]
+                for row, id_ in enumerate(self._segments[number].ids):
+                    if alive[row]:
+                        if id_ in locations:
+                            stale.append(locations[id_])
+                        locations[id_] = (number, row)
+            self._kill(stale)
+            self._locations = locations
+        return self._locations
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def _normalize(self, vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        array = np.asarray(vectors, dtype=np.float32)
+        if array.ndim != 2:
+            raise ValueError("Embeddings must be a 2-D array of vectors")
+        norms = np.linalg.norm(array, axis=1, keepdims=True)
+        return array / np.where(norms == 0, 1, norms)
+
+    def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
+        self.upsert_texts(texts, metadatas=metadatas, ids=ids)
+
+    def upsert_texts(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None, embeddings: List[List[float]] = None):
+        if not texts:
+            return
+        if ids is None:
+            raise ValueError("NumpyVectorStore requires ids")
+        if embeddings is None or len(embeddings) == 0:
+            embeddings = self.embedding_function(list(texts))
+        vectors = self._normalize(embeddings)
+        metadatas = metadatas or [{} for _ in texts]
+        # Last occurrence wins for ids repeated within one call
+        latest = {id_: i for i, id_ in enumerate(ids)}
+        keep = sorted(latest.values())
+        self._append(
+            vectors[keep],
+            [ids[i] for i in keep],
+            [_encode_record(texts[i], metadatas[i]) for i in keep]
+        )
+        if self.keyword_index is not None:
+            self.keyword_index.upsert(ids, texts)
+
+    def _append(self, vectors: np.ndarray, ids: List[str], records: List[bytes]) -> None:
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match store dimension {self.dim}")
+            os.makedirs(self.path, exist_ok=True)
+            index = self._index()
+            replaced = [index[id_] for id_ in ids if id_ in index]
+
+            number = self._next_segment
+            lists = self.ivf.build_lists(vectors) if self.ivf is not None and self.ivf.trained else None
+            segment = _Segment.write(self.path, number, vectors, ids, records, self.dtype, lists, self.quantizer)
+            self._segments[number] = segment
+            self._alive[number] = np.ones(segment.rows, dtype=bool)
+            self._next_segment += 1
+            self._save_meta()  # the segment is live from here on
+            self._kill(replaced)
+            for row, id_ in enumerate(ids):
+                index[id_] = (number, row)
+        self._maybe_maintain()
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            index = self._index()
+            self._kill([index.pop(id_) for id_ in ids if id_ in index])
+        if self.keyword_index is not None:
+            self.keyword_index.delete(ids)
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        # Segments are immutable: rewrite the rows (same vectors) into a new segment
+        with self._lock:
+            index = self._index()
+            found = [(id_, meta) for id_, meta in zip(ids, metadatas) if id_ in index]
+            if not found:
+                return
+            vectors = []
+            records = []
+            for id_, meta in found:
+                number, row = index[id_]
+                segment = self._segments[number]
+                vectors.append(np.asarray(segment.vectors[row], dtype=np.float32))
+                records.append(_encode_record(segment.record(row)["text"], meta))
+            self._append(np.stack(vectors), [id_ for id_, _ in found], records)
+
+    # ------------------------------------------------------------------
+    # Merging and index training
+    # ------------------------------------------------------------------
+    def _needs_index(self) -> bool:
+        return self.ivf is not None and not self.ivf.trained and self.count() >= self.index_train_size
+
+    def _needs_quantizer(self) -> bool:
+        return self.quantization != "none" and self.quantizer is None and self.count() >= self.index_train_size
+
+    def _maybe_maintain(self) -> None:
+        with self._lock:
+            if len(self._segments) <= self.max_segments and not self._needs_index() and not self._needs_quantizer():
+                return
+            if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+                return
+            self._maintenance_thread = threading.Thread(target=self._maintain, name="numpy-store-maintenance", daemon=True)
+            self._maintenance_thread.start()
+
+    def _maintain(self) -> None:
+        try:
+            with self._merge_lock:
+                if self._needs_index():
+                    self._train_index(self.nlist)
+                if self._needs_quantizer():
+                    self._train_quantizer()
+                if len(self._segments) > self.max_segments:
+                    self._merge(all_segments=False)
+        except Exception as e:
+            logger.error(f"Background maintenance failed for {self.path}: {e}")
+
+    def train_index(self, nlist: Optional[int] = None) -> None:
+        """(Re)train the IVF index on the current rows and rebuild every segment's lists."""
+        if self.ivf is None:
+            raise ValueError("Store was opened with index='flat'")
+        with self._merge_lock:
+            self._train_index(self.nlist if nlist is None else nlist)
+
+    def _sample(self, size: int) -> Tuple[Optional[np.ndarray], int]:
+        """About ``size`` live vectors drawn uniformly across segments, and the live row count."""
+        with self._lock:
+            segments = [(s, self._alive[s.number]) for s in self._segments.values()]
+        live = [(s, np.flatnonzero(alive)) for s, alive in segments]
+        total = sum(len(rows) for _, rows in live)
+        if total == 0:
+            return None, 0
+        rng = np.random.default_rng(0)
+        share = min(1.0, size / total)
+        sample = np.concatenate([
+            np.asarray(s.vectors[np.sort(rng.choice(rows, max(1, int(len(rows) * share)), replace=False))], dtype=np.float32)
+            for s, rows in live if len(rows)
+        ])
+        return sample, total
+
+    def _train_index(self, nlist: int) -> None:
+        with self._lock:
+            total = self.count()
+        if total == 0:
+            return
+        nlist = nlist or default_nlist(total)
+        # 64 training points per list is plenty for k-means on unit vectors
+        sample, total = self._sample(64 * nlist)
+        centroids = self.ivf.train(sample, nlist)
+        with self._lock:
+            # From here on, appends build their lists with the new centroids
+            self.ivf.save(centroids)
+            segments = list(self._segments.values())
+            for segment in segments:
+                segment.lists = None  # exact search until rebuilt below
+        for segment in segments:
+            lists = self.ivf.build_lists(segment.vectors)
+            write_lists(segment.prefix, lists)
+            segment.lists = load_lists(segment.prefix, segment.rows, self.ivf.nlist)
+        logger.info(f"Trained IVF index for {self.path}: {self.ivf.nlist} lists over {total} rows")
+
+    def train_quantizer(self) -> None:
+        """(Re)train the quantizer on the current rows and re-encode every segment."""
+        if self.quantization == "none":
+            raise ValueError("Store was opened with quantization='none'")
+        with self._merge_lock:
+            self._train_quantizer()
+
+    def _train_quantizer(self) -> None:
+        # 256 centroids per PQ subspace: ~100 points each
+        sample, total = self._sample(25600)
+        if sample is None:
+            return
+        quantizer = make_quantizer(self.quantization, sample.shape[1], self.pq_subspaces)
+        quantizer.train(sample)
+        with self._lock:
+            # From here on, appends write codes with the new quantizer
+            save_quantizer(self._quantizer_path, quantizer)
+            self.quantizer = quantizer
+            segments = list(self._segments.values())
+            for segment in segments:
+                segment.codes = None  # full-precision search until re-encoded below
+        for segment in segments:
+            segment.write_codes(quantizer.encode(segment.vectors), quantizer)
+        logger.info(f"Trained {self.quantization} quantizer for {self.path} over {total} rows")
+
+    def merge(self, all_segments: bool = False) -> None:
+        """
+        Merge the smallest segments (or all of them) into one, dropping dead
+        rows. Writes and searches continue meanwhile; rows deleted during the
+        merge are re-tombstoned in the merged segment.
+        """
+        with self._merge_lock:
+            self._merge(all_segments)
+
+    def _merge(self, all_segments: bool) -> None:
+        with self._lock:
+            self._index()  # resolves crash duplicates before rows change segments
+            by_size = sorted(self._segments.values(), key=lambda s: s.rows)
+            sources = by_size if all_segments else by_size[:len(by_size) - self.max_segments // 2 + 1]
+            if not sources or (len(sources) == 1 and self._alive[sources[0].number].all()):
+                return
+            alive_snapshot = {s.number: self._alive[s.number] for s in sources}
+            number = self._next_segment
+            self._next_segment += 1
+
+        # Copy live rows outside the lock
+        vectors, ids, records, moved = [], [], [], {}
+        for segment in sorted(sources, key=lambda s: s.number):
+            rows = np.flatnonzero(alive_snapshot[segment.number])
+            if len(rows):
+                vectors.append(np.asarray(segment.vectors[rows]))
+            for row in rows:
+                moved[(segment.number, int(row))] = len(ids)
+                ids.append(segment.ids[row])
+                records.append(segment.raw_record(row))
+        merged = None
+        if ids:
+            matrix = np.concatenate(vectors)
+            lists = self.ivf.build_lists(matrix) if self.ivf is not None and self.ivf.trained else None
+            merged = _Segment.write(self.path, number, matrix, ids, records, self.dtype, lists, self.quantizer)
+
+        with self._lock:
+            index = self._index()
+            for segment in sources:
+                del self._segments[segment.number]
+                del self._alive[segment.number]
+            dead = []
+            if merged is not None:
+                self._segments[number] = merged
+                self._alive[number] = np.ones(merged.rows, dtype=bool)
+                for (old_number, old_row), new_row in moved.items():
+                    id_ = ids[new_row]
+                    if index.get(id_) == (old_number, old_row):
+                        index[id_] = (number, new_row)
+                    else:
+                        dead.append((number, new_row))  # deleted or replaced during the merge
+            self._kill(dead)
+            self._save_meta()
+            self._rewrite_tombstones()
+        for segment in sources:
+            segment.remove_files()
+        logger.info(f"Merged {len(sources)} segments of {self.path} into {len(ids)} rows")
+
+    def _rewrite_tombstones(self) -> None:
+        pairs = [
+            (number, int(row))
+            for number, alive in self._alive.items()
+            for row in np.flatnonzero(~alive)
+        ]
+        temp_path = f"{self._tombstones_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(np.asarray(pairs, dtype=np.uint32).reshape(-1, 2).tobytes())
+        os.replace(temp_path, self._tombstones_path)
+
+    def drop(self) -> None:
+        """Delete every row and the store directory (the store stays usable, empty)."""
+        self.wait_for_maintenance()
+        with self._merge_lock, self._lock:
+            self._segments = {}
+            self._alive = {}
+            self._locations = None
+            self._next_segment = 1
+            self.dim = None
+            self.quantizer = None
+            if self.ivf is not None:
+                self.ivf.centroids = None
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def wait_for_maintenance(self, timeout: Optional[float] = None) -> None:
+        thread = self._maintenance_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def close(self) -> None:
+        self.wait_for_maintenance()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def count(self) -> int:
+        with self._lock:
+            return int(sum(alive.sum() for alive in self._alive.values()))
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    def similarity(self, distance: float) -> float:
+        return 1.0 - distance
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        nprobe: Optional[int] = None,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Top ``k`` by cosine similarity, in Chroma's query result layout
+        (distance = 1 - similarity). ``nprobe`` overrides the store's IVF
+        setting; a precomputed ``query_embedding`` skips embedding ``query``.
+        """
+        result = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        with self._lock:
+            segments = [(s, self._alive[s.number], s.lists, s.codes) for s in self._segments.values()]
+            ivf_lists = self.ivf.nlist if self.ivf is not None else 0
+            quantizer = self.quantizer
+        if not segments or k <= 0:
+            return result
+        q = self._normalize([query_embedding] if query_embedding is not None else self.embedding_function([query]))[0]
+        probes = self.ivf.probe(q, nprobe or self.nprobe) if ivf_lists else None
+        prepared = quantizer.prepare(q) if quantizer is not None else None
+        depth = k * max(1, self.rerank_factor)
+
+        scores, numbers, rows, approximate = [], [], [], []
+        for segment, alive, lists, codes in segments:
+            if probes is not None and lists is not None and len(lists[0]) == ivf_lists + 1:
+                candidates = list_rows(lists, probes)
+            else:
+                candidates = None  # exact: every row
+            quantized = codes is not None and prepared is not None
+            keep = depth if quantized else k
+            total = segment.rows if candidates is None else len(candidates)
+            for start in range(0, total, _SEARCH_BLOCK):
+                end = min(start + _SEARCH_BLOCK, total)
+                block_rows = np.arange(start, end) if candidates is None else candidates[start:end]
+                if quantized:
+                    block = quantizer.scores(codes[start:end] if candidates is None else codes[block_rows], prepared)
+                else:
+                    vectors = segment.vectors[start:end] if candidates is None else segment.vectors[block_rows]
+                    block = np.asarray(vectors, dtype=np.float32) @ q
+                block[~alive[block_rows]] = -np.inf
+                top = np.argpartition(-block, keep - 1)[:keep] if len(block) > keep else np.arange(len(block))
+                scores.append(block[top])
+                rows.append(block_rows[top])
+                numbers.append(np.full(len(top), segment.number))
+                approximate.append(np.full(len(top), quantized))
+        if not scores:
+            return result
+        scores = np.concatenate(scores)
+        rows = np.concatenate(rows)
+        numbers = np.concatenate(numbers)
+        approximate = np.concatenate(approximate)
+        by_number = {s[0].number: s[0] for s in segments}
+
+        if approximate.any():
+            # Re-rank the best approximate candidates with full-precision vectors
+            shortlist = np.argpartition(-scores, depth - 1)[:depth] if len(scores) > depth else np.arange(len(scores))
+            shortlist = shortlist[np.isfinite(scores[shortlist])]
+            for i in shortlist[approximate[shortlist]]:
+                scores[i] = np.asarray(by_number[int(numbers[i])].vectors[int(rows[i])], dtype=np.float32) @ q
+            scores, rows, numbers = scores[shortlist], rows[shortlist], numbers[shortlist]
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+
+        for i in top:
+            segment = by_number[int(numbers[i])]
+            record = segment.record(int(rows[i]))
+            result["ids"][0].append(segment.ids[int(rows[i])])
+            result["documents"][0].append(record["text"])
+            result["metadatas"][0].append(record["metadata"])
+            result["distances"][0].append(float(1.0 - scores[i]))
+        return result
+
+    def get_records(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            index = self._index()
+            found = {id_: (self._segments[index[id_][0]], index[id_][1]) for id_ in ids if id_ in index}
+        records = {}
+        for id_, (segment, row) in found.items():
+            record = segment.record(row)
+            records[id_] = (record["text"], record["metadata"])
+        return records
+
+    def find_ids(self, where: Dict[str, Any]) -> List[str]:
+        with self._lock:
+            locations = list(self._index().items())
+            segments = dict(self._segments)
+        matches = []
+        for id_, (number, row) in locations:
+            metadata = segments[number].record(row)["metadata"]
+            if all(metadata.get(key) == value for key, value in where.items()):
+                matches.append(id_)
+        return matches
+
+    def iter_records(self, batch_size: int = 1000) -> Iterator[Tuple[List[str], List[str]]]:
+        """All live ``(ids, texts)``, one page at a time."""
+        with self._lock:
+            locations = list(self._index().items())
+            segments = dict(self._segments)
+        for start in range(0, len(locations), batch_size):
+            page = locations[start:start + batch_size]
+            yield [id_ for id_, _ in page], [segments[n].record(r)["text"] for _, (n, r) in page]
@@ -1,6 +1,26 @@
 
 import re
-from typing import List
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from .loaders import Block
+
+_WORD = re.compile(r"\S+")
+
+@dataclass
+class Chunk:
+    text: str
+    index: int
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+
+    def metadata(self, source: str) -> dict:
+        """Vector store metadata for this chunk (page fields only when known)."""
+        meta = {"source": source, "chunk_index": self.index}
+        if self.page_start is not None:
+            meta["page_start"] = self.page_start
+            meta["page_end"] = self.page_end
+        return meta
 
 class TextProcessor:
     @staticmethod
@@ -10,20 +30,41 @@ class TextProcessor:
         return text
 
     @staticmethod
-    def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
-        # Simple overlap chunking
-        chunks = []
-        if not text:
-            return chunks
+    def iter_chunks(blocks: Iterable[Block], chunk_size: int = 500, overlap: int = 50) -> Iterator[Chunk]:
+        """
+        Overlapping word chunks over a stream of blocks. Only the current block
+        and one chunk's worth of words are held at a time; each chunk carries
+        the page range its words came from.
+        """
+        step = chunk_size - overlap
+        words: List[str] = []
+        pages: List[Optional[int]] = []
+        index = 0
 
-        cleaned = TextProcessor.clean_text(text)
-        words = cleaned.split()
+        def emit(count: int) -> Chunk:
+            nonlocal index
+            chunk = Chunk(" ".join(words[:count]), index, pages[0], pages[count - 1])
+            index += 1
+            del words[:step]
+            del pages[:step]
+            return chunk
 
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk_words = words[i:i + chunk_size]
-            chunks.append(" ".join(chunk_words))
+        for block in blocks:
+            for match in _WORD.finditer(block.text):
+                words.append(match.group())
+                pages.append(block.page)
+                if len(words) == chunk_size:
+                    yield emit(chunk_size)
+        # Trailing chunks start every ``step`` words, as in chunk_text
+        while words:
+            yield emit(len(words))
 
-        return chunks
+    @staticmethod
+    def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
+        # Simple overlap chunking
+        if not text:
+            return []
+        return [chunk.text for chunk in TextProcessor.iter_chunks([Block(text)], chunk_size, overlap)]
 
 class SemanticProcessor(TextProcessor):
     # Future enhancement: use spacy for sentence boundary detection
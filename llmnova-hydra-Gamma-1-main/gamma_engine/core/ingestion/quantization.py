@@ -0,0 +1,149 @@
+"""
+Vector quantizers for the NumPy vector store.
+
+Both quantizers compress unit-length vectors into short codes that search
+scans instead of the full-precision rows, and score them with asymmetric
+distance computation (ADC): the query stays in float32 and only stored
+vectors are approximated.
+
+* ``Int8Quantizer``: one signed byte per dimension with a per-dimension
+  scale (4x smaller than float32). Score = codes @ (query * scale).
+* ``ProductQuantizer``: the vector is split into ``m`` sub-vectors, each
+  replaced by the index of its nearest of 256 sub-centroids (one byte per
+  sub-vector; 384 float32 dims with m=48 is 32x smaller). Score = sum over
+  sub-vectors of a per-query lookup table of sub-centroid inner products.
+
+The store re-ranks the best approximate candidates with the full-precision
+vectors, so quantization mostly costs recall at the candidate stage.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+from .ivf import nearest, kmeans
+
+# Rows encoded per block, bounding temporary memory
+_ENCODE_BLOCK = 65536
+
+QUANTIZATIONS = ("none", "int8", "pq")
+
+
+class Int8Quantizer:
+    kind = "int8"
+    code_dtype = np.dtype(np.int8)
+
+    def __init__(self, scale: Optional[np.ndarray] = None):
+        self.scale = scale
+
+    @property
+    def code_size(self) -> int:
+        return len(self.scale)
+
+    def train(self, sample: np.ndarray) -> None:
+        # Per-dimension range from the 99.9th percentile, so rare outliers don't waste resolution
+        limit = np.percentile(np.abs(np.asarray(sample, dtype=np.float32)), 99.9, axis=0)
+        self.scale = (np.maximum(limit, 1e-6) / 127.0).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(vectors), len(self.scale)), dtype=np.int8)
+        for start in range(0, len(vectors), _ENCODE_BLOCK):
+            block = np.asarray(vectors[start:start + _ENCODE_BLOCK], dtype=np.float32)
+            codes[start:start + len(block)] = np.clip(np.rint(block / self.scale), -127, 127)
+        return codes
+
+    def prepare(self, query: np.ndarray) -> np.ndarray:
+        return (query * self.scale).astype(np.float32)
+
+    def scores(self, codes: np.ndarray, prepared: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.int8).astype(np.float32) @ prepared
+
+    def state(self) -> np.ndarray:
+        return self.scale
+
+    @classmethod
+    def from_state(cls, state: np.ndarray) -> "Int8Quantizer":
+        return cls(np.asarray(state, dtype=np.float32))
+
+
+class ProductQuantizer:
+    kind = "pq"
+    code_dtype = np.dtype(np.uint8)
+
+    def __init__(self, m: int, codebooks: Optional[np.ndarray] = None):
+        self.m = m
+        self.codebooks = codebooks  # (m, 256, dim // m)
+
+    @property
+    def code_size(self) -> int:
+        return self.m
+
+    def train(self, sample: np.ndarray, iterations: int = 10) -> None:
+        sample = np.asarray(sample, dtype=np.float32)
+        dim = sample.shape[1]
+        if dim % self.m:
+            raise ValueError(f"PQ subspaces ({self.m}) must divide the vector dimension ({dim})")
+        sub = dim // self.m
+        codebooks = np.zeros((self.m, 256, sub), dtype=np.float32)
+        for j in range(self.m):
+            centroids = kmeans(sample[:, j * sub:(j + 1) * sub], 256, iterations=iterations, seed=j)
+            codebooks[j, :len(centroids)] = centroids
+        self.codebooks = codebooks
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        sub = self.codebooks.shape[2]
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for start in range(0, len(vectors), _ENCODE_BLOCK):
+            block = np.asarray(vectors[start:start + _ENCODE_BLOCK], dtype=np.float32)
+            for j in range(self.m):
+                codes[start:start + len(block), j] = nearest(block[:, j * sub:(j + 1) * sub], self.codebooks[j], spherical=False)
+        return codes
+
+    def prepare(self, query: np.ndarray) -> np.ndarray:
+        """Lookup table (m, 256) of sub-query x sub-centroid inner products."""
+        sub = self.codebooks.shape[2]
+        return np.einsum("jkd,jd->jk", self.codebooks, query.reshape(self.m, sub)).astype(np.float32)
+
+    def scores(self, codes: np.ndarray, prepared: np.ndarray) -> np.ndarray:
+        codes = np.asarray(codes)
+        total = np.zeros(len(codes), dtype=np.float32)
+        for j in range(self.m):
+            total += prepared[j, codes[:, j]]
+        return total
+
+    def state(self) -> np.ndarray:
+        return self.codebooks
+
+    @classmethod
+    def from_state(cls, state: np.ndarray) -> "ProductQuantizer":
+        return cls(state.shape[0], np.asarray(state, dtype=np.float32))
+
+
+def default_subspaces(dim: int) -> int:
+    """Largest divisor of ``dim`` that is at most ``dim / 8`` (8-dim sub-vectors for 384 dims -> 48 bytes)."""
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def make_quantizer(kind: str, dim: int, subspaces: int = 0):
+    if kind == "int8":
+        return Int8Quantizer()
+    if kind == "pq":
+        return ProductQuantizer(subspaces or default_subspaces(dim))
+    raise ValueError(f"Unsupported quantization '{kind}'")
+
+
+def save_quantizer(path: str, quantizer) -> None:
+    temp_path = f"{path}.tmp.npy"
+    np.save(temp_path, quantizer.state())
+    os.replace(temp_path, path)
+
+
+def load_quantizer(path: str, kind: str):
+    if not os.path.exists(path):
+        return None
+    state = np.load(path)
+    return Int8Quantizer.from_state(state) if kind == "int8" else ProductQuantizer.from_state(state)
@@ -1,18 +1,59 @@
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from .bm25 import BM25Index
 
 class VectorStore(ABC):
     @abstractmethod
     def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
         pass
 
+    def upsert_texts(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None, embeddings: List[List[float]] = None):
+        """Insert or replace texts in one write; precomputed embeddings skip the store's embedder."""
+        self.add_texts(texts, metadatas=metadatas, ids=ids)
+
+    def delete(self, ids: List[str]):
+        raise NotImplementedError(f"{type(self).__name__} does not support deletes")
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """Replace the metadata of stored records without re-embedding them."""
+        raise NotImplementedError(f"{type(self).__name__} does not support metadata updates")
+
+    def drop(self):
+        """Delete the whole collection."""
+        raise NotImplementedError(f"{type(self).__name__} does not support dropping")
+
+    def close(self):
+        """Release the store's resources (background work, handles); the data stays."""
+        pass
+
+    def find_ids(self, where: Dict[str, Any]) -> List[str]:
+        """Ids of the records whose metadata matches ``where``."""
+        return []
+
+    def get_records(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Stored text and metadata of ``ids`` (missing ids are left out)."""
+        return {}
+
     @abstractmethod
-    def similarity_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    def similarity_search(self, query: str, k: int = 5, query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Top ``k`` for ``query``; a precomputed ``query_embedding`` skips embedding it."""
         pass
 
 class ChromaVectorStore(VectorStore):
-    def __init__(self, collection_name: str, embedding_function, persist_directory: str = "./chroma_db"):
+    def __init__(
+        self,
+        collection_name: str,
+        embedding_function,
+        persist_directory: str = "./chroma_db",
+        batch_size: int = 1000,
+        keyword_index: Optional[BM25Index] = None
+    ):
+        # Writes are split into batches of this many records (Chroma rejects oversized batches)
+        self.batch_size = batch_size
+        # Kept in step with every write and delete, for hybrid retrieval
+        self.keyword_index = keyword_index
         try:
             import chromadb
             self.client = chromadb.PersistentClient(path=persist_directory)
@@ -26,14 +67,87 @@ class ChromaVectorStore(VectorStore):
 
     def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
         if self.client:
-            self.collection.add(
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            for start in range(0, len(texts), self.batch_size):
+                end = start + self.batch_size
+                self.collection.add(
+                    documents=texts[start:end],
+                    metadatas=metadatas[start:end] if metadatas else None,
+                    ids=ids[start:end] if ids else None
+                )
+            if self.keyword_index is not None and ids:
+                self.keyword_index.upsert(ids, texts)
+
+    def upsert_texts(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None, embeddings: List[List[float]] = None):
+        if self.client:
+            for start in range(0, len(texts), self.batch_size):
+                end = start + self.batch_size
+                self.collection.upsert(
+                    documents=texts[start:end],
+                    metadatas=metadatas[start:end] if metadatas else None,
+                    ids=ids[start:end] if ids else None,
+                    embeddings=embeddings[start:end] if embeddings else None
+                )
+            if self.keyword_index is not None and ids:
+                self.keyword_index.upsert(ids, texts)
+
+    def delete(self, ids: List[str]):
+        if self.client:
+            for start in range(0, len(ids), self.batch_size):
+                self.collection.delete(ids=ids[start:start + self.batch_size])
+            if self.keyword_index is not None:
+                self.keyword_index.delete(ids)
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        if self.client:
+            for start in range(0, len(ids), self.batch_size):
+                end = start + self.batch_size
+                self.collection.update(ids=ids[start:end], metadatas=metadatas[start:end])
+
+    def drop(self):
+        if self.client:
+            self.client.delete_collection(name=self.collection.name)
+
+    def find_ids(self, where: Dict[str, Any]) -> List[str]:
+        if self.client:
+            return self.collection.get(where=where, include=[])["ids"]
+        return []
+
+    def get_records(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        if not self.client or not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            id_: (doc, meta or {})
+            for id_, doc, meta in zip(results["ids"], results["documents"], results["metadatas"])
+        }
+
+    def iter_records(self, batch_size: Optional[int] = None) -> Iterator[Tuple[List[str], List[str]]]:
+        """All stored ``(ids, texts)``, one page at a time."""
+        if not self.client:
+            return
+        batch_size = batch_size or self.batch_size
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                return
+            yield page["ids"], page["documents"]
+            offset += len(page["ids"])
+
+    def count(self) -> int:
+        return self.collection.count() if self.client else 0
+
+    def similarity(self, distance: float) -> float:
+        """Cosine similarity for a query distance, given the collection's space (embeddings are unit length)."""
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        if space == "l2":
+            return 1.0 - distance / 2.0  # squared L2 between unit vectors
+        return 1.0 - distance  # "cosine" and "ip" distances are 1 - similarity
 
-    def similarity_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    def similarity_search(self, query: str, k: int = 5, query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         if self.client:
+            if query_embedding is not None:
+                return self.collection.query(query_embeddings=[list(query_embedding)], n_results=k)
             results = self.collection.query(
                 query_texts=[query],
                 n_results=k
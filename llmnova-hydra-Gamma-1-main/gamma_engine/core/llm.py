@@ -1,15 +1,19 @@
-import hashlib
+import asyncio
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import anthropic
-from openai import OpenAI
-from openai.types.chat import ChatCompletionMessage
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
 
-from ..interfaces.llm_provider import LLMProviderInterface, Message
+from ..interfaces.llm_provider import LLMProviderInterface, Message, StreamEvent
+from .config import settings
+from .llm_cache import InMemoryLRUTier, LLMResponseCache, RedisTier
 from .redis_client import get_redis_client
+from .rate_limiter import estimate_tokens, get_governor
+from .request_coalescing import RedisFlightLock, SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,51 @@ class LLMProvider(LLMProviderInterface):
         if os.getenv("ANTHROPIC_API_KEY"):
             self.anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
+        # Async clients are created lazily on first use so that purely
+        # synchronous callers never open a second connection pool.
+        self._async_openai_client: Optional[AsyncOpenAI] = None
+        self._async_anthropic_client: Optional[anthropic.AsyncAnthropic] = None
+
+        self._redis_tier = RedisTier(get_redis_client, ttl_seconds=settings.llm_cache_ttl_seconds)
+        self.cache = LLMResponseCache([
+            InMemoryLRUTier(
+                max_entries=settings.llm_cache_max_entries,
+                max_bytes=settings.llm_cache_max_bytes,
+                ttl_seconds=settings.llm_cache_ttl_seconds
+            ),
+            self._redis_tier,
+        ])
+
+        # Per-(provider, model) rate limiter shared by every provider instance
+        self.governor = get_governor(
+            "anthropic" if model.startswith("claude-") else "openai",
+            model,
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+            max_concurrency=settings.llm_max_concurrency,
+            max_retries=settings.llm_max_retries
+        )
+
+        # Identical concurrent requests share a single upstream call
+        self.single_flight = SingleFlight()
+        self.flight_lock: Optional[RedisFlightLock] = None
+        if settings.llm_coalesce_across_workers:
+            self.flight_lock = RedisFlightLock(get_redis_client)
+
+    @property
+    def async_openai_client(self) -> AsyncOpenAI:
+        """Shared async OpenAI client (one HTTP connection pool per provider)."""
+        if self._async_openai_client is None:
+            self._async_openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._async_openai_client
+
+    @property
+    def async_anthropic_client(self) -> Optional[anthropic.AsyncAnthropic]:
+        """Shared async Anthropic client, or None when no API key is configured."""
+        if self._async_anthropic_client is None and os.getenv("ANTHROPIC_API_KEY"):
+            self._async_anthropic_client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        return self._async_anthropic_client
+
     def chat(
         self,
         history: List[Dict[str, Any]],
@@ -31,43 +80,141 @@ class LLMProvider(LLMProviderInterface):
         tool_choice: Optional[Any] = None,
         temperature: float = 0.0
     ) -> Message:
-        redis_client = get_redis_client()
-        if not redis_client:
-            # Proceed without cache if Redis is not available
-            if self.model.startswith("claude-"):
-                return self._chat_anthropic(history, tools, tool_choice, temperature)
-            else:
-                return self._chat_openai(history, tools, tool_choice, temperature)
-
-        # Create a stable cache key
-        cache_key_data = {
-            "model": self.model,
-            "history": history,
-            "tools": tools,
-            "tool_choice": tool_choice,
-            "temperature": temperature,
-        }
-        # Use json.dumps with sort_keys=True for a consistent hash
-        serialized_data = json.dumps(cache_key_data, sort_keys=True)
-        cache_key = f"llm_cache:{hashlib.sha256(serialized_data.encode('utf-8')).hexdigest()}"
+        cache_key = self._cache_key(history, tools, tool_choice, temperature)
 
         # Check for cached response
-        cached_response = redis_client.get(cache_key)
+        cached_response = self.cache.get(cache_key)
+        if cached_response:
+            logger.info(f"Returning cached LLM response for key: {cache_key}")
+            return cached_response
+
+        # If not cached, call the appropriate LLM (once for all identical in-flight requests);
+        # coalesced callers share one result, so each gets its own copy
+        return self.single_flight.do(
+            cache_key,
+            lambda: self._fetch(cache_key, history, tools, tool_choice, temperature)
+        ).model_copy(deep=True)
+
+    async def achat(
+        self,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]] = None,
+        tool_choice: Optional[Any] = None,
+        temperature: float = 0.0
+    ) -> Message:
+        """
+        Native async variant of :meth:`chat` built on the async SDK clients.
+        Cache and flight lock calls (which may hit Redis) run in worker threads.
+        """
+        cache_key = self._cache_key(history, tools, tool_choice, temperature)
+
+        cached_response = await asyncio.to_thread(self.cache.get, cache_key)
         if cached_response:
             logger.info(f"Returning cached LLM response for key: {cache_key}")
-            return Message.model_validate_json(cached_response)
+            return cached_response
+
+        response = await self.single_flight.ado(
+            cache_key,
+            lambda: self._afetch(cache_key, history, tools, tool_choice, temperature)
+        )
+        return response.model_copy(deep=True)
+
+    async def astream(
+        self,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]] = None,
+        tool_choice: Optional[Any] = None,
+        temperature: float = 0.0
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream text deltas and tool call fragments as the provider emits them."""
+        cache_key = self._cache_key(history, tools, tool_choice, temperature)
+        cached_message = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached_message:
+            logger.info(f"Returning cached LLM response for key: {cache_key}")
+            if cached_message.content:
+                yield StreamEvent(type="text", content=cached_message.content)
+            yield StreamEvent(type="message", message=cached_message)
+            return
 
-        # If not cached, call the appropriate LLM
         if self.model.startswith("claude-"):
-            response_message = self._chat_anthropic(history, tools, tool_choice, temperature)
+            events = self._astream_anthropic(history, tools, tool_choice, temperature)
         else:
-            response_message = self._chat_openai(history, tools, tool_choice, temperature)
+            events = self._astream_openai(history, tools, tool_choice, temperature)
+
+        async for event in events:
+            if event.type == "message":
+                await asyncio.to_thread(self.cache.set, cache_key, event.message)
+            yield event
+
+    def _fetch(
+        self,
+        cache_key: str,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]],
+        tool_choice: Optional[Any],
+        temperature: float
+    ) -> Message:
+        token = None
+        if self.flight_lock:
+            token = self.flight_lock.acquire(cache_key)
+            if token is None:
+                # Another worker is already fetching this exact request
+                shared = self.flight_lock.wait(cache_key, lambda: self._redis_tier.get(cache_key))
+                if shared is not None:
+                    self.cache.set(cache_key, shared)
+                    return shared
+
+        try:
+            if self.model.startswith("claude-"):
+                response_message = self._chat_anthropic(history, tools, tool_choice, temperature)
+            else:
+                response_message = self._chat_openai(history, tools, tool_choice, temperature)
+
+            # Cache the new response
+            self.cache.set(cache_key, response_message)
+            return response_message
+        finally:
+            if token and self.flight_lock:
+                self.flight_lock.release(cache_key, token)
+
+    async def _afetch(
+        self,
+        cache_key: str,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]],
+        tool_choice: Optional[Any],
+        temperature: float
+    ) -> Message:
+        token = None
+        if self.flight_lock:
+            token = await self.flight_lock.aacquire(cache_key)
+            if token is None:
+                shared = await self.flight_lock.await_result(cache_key, lambda: self._redis_tier.get(cache_key))
+                if shared is not None:
+                    await asyncio.to_thread(self.cache.set, cache_key, shared)
+                    return shared
+
+        try:
+            if self.model.startswith("claude-"):
+                response_message = await self._achat_anthropic(history, tools, tool_choice, temperature)
+            else:
+                response_message = await self._achat_openai(history, tools, tool_choice, temperature)
 
-        # Cache the new response
-        logger.info(f"Caching new LLM response for key: {cache_key}")
-        redis_client.set(cache_key, response_message.model_dump_json(), ex=3600) # 1 hour TTL
+            await asyncio.to_thread(self.cache.set, cache_key, response_message)
+            return response_message
+        finally:
+            if token and self.flight_lock:
+                await self.flight_lock.arelease(cache_key, token)
 
-        return response_message
+    def _cache_key(
+        self,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]],
+        tool_choice: Optional[Any],
+        temperature: float
+    ) -> str:
+        # Per-message digests are memoized, so only new messages get serialized
+        return self.cache.make_key(self.model, history, tools, tool_choice, temperature)
 
     def _chat_openai(
         self,
@@ -76,6 +223,99 @@ class LLMProvider(LLMProviderInterface):
         tool_choice: Optional[Any] = None,
         temperature: float = 0.0
     ) -> Message:
+        kwargs = self._openai_request(messages, tools, tool_choice, temperature)
+        try:
+            response = self.governor.call(
+                lambda: self.openai_client.chat.completions.create(**kwargs),
+                tokens=estimate_tokens(messages)
+            )
+            return self._parse_openai_response(response)
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API Error: {e}") from e
+
+    async def _achat_openai(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Any] = None,
+        temperature: float = 0.0
+    ) -> Message:
+        kwargs = self._openai_request(messages, tools, tool_choice, temperature)
+        try:
+            response = await self.governor.acall(
+                lambda: self.async_openai_client.chat.completions.create(**kwargs),
+                tokens=estimate_tokens(messages)
+            )
+            return self._parse_openai_response(response)
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API Error: {e}") from e
+
+    async def _astream_openai(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Any] = None,
+        temperature: float = 0.0
+    ) -> AsyncIterator[StreamEvent]:
+        kwargs = self._openai_request(messages, tools, tool_choice, temperature)
+        content_parts: List[str] = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        role = "assistant"
+
+        try:
+            async with self.governor.aslot(tokens=estimate_tokens(messages)):
+                stream = await self.async_openai_client.chat.completions.create(stream=True, **kwargs)
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if getattr(delta, "role", None):
+                        role = delta.role
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield StreamEvent(type="text", content=delta.content)
+
+                    for fragment in getattr(delta, "tool_calls", None) or []:
+                        call = tool_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+                        if fragment.id:
+                            call["id"] = fragment.id
+                        function = fragment.function
+                        if function and function.name:
+                            call["name"] += function.name
+                        arguments = function.arguments if function and function.arguments else ""
+                        call["arguments"] += arguments
+                        yield StreamEvent(
+                            type="tool_call",
+                            content=arguments,
+                            tool_call_index=fragment.index,
+                            tool_call_id=call["id"],
+                            tool_name=call["name"] or None
+                        )
+        except Exception as e:
+            self.governor.observe_error(e)
+            raise RuntimeError(f"OpenAI API Error: {e}") from e
+
+        assembled_calls = [
+            ChatCompletionMessageToolCall(
+                id=call["id"] or f"call_{index}",
+                type="function",
+                function={"name": call["name"], "arguments": call["arguments"]}
+            )
+            for index, call in sorted(tool_calls.items())
+        ]
+        yield StreamEvent(type="message", message=Message(
+            role=role,
+            content="".join(content_parts) or None,
+            tool_calls=assembled_calls or None
+        ))
+
+    def _openai_request(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: Optional[Any],
+        temperature: float
+    ) -> Dict[str, Any]:
         # Pre-process messages for image support
         formatted_messages = []
         for msg in messages:
@@ -115,28 +355,109 @@ class LLMProvider(LLMProviderInterface):
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = tool_choice if tool_choice else "auto"
+        return kwargs
+
+    @staticmethod
+    def _parse_openai_response(response: Any) -> Message:
+        msg = response.choices[0].message
+        return Message(
+            role=msg.role,
+            content=msg.content,
+            tool_calls=msg.tool_calls if hasattr(msg, 'tool_calls') else None
+        )
+
+    def _chat_anthropic(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Any] = None,
+        temperature: float = 0.0
+    ) -> Message:
+        if not self.anthropic_client:
+            raise ValueError("Anthropic API Key not found but Claude model requested.")
 
+        kwargs = self._anthropic_request(messages, tools, tool_choice, temperature)
         try:
-            response = self.openai_client.chat.completions.create(**kwargs)
-            msg = response.choices[0].message
-            return Message(
-                role=msg.role,
-                content=msg.content,
-                tool_calls=msg.tool_calls if hasattr(msg, 'tool_calls') else None
+            response = self.governor.call(
+                lambda: self.anthropic_client.messages.create(**kwargs),
+                tokens=estimate_tokens(messages)
             )
+            return self._parse_anthropic_response(response)
         except Exception as e:
-            raise RuntimeError(f"OpenAI API Error: {e}") from e
+            raise RuntimeError(f"Anthropic API Error: {e}") from e
 
-    def _chat_anthropic(
+    async def _achat_anthropic(
         self,
         messages: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
         tool_choice: Optional[Any] = None,
         temperature: float = 0.0
     ) -> Message:
-        if not self.anthropic_client:
+        client = self.async_anthropic_client
+        if not client:
             raise ValueError("Anthropic API Key not found but Claude model requested.")
 
+        kwargs = self._anthropic_request(messages, tools, tool_choice, temperature)
+        try:
+            response = await self.governor.acall(
+                lambda: client.messages.create(**kwargs),
+                tokens=estimate_tokens(messages)
+            )
+            return self._parse_anthropic_response(response)
+        except Exception as e:
+            raise RuntimeError(f"Anthropic API Error: {e}") from e
+
+    async def _astream_anthropic(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Any] = None,
+        temperature: float = 0.0
+    ) -> AsyncIterator[StreamEvent]:
+        client = self.async_anthropic_client
+        if not client:
+            raise ValueError("Anthropic API Key not found but Claude model requested.")
+
+        kwargs = self._anthropic_request(messages, tools, tool_choice, temperature)
+        # Maps Anthropic content block index -> (tool call index, id, name)
+        tool_blocks: Dict[int, Dict[str, Any]] = {}
+
+        try:
+            async with self.governor.aslot(tokens=estimate_tokens(messages)), \
+                    client.messages.stream(**kwargs) as stream:
+                async for event in stream:
+                    if event.type == "content_block_start" and event.content_block.type == "tool_use":
+                        tool_blocks[event.index] = {
+                            "index": len(tool_blocks),
+                            "id": event.content_block.id,
+                            "name": event.content_block.name
+                        }
+                    elif event.type == "content_block_delta":
+                        if event.delta.type == "text_delta":
+                            yield StreamEvent(type="text", content=event.delta.text)
+                        elif event.delta.type == "input_json_delta" and event.index in tool_blocks:
+                            block = tool_blocks[event.index]
+                            yield StreamEvent(
+                                type="tool_call",
+                                content=event.delta.partial_json,
+                                tool_call_index=block["index"],
+                                tool_call_id=block["id"],
+                                tool_name=block["name"]
+                            )
+                final_response = await stream.get_final_message()
+        except Exception as e:
+            self.governor.observe_error(e)
+            raise RuntimeError(f"Anthropic API Error: {e}") from e
+
+        yield StreamEvent(type="message", message=self._parse_anthropic_response(final_response))
+
+    def _anthropic_request(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: Optional[Any],
+        temperature: float
+    ) -> Dict[str, Any]:
         system_prompt = None
         filtered_messages = []
         for msg in messages:
@@ -187,34 +508,31 @@ class LLMProvider(LLMProviderInterface):
                  if tool_choice != "auto":
                      # For now, simplistic handling. Full support requires more complex mapping.
                      pass
+        return kwargs
+
+    @staticmethod
+    def _parse_anthropic_response(response: Any) -> Message:
+        content_text = ""
+        tool_calls = []
+
+        for block in response.content:
+            if block.type == "text":
+                content_text += block.text
+            elif block.type == "tool_use":
+                tool_calls.append({
+                    "id": block.id,
+                    "type": "function",
+                    "function": {
+                        "name": block.name,
+                        "arguments": json.dumps(block.input)
+                    }
+                })
 
-        try:
-            response = self.anthropic_client.messages.create(**kwargs)
-
-            content_text = ""
-            tool_calls = []
-
-            for block in response.content:
-                if block.type == "text":
-                    content_text += block.text
-                elif block.type == "tool_use":
-                    tool_calls.append({
-                        "id": block.id,
-                        "type": "function",
-                        "function": {
-                            "name": block.name,
-                            "arguments": json.dumps(block.input)
-                        }
-                    })
-
-            return Message(
-                role="assistant",
-                content=content_text,
-                tool_calls=tool_calls if tool_calls else None
-            )
-
-        except Exception as e:
-            raise RuntimeError(f"Anthropic API Error: {e}") from e
+        return Message(
+            role="assistant",
+            content=content_text,
+            tool_calls=tool_calls if tool_calls else None
+        )
 
     def critique(self, code: str, goal: str) -> str:
         """Uses a separate context to critique code before execution."""
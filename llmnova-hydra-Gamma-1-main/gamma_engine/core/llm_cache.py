@@ -0,0 +1,263 @@
+"""
+Two-tier response cache for LLM calls.
+
+This module provides the caching layer used by ``LLMProvider``:
+- InMemoryLRUTier: bounded, process-local LRU with size and TTL eviction
+- RedisTier: shared cache across workers via the configured Redis client
+- HistoryHasher: incremental cache-key hashing that memoizes per-message
+  digests, so a growing conversation is not re-serialized on every step
+- LLMResponseCache: read-through composition of tiers with metrics
+
+Hit, miss and lookup latency are exported through ``MetricsCollector``
+under the ``llm.cache.*`` names.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..interfaces.llm_provider import Message
+from .metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "llm_cache:"
+
+
+class CacheTier(ABC):
+    """A single storage tier of the LLM response cache."""
+
+    name: str = "tier"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Message]:
+        """Return the cached message for ``key`` or None."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, message: Message, serialized: str) -> None:
+        """Store ``message`` (and its JSON form) under ``key``."""
+        pass
+
+
+class InMemoryLRUTier(CacheTier):
+    """
+    Thread-safe in-process LRU tier.
+
+    Entries are evicted least-recently-used first once either ``max_entries``
+    or ``max_bytes`` (measured on the serialized JSON) is exceeded, and lazily
+    on read once older than ``ttl_seconds``.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Message, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Message]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            message, size, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+        # Hand out a copy so callers cannot mutate the cached response
+        return message.model_copy(deep=True)
+
+    def set(self, key: str, message: Message, serialized: str) -> None:
+        size = len(serialized)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (message.model_copy(deep=True), size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisTier(CacheTier):
+    """Shared tier backed by Redis; a no-op when Redis is unavailable."""
+
+    name = "redis"
+
+    def __init__(self, client_getter: Callable[[], Any], ttl_seconds: int = 3600):
+        self.client_getter = client_getter
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[Message]:
+        client = self.client_getter()
+        if not client:
+            return None
+        cached_response = client.get(key)
+        if cached_response:
+            return Message.model_validate_json(cached_response)
+        return None
+
+    def set(self, key: str, message: Message, serialized: str) -> None:
+        client = self.client_getter()
+        if client:
+            client.set(key, serialized, ex=self.ttl_seconds)
+
+
+class HistoryHasher:
+    """
+    Incremental hasher for LLM cache keys.
+
+    Each message is reduced to a 32-byte digest that is memoized by the
+    message's fields together with their types. Only str, int, bool and None
+    values are memoized, for which equal memo keys mean identical serialized
+    JSON. Python caches ``str`` hashes on the string object, so looking up a
+    previously seen message does not re-read or re-serialize its content;
+    only newly appended messages are encoded. The history key is then folded
+    from the per-message digests.
+    """
+
+    _MEMO_TYPES = (str, int, bool, type(None))
+
+    def __init__(self, max_memo_entries: int = 8192):
+        self.max_memo_entries = max_memo_entries
+        self._message_digests: "OrderedDict[Tuple[Any, ...], bytes]" = OrderedDict()
+        self._tools_digests: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(
+        self,
+        model: str,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]],
+        tool_choice: Optional[Any],
+        temperature: float
+    ) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps([model, tool_choice, temperature], sort_keys=True, default=str).encode("utf-8"))
+        digest.update(self._tools_digest(tools))
+        for message in history:
+            digest.update(self._message_digest(message))
+        return f"{CACHE_KEY_PREFIX}{digest.hexdigest()}"
+
+    def _message_digest(self, message: Dict[str, Any]) -> bytes:
+        if message.get("tool_calls"):
+            # Tool call payloads are small and may be unhashable objects; hash directly
+            return self._sha256_json(message)
+
+        if not all(type(v) in self._MEMO_TYPES for v in message.values()):
+            # e.g. multi-part list content; not memoizable
+            return self._sha256_json(message)
+        # Types are part of the key: True == 1 but they serialize differently
+        memo_key = tuple(sorted((k, type(v).__name__, v) for k, v in message.items()))
+
+        with self._lock:
+            cached = self._message_digests.get(memo_key)
+            if cached is not None:
+                self._message_digests.move_to_end(memo_key)
+                return cached
+
+        message_digest = self._sha256_json(message)
+        with self._lock:
+            self._message_digests[memo_key] = message_digest
+            if len(self._message_digests) > self.max_memo_entries:
+                self._message_digests.popitem(last=False)
+        return message_digest
+
+    def _tools_digest(self, tools: Optional[List[Any]]) -> bytes:
+        if not tools:
+            return b"\x00"
+        # Keyed by the serialized schemas, so only the SHA-256 pass is saved
+        serialized = json.dumps(tools, sort_keys=True, default=str)
+        with self._lock:
+            cached = self._tools_digests.get(serialized)
+            if cached is not None:
+                self._tools_digests.move_to_end(serialized)
+                return cached
+
+        tools_digest = hashlib.sha256(serialized.encode("utf-8")).digest()
+        with self._lock:
+            self._tools_digests[serialized] = tools_digest
+            if len(self._tools_digests) > 64:
+                self._tools_digests.popitem(last=False)
+        return tools_digest
+
+    @staticmethod
+    def _sha256_json(data: Any) -> bytes:
+        serialized = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).digest()
+
+
+class LLMResponseCache:
+    """
+    Read-through cache over an ordered list of tiers (fastest first).
+
+    A hit in a slower tier is promoted into all faster tiers. Tier errors
+    are logged and treated as misses so caching never fails an LLM call.
+
+    Example:
+        >>> cache = LLMResponseCache([InMemoryLRUTier(), RedisTier(get_redis_client)])
+        >>> key = cache.make_key("gpt-4o", history, tools, None, 0.0)
+        >>> cache.get(key) or cache.set(key, llm.chat(history))
+    """
+
+    def __init__(self, tiers: List[CacheTier], hasher: Optional[HistoryHasher] = None):
+        self.tiers = tiers
+        self.hasher = hasher or HistoryHasher()
+        self.metrics = get_metrics_collector()
+
+    def make_key(
+        self,
+        model: str,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]],
+        tool_choice: Optional[Any],
+        temperature: float
+    ) -> str:
+        return self.hasher.key(model, history, tools, tool_choice, temperature)
+
+    def get(self, key: str) -> Optional[Message]:
+        start = time.perf_counter()
+        try:
+            for index, tier in enumerate(self.tiers):
+                try:
+                    message = tier.get(key)
+                except Exception as e:
+                    logger.warning(f"LLM cache tier '{tier.name}' read failed: {e}")
+                    continue
+                if message is not None:
+                    self.metrics.increment("llm.cache.hits", labels={"tier": tier.name})
+                    if index:
+                        self._promote(self.tiers[:index], key, message)
+                    return message
+            self.metrics.increment("llm.cache.misses")
+            return None
+        finally:
+            self.metrics.record("llm.cache.lookup_ms", (time.perf_counter() - start) * 1000)
+
+    def set(self, key: str, message: Message) -> None:
+        self._promote(self.tiers, key, message)
+
+    def _promote(self, tiers: List[CacheTier], key: str, message: Message) -> None:
+        serialized = message.model_dump_json()
+        for tier in tiers:
+            try:
+                tier.set(key, message, serialized)
+            except Exception as e:
+                logger.warning(f"LLM cache tier '{tier.name}' write failed: {e}")
@@ -0,0 +1,442 @@
+"""
+Latency-aware routing across equivalent LLM backends.
+
+RoutedLLMProvider wraps an ordered list of models (OpenAI and/or Anthropic)
+behind the regular LLMProviderInterface:
+- Hedging: if the primary has not answered within a percentile of its recent
+  latency, the same request is sent to the next backend; the first response
+  wins and the slower request is cancelled.
+- Failover: a backend that errors is skipped in favour of the next one.
+- Circuit breaking: backends whose recent error rate or latency crosses a
+  threshold are taken out of rotation until a cool-down trial succeeds.
+
+Hedging applies to ``achat`` and, up to the first event, to ``astream``;
+the synchronous ``chat`` path uses ordered failover only.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..interfaces.llm_provider import LLMProviderInterface, Message, StreamEvent
+from .metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies (seconds)."""
+
+    def __init__(self, window: int = 100):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the ``p`` quantile (0-1) of the window, or None if empty."""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Closed -> open -> half-open breaker driven by error rate and latency.
+
+    The breaker opens once at least ``min_calls`` outcomes are in the window
+    and either the error rate reaches ``error_rate_threshold`` or the median
+    latency exceeds ``latency_threshold``. After ``cooldown`` seconds a single
+    trial call is allowed (half-open); its outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        error_rate_threshold: float = 0.5,
+        latency_threshold: Optional[float] = None,
+        window: int = 20,
+        min_calls: int = 5,
+        cooldown: float = 30.0
+    ):
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial = 0  # id of the latest half-open trial; claims hand it out as their token
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return self.HALF_OPEN
+            return self._state
+
+    def available(self) -> bool:
+        """True if :meth:`allow` would admit a call now; unlike it, claims nothing."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                return time.monotonic() - self._opened_at >= self.cooldown
+            return not self._trial_in_flight
+
+    def claim(self) -> Optional[int]:
+        """
+        Admit a call to this backend now, claiming the half-open trial.
+        Returns None if refused, else the token to pass to :meth:`release`
+        (0 unless the call is the trial).
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return 0
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial += 1
+                return self._trial
+            return None
+
+    def allow(self) -> bool:
+        """True if a call may be sent to this backend now; claims the half-open trial."""
+        return self.claim() is not None
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._outcomes.append((True, latency))
+            self._evaluate()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append((False, 0.0))
+            if self._state == self.HALF_OPEN:
+                self._trip()
+            else:
+                self._evaluate()
+
+    def release(self, token: int) -> None:
+        """Give back the half-open trial ``token`` claimed, if its call was cancelled without an outcome."""
+        with self._lock:
+            if token and token == self._trial:
+                self._trial_in_flight = False
+
+    def _evaluate(self) -> None:
+        if self._state != self.CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        if failures / len(self._outcomes) >= self.error_rate_threshold:
+            self._trip()
+            return
+        if self.latency_threshold is not None:
+            latencies = sorted(latency for ok, latency in self._outcomes if ok)
+            if latencies and latencies[len(latencies) // 2] > self.latency_threshold:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class Backend:
+    """One routable model: its provider plus latency and health tracking."""
+
+    def __init__(self, provider: Any, breaker: CircuitBreaker, latency_window: int = 100):
+        self.provider = provider
+        self.name = getattr(provider, "model", type(provider).__name__)
+        self.breaker = breaker
+        self.latency = LatencyTracker(latency_window)
+        self.first_event_latency = LatencyTracker(latency_window)
+
+
+class RoutedLLMProvider(LLMProviderInterface):
+    """
+    LLM provider that hedges and fails over across equivalent models.
+
+    Args:
+        providers: Ordered providers (primary first), e.g. one LLMProvider per model.
+        hedge_percentile: Latency quantile of the primary after which a hedge is sent.
+        default_hedge_delay: Hedge delay (seconds) used until enough samples exist.
+        min_hedge_delay: Lower bound on the hedge delay.
+        min_latency_samples: Samples needed before the percentile is trusted.
+        breaker_factory: Builds the circuit breaker for each backend.
+
+    Example:
+        >>> llm = RoutedLLMProvider([LLMProvider("gpt-4o"), LLMProvider("claude-3-5-sonnet-latest")])
+        >>> response = await llm.achat(history, tools=schemas)
+    """
+
+    def __init__(
+        self,
+        providers: List[Any],
+        hedge_percentile: float = 0.95,
+        default_hedge_delay: float = 10.0,
+        min_hedge_delay: float = 0.5,
+        min_latency_samples: int = 20,
+        breaker_factory: Optional[Callable[[], CircuitBreaker]] = None
+    ):
+        if not providers:
+            raise ValueError("RoutedLLMProvider requires at least one provider.")
+        factory = breaker_factory or CircuitBreaker
+        self.backends = [Backend(p, factory()) for p in providers]
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_latency_samples = min_latency_samples
+        self.metrics = get_metrics_collector()
+
+    @property
+    def model(self) -> str:
+        """Name of the primary model (for callers that inspect ``llm.model``)."""
+        return self.backends[0].name
+
+    def _available_backends(self) -> Tuple[List[Backend], bool]:
+        """
+        Backends worth trying, in order, and whether the primary is being forced.
+
+        Nothing is claimed here: a half-open trial is only taken (by
+        :meth:`_claim_next`) when the backend is actually called.
+        """
+        available = [b for b in self.backends if b.breaker.available()]
+        if not available:
+            # Every breaker is open: still try the primary rather than fail outright
+            logger.warning("All LLM backends are circuit-broken; forcing primary.")
+            return [self.backends[0]], True
+        return available, False
+
+    def _claim_next(self, backends: List[Backend], forced: bool, position: int) -> Tuple[Optional[Backend], int, int]:
+        """
+        The first backend from ``position`` that its breaker admits, its
+        breaker token (see :meth:`CircuitBreaker.claim`) and the position after it.
+        """
+        while position < len(backends):
+            backend = backends[position]
+            position += 1
+            token = 0 if forced else backend.breaker.claim()
+            if token is not None:
+                return backend, token, position
+        return None, 0, position
+
+    def hedge_delay(self, backend: Backend, streaming: bool = False) -> float:
+        """Seconds to wait on ``backend`` (for its first event if ``streaming``) before hedging to the next one."""
+        latency = backend.first_event_latency if streaming else backend.latency
+        if len(latency) < self.min_latency_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, latency.percentile(self.hedge_percentile))
+
+    def _record(self, backend: Backend, error: Optional[BaseException], latency: float) -> None:
+        labels = {"model": backend.name}
+        if error is None:
+            backend.latency.add(latency)
+            backend.breaker.record_success(latency)
+            self.metrics.record("llm.router.latency_ms", latency * 1000, labels=labels)
+        else:
+            backend.breaker.record_failure()
+            self.metrics.increment("llm.router.errors", labels=labels)
+            logger.warning(f"LLM backend '{backend.name}' failed: {error}")
+        self.metrics.set_gauge(
+            "llm.router.circuit_open", 1.0 if backend.breaker.state != CircuitBreaker.CLOSED else 0.0, labels=labels
+        )
+
+    def chat(self, history: List[Dict[str, Any]], tools: Optional[List[Any]] = None, **kwargs: Any) -> Message:
+        backends, forced = self._available_backends()
+        errors: List[BaseException] = []
+        position = 0
+        while True:
+            backend, _, position = self._claim_next(backends, forced, position)
+            if backend is None:
+                break
+            start = time.perf_counter()
+            try:
+                response = backend.provider.chat(history, tools=tools, **kwargs)
+            except Exception as e:
+                self._record(backend, e, time.perf_counter() - start)
+                errors.append(e)
+                self.metrics.increment("llm.router.failover")
+                continue
+            self._record(backend, None, time.perf_counter() - start)
+            return response
+        raise RuntimeError(f"All LLM backends failed: {errors}")
+
+    async def _call(
+        self,
+        backend: Backend,
+        token: int,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]],
+        kwargs: Dict[str, Any]
+    ) -> Message:
+        start = time.perf_counter()
+        try:
+            response = await backend.provider.achat(history, tools=tools, **kwargs)
+        except asyncio.CancelledError:
+            # Losing a hedge race says nothing about the backend's health
+            backend.breaker.release(token)
+            raise
+        except Exception as e:
+            self._record(backend, e, time.perf_counter() - start)
+            raise
+        self._record(backend, None, time.perf_counter() - start)
+        return response
+
+    async def achat(self, history: List[Dict[str, Any]], tools: Optional[List[Any]] = None, **kwargs: Any) -> Message:
+        backends, forced = self._available_backends()
+        pending: Dict[asyncio.Task, Backend] = {}
+        errors: List[BaseException] = []
+        position = 0
+        last: Optional[Backend] = None
+
+        def launch() -> Optional[Backend]:
+            nonlocal position, last
+            backend, token, position = self._claim_next(backends, forced, position)
+            if backend is not None:
+                pending[asyncio.create_task(self._call(backend, token, history, tools, kwargs))] = backend
+                last = backend
+            return backend
+
+        launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay(last) if position < len(backends) else None
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge = launch()
+                    if hedge is not None:
+                        self.metrics.increment("llm.router.hedged", labels={"model": hedge.name})
+                    continue
+
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        self.metrics.increment("llm.router.wins", labels={"model": backend.name})
+                        return task.result()
+                    errors.append(task.exception())
+
+                if not pending and launch() is not None:
+                    self.metrics.increment("llm.router.failover")
+            raise RuntimeError(f"All LLM backends failed: {errors}")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _first_event(self, stream: AsyncIterator[StreamEvent]) -> Tuple[bool, Optional[StreamEvent]]:
+        try:
+            return True, await stream.__anext__()
+        except StopAsyncIteration:
+            return False, None
+
+    async def _abandon(
+        self,
+        backend: Backend,
+        token: int,
+        stream: AsyncIterator[StreamEvent],
+        task: Optional[asyncio.Task] = None
+    ) -> None:
+        """Stop a stream that lost the race (or whose consumer left); says nothing about the backend's health."""
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        backend.breaker.release(token)
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception:
+                pass
+
+    async def astream(self, history: List[Dict[str, Any]], tools: Optional[List[Any]] = None, **kwargs: Any) -> AsyncIterator[StreamEvent]:
+        """
+        Stream from the first backend to produce an event.
+
+        Until then, streams are hedged and failed over like :meth:`achat`
+        (the hedge delay follows each backend's time to first event); once
+        an event has reached the caller, the stream is committed to that
+        backend and a later error is raised.
+        """
+        backends, forced = self._available_backends()
+        pending: Dict[asyncio.Task, Tuple[Backend, int, AsyncIterator[StreamEvent], float]] = {}
+        errors: List[BaseException] = []
+        position = 0
+        last: Optional[Backend] = None
+        winner = None
+
+        def launch() -> Optional[Backend]:
+            nonlocal position, last
+            backend, token, position = self._claim_next(backends, forced, position)
+            if backend is not None:
+                stream = backend.provider.astream(history, tools=tools, **kwargs)
+                pending[asyncio.create_task(self._first_event(stream))] = (backend, token, stream, time.perf_counter())
+                last = backend
+            return backend
+
+        launch()
+        try:
+            while pending and winner is None:
+                timeout = self.hedge_delay(last, streaming=True) if position < len(backends) else None
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge = launch()
+                    if hedge is not None:
+                        self.metrics.increment("llm.router.hedged", labels={"model": hedge.name})
+                    continue
+
+                for task in done:
+                    backend, token, stream, started_at = pending.pop(task)
+                    if task.exception() is not None:
+                        self._record(backend, task.exception(), time.perf_counter() - started_at)
+                        errors.append(task.exception())
+                    elif winner is None:
+                        winner = (backend, token, stream, started_at, task.result())
+                    else:
+                        await self._abandon(backend, token, stream)
+
+                if winner is None and not pending and launch() is not None:
+                    self.metrics.increment("llm.router.failover")
+        finally:
+            for task, (backend, token, stream, _) in list(pending.items()):
+                await self._abandon(backend, token, stream, task)
+
+        if winner is None:
+            raise RuntimeError(f"All LLM backends failed: {errors}")
+
+        backend, token, stream, started_at, (has_event, first) = winner
+        backend.first_event_latency.add(time.perf_counter() - started_at)
+        self.metrics.increment("llm.router.wins", labels={"model": backend.name})
+        try:
+            if has_event:
+                yield first
+                async for event in stream:
+                    yield event
+        except Exception as e:
+            # Partial output already reached the caller; cannot transparently switch
+            self._record(backend, e, time.perf_counter() - started_at)
+            raise
+        except BaseException:
+            # The consumer went away: no verdict on the backend
+            await self._abandon(backend, token, stream)
+            raise
+        self._record(backend, None, time.perf_counter() - started_at)
@@ -1,21 +1,14 @@
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 import datetime
+import uuid
 from gamma_engine.core.config import settings
-from gamma_engine.core.rag_service import get_rag_provider
+from gamma_engine.core.rag_service import get_shared_rag_provider
+from gamma_engine.core.ltm_write_queue import KnowledgeWriteQueue, get_write_queue
 
 logger = logging.getLogger(__name__)
 
-# Singleton cache for RAG Provider to prevent per-session model reloading
-_rag_provider_instance = None
-
-def get_shared_rag_provider():
-    global _rag_provider_instance
-    if _rag_provider_instance is None:
-        _rag_provider_instance = get_rag_provider(settings.rag_provider)
-    return _rag_provider_instance
-
 class LongTermMemory:
     """
     Manages the agent's long-term memory (L3) or semantic memory.
@@ -24,52 +17,80 @@ class LongTermMemory:
 
     def __init__(self, session_id: str):
         self.session_id = session_id
-        # Use shared singleton provider based on global settings
+        # Process-wide provider shared by every session; it loads lazily, so
+        # constructing a memory never waits for the embedding model
         self.rag_provider = get_shared_rag_provider()
         self.corpus_name = f"ltm-{session_id}"
+        self._corpus_ready = False
+        self._write_queue: Optional[KnowledgeWriteQueue] = None
 
-        # Ensure corpus exists
-        if self.rag_provider and self.rag_provider.is_configured:
-            self.rag_provider.create_or_get_corpus(self.corpus_name)
+        if self.rag_provider:
+            self._write_queue = get_write_queue(
+                self.rag_provider,
+                batch_size=settings.ltm_write_batch_size,
+                flush_interval=settings.ltm_write_flush_interval
+            )
             logger.info(f"LongTermMemory initialized with RAG corpus: {self.corpus_name}")
         else:
             logger.warning("LongTermMemory: RAG Provider not available. Memory will be ephemeral.")
 
+    def _ensure_corpus(self) -> bool:
+        """Creates the corpus on first use; False if the provider is not configured."""
+        if not (self.rag_provider and self.rag_provider.is_configured):
+            return False
+        if not self._corpus_ready:
+            self.rag_provider.create_or_get_corpus(self.corpus_name)
+            self._corpus_ready = True
+        return True
+
     def add_knowledge(self, content: str, source: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> None:
         """
-        Adds new knowledge to the long-term memory via RAG ingestion.
+        Queues new knowledge for long-term memory. Facts are written in
+        batches by the shared write-behind queue (see ``flush``).
         """
         if not content: return
 
         timestamp = datetime.datetime.now().isoformat()
         full_content = f"Source: {source} | Time: {timestamp}\n{content}"
 
-        if self.rag_provider and self.rag_provider.is_configured:
-            import tempfile
-            import os
-
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp:
-                temp.write(full_content)
-                temp_path = temp.name
-
-            try:
-                self.rag_provider.upload_document_to_corpus(self.corpus_name, temp_path, f"fact-{timestamp}")
-                logger.info(f"Knowledge persisted to LTM: {content[:50]}...")
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+        # Once the provider has loaded, skip queueing if it turned out unusable
+        unavailable = getattr(self.rag_provider, "is_ready", True) and not self.rag_provider.is_configured
+        if self._write_queue is not None and not unavailable:
+            fact_metadata = {"source": source or "ltm", "timestamp": timestamp}
+            # Vector stores only accept scalar metadata values
+            fact_metadata.update({k: v for k, v in (metadata or {}).items() if isinstance(v, (str, int, float, bool))})
+            self._write_queue.put(self.corpus_name, full_content, fact_metadata, f"fact-{uuid.uuid4().hex}")
+            logger.info(f"Knowledge queued for LTM: {content[:50]}...")
         else:
             logger.warning("LTM not configured, knowledge lost.")
 
-    def retrieve_knowledge(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+    def flush(self) -> None:
+        """Writes this memory's queued knowledge immediately."""
+        if self._write_queue is not None:
+            self._write_queue.flush(self.corpus_name)
+
+    def retrieve_knowledge(self, query: str, n_results: int = 3, other_corpora: Sequence[str] = ()) -> List[Dict[str, Any]]:
         """
         Retrieves relevant knowledge from long-term memory based on a query.
+        ``other_corpora`` (e.g. the session or shared corpus) are searched in
+        the same concurrent ``query_many`` call and merged with it.
         """
-        if self.rag_provider and self.rag_provider.is_configured:
+        if self._ensure_corpus():
+            # Read-your-writes: facts still waiting in the queue must be searchable
+            if self._write_queue is not None and self._write_queue.has_pending(self.corpus_name):
+                self.flush()
+            if other_corpora:
+                return self.rag_provider.query_many([self.corpus_name, *other_corpora], query, num_results=n_results)
             # Fixed: parameter name n_results vs num_results
             return self.rag_provider.query_rag_corpus(self.corpus_name, query, num_results=n_results)
         return []
 
     def clear(self) -> None:
-        """Clears all knowledge (Not easily supported by all RAG providers, so we log warning)."""
-        logger.warning("Clear LTM not fully supported by all RAG backends.")
+        """Clears all knowledge: queued facts and the session's corpus (if the provider supports deletion)."""
+        if self._write_queue is not None:
+            self._write_queue.discard(self.corpus_name)
+        if self.rag_provider and self.rag_provider.is_configured and self.rag_provider.delete_corpus(self.corpus_name):
+            self._corpus_ready = False
+            logger.info(f"LTM corpus {self.corpus_name} deleted.")
+        else:
+            logger.warning("Clear LTM not supported by the configured RAG backend.")
@@ -0,0 +1,178 @@
+"""
+Write-behind queue for LongTermMemory ingestion.
+
+Facts are buffered per corpus and written with one ``RAGProvider.add_texts``
+call per corpus, so a burst of facts (e.g. entities extracted while pruning
+memory) costs one embedding call and one vector-store upsert instead of a
+temp file, loader, chunker and insert per fact.
+
+A batch is written when ``batch_size`` facts are pending or the oldest
+pending fact is ``flush_interval`` seconds old, whichever comes first.
+Pending facts are written on :meth:`KnowledgeWriteQueue.close`, which is
+also registered with ``atexit``. The first batch for a corpus creates it
+(``create_or_get_corpus``), since providers such as Vertex only accept
+writes to an existing corpus.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# (text, metadata, id)
+PendingFact = Tuple[str, Dict[str, Any], str]
+
+
+class KnowledgeWriteQueue:
+    """
+    Batches knowledge writes to a RAG provider on a background thread.
+
+    Args:
+        provider: RAGProvider that receives the batched ``add_texts`` calls.
+        batch_size: Pending facts that trigger an immediate write.
+        flush_interval: Maximum seconds a fact waits before being written.
+    """
+
+    def __init__(self, provider: Any, batch_size: int = 32, flush_interval: float = 2.0):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, List[PendingFact]] = {}
+        self._count = 0
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Serializes writers so batches reach the provider in order
+        self._write_lock = threading.Lock()
+        # Corpora known to exist; guarded by _write_lock
+        self._created: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.metrics = get_metrics_collector()
+
+    @property
+    def pending(self) -> int:
+        return self._count
+
+    def has_pending(self, corpus_name: str) -> bool:
+        with self._lock:
+            return bool(self._pending.get(corpus_name))
+
+    def put(self, corpus_name: str, text: str, metadata: Dict[str, Any], doc_id: str) -> None:
+        with self._lock:
+            self._pending.setdefault(corpus_name, []).append((text, metadata, doc_id))
+            self._count += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            closed = self._closed
+            if not closed:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="ltm-write-behind", daemon=True)
+                    self._thread.start()
+                if self._count >= self.batch_size:
+                    self._wakeup.notify()
+        if closed:
+            # Late writes after shutdown are written through
+            self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed and self._count < self.batch_size:
+                    if self._oldest is None:
+                        self._wakeup.wait()
+                        continue
+                    remaining = self._oldest + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self, corpus_name: Optional[str] = None) -> int:
+        """Write pending facts now (only ``corpus_name``'s if given). Returns the number written."""
+        with self._write_lock:
+            with self._lock:
+                if corpus_name is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {corpus_name: self._pending.pop(corpus_name, [])}
+                self._count = sum(len(items) for items in self._pending.values())
+                self._oldest = time.monotonic() if self._count else None
+
+            written = 0
+            for corpus, items in batch.items():
+                if not items:
+                    continue
+                texts, metadatas, ids = (list(column) for column in zip(*items))
+                start = time.perf_counter()
+                try:
+                    if corpus not in self._created and self.provider.create_or_get_corpus(corpus):
+                        self._created.add(corpus)
+                    stored = self.provider.add_texts(corpus, texts, metadatas=metadatas, ids=ids)
+                except Exception as e:
+                    logger.error(f"LTM batch write to '{corpus}' failed: {e}")
+                    stored = []
+                written += len(stored)
+                if len(stored) < len(items):
+                    self.metrics.increment("ltm.write_queue.failed", len(items) - len(stored))
+                self.metrics.record("ltm.write_queue.batch_size", len(items))
+                self.metrics.record("ltm.write_queue.flush_ms", (time.perf_counter() - start) * 1000)
+            return written
+
+    def discard(self, corpus_name: str) -> int:
+        """
+        Drop ``corpus_name``'s pending facts without writing them (e.g. before
+        the corpus is deleted). Returns the number dropped.
+        """
+        with self._write_lock:
+            self._created.discard(corpus_name)
+        with self._lock:
+            dropped = len(self._pending.pop(corpus_name, []))
+            self._count -= dropped
+            if not self._count:
+                self._oldest = None
+        return dropped
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Stop the background thread and write everything still pending."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush()
+
+
+_queues: Dict[int, KnowledgeWriteQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(provider: Any, batch_size: int = 32, flush_interval: float = 2.0) -> KnowledgeWriteQueue:
+    """Return the process-wide queue for ``provider``, creating it on first use."""
+    with _queues_lock:
+        queue = _queues.get(id(provider))
+        if queue is None:
+            queue = KnowledgeWriteQueue(provider, batch_size=batch_size, flush_interval=flush_interval)
+            _queues[id(provider)] = queue
+        return queue
+
+
+def close_write_queues() -> None:
+    """Flush and stop every write queue; called on server shutdown and at exit."""
+    with _queues_lock:
+        queues = list(_queues.values())
+        _queues.clear()
+    for queue in queues:
+        queue.close()
+
+
+atexit.register(close_write_queues)
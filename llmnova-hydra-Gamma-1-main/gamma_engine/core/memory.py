@@ -6,6 +6,10 @@ from typing import Any, Dict, List, Optional, Union
 from ..interfaces.llm_provider import Message, LLMProviderInterface
 from .redis_client import get_redis_client
 from .long_term_memory import LongTermMemory
+from .config import settings
+from .memory_summarizer import SummaryWorker
+from .session_journal import SessionJournal
+from .tokenizer import Tokenizer, context_budget, count_message_tokens, get_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -16,9 +20,20 @@ class EpisodicMemory:
     Enhanced with Semantic Summarization and Entity Extraction.
     """
 
-    def __init__(self, session_id: str, llm_provider: Optional[LLMProviderInterface] = None, max_tokens: int = 4000, storage_path: str = "file_storage"):
+    def __init__(
+        self,
+        session_id: str,
+        llm_provider: Optional[LLMProviderInterface] = None,
+        max_tokens: Optional[int] = None,
+        storage_path: str = "file_storage",
+        model: Optional[str] = None,
+        tokenizer: Optional[Tokenizer] = None
+    ):
         """
         Initializes the EpisodicMemory system.
+
+        The token budget defaults to the context window of ``model`` (or of the
+        provider's model) minus room for the reply, and 4000 when unknown.
         """
         if not session_id:
             raise ValueError("session_id cannot be empty.")
@@ -26,45 +41,192 @@ class EpisodicMemory:
         self.session_id = session_id
         self.llm = llm_provider
         self.redis_key = f"session:{self.session_id}:history"
+        self.redis_summary_key = f"session:{self.session_id}:summary"
         self.redis_client = get_redis_client()
+        # Write-behind buffer of serialized messages awaiting one batched RPUSH
+        self._redis_pending: List[str] = []
+        # Loaded messages that are entries of the Redis list, by identity; they are the
+        # newest entries of the list, so pruning keeps the list's last len() entries.
+        # Holding the messages keeps their ids from being reused.
+        self._redis_members: Dict[int, Message] = {}
+        self._redis_summary: Optional[Message] = None
+        if model is None and isinstance(getattr(llm_provider, "model", None), str):
+            model = llm_provider.model
+        self.model = model
+        self.tokenizer = tokenizer or get_tokenizer(model)
         self.messages: List[Message] = []
+        if max_tokens is None:
+            max_tokens = context_budget(model) if model else 4000
         self.max_tokens = max_tokens
+        self.summarizer = SummaryWorker(self, soft_ratio=settings.memory_summary_soft_ratio)
         self.storage_path = storage_path
+        # Legacy whole-history snapshot; migrated into the journal on first load
         self.file_path = os.path.join(storage_path, session_id, "memory.json")
+        self.journal = SessionJournal(
+            os.path.join(storage_path, session_id, "history.jsonl"),
+            fsync_policy=settings.memory_journal_fsync
+        )
         self.long_term_memory = LongTermMemory(session_id)
 
         self.load_from_redis()
         if not self.messages:
              self.load_from_file()
 
+    @property
+    def messages(self) -> List[Message]:
+        return self._messages
+
+    @messages.setter
+    def messages(self, messages: List[Message]) -> None:
+        self._messages = list(messages)
+        # Replaced messages are no longer known to match Redis entries
+        self._redis_members = {}
+        self._recount()
+
+    def _recount(self) -> None:
+        self._token_total = sum(count_message_tokens(m, self.tokenizer) for m in self._messages)
+        self._counted_messages = len(self._messages)
+
+    def _sync_token_total(self) -> None:
+        # Callers may mutate ``messages`` in place (e.g. insert a system prompt)
+        if self._counted_messages != len(self._messages):
+            self._recount()
+
+    def _replace_range(self, start: int, end: int, replacement: Optional[Message] = None) -> None:
+        """Replace messages[start:end] with one message (or nothing), adjusting the token total."""
+        self._sync_token_total()
+        removed = self._messages[start:end]
+        self._messages = self._messages[:start] + ([replacement] if replacement else []) + self._messages[end:]
+        self._journal("replace", removed, replacement)
+        self._trim_redis(removed, replacement)
+        self._token_total -= sum(count_message_tokens(m, self.tokenizer) for m in removed)
+        if replacement:
+            self._token_total += count_message_tokens(replacement, self.tokenizer)
+        self._counted_messages = len(self._messages)
+
     # ... [Load/Save methods remain similar, omitted for brevity but preserved in real file] ...
     def load_from_redis(self) -> None:
+        """
+        Loads the stored summary plus the newest ``memory_redis_tail_messages``
+        entries in one pipelined round trip. Only the most recent messages are
+        fully validated; older ones were written by us and are constructed directly.
+        """
         if not self.redis_client: return
         try:
-            message_jsons = self.redis_client.lrange(self.redis_key, 0, -1)
-            if message_jsons:
-                self.messages = [Message.model_validate_json(msg_json) for msg_json in message_jsons]
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(self.redis_summary_key)
+            pipe.lrange(self.redis_key, -settings.memory_redis_tail_messages, -1)
+            summary_json, message_jsons = pipe.execute()
+            if not message_jsons and not summary_json:
+                return
+
+            validate_from = len(message_jsons) - settings.memory_redis_validate_recent
+            loaded = [
+                Message.model_validate_json(raw) if i >= validate_from else Message.model_construct(**json.loads(raw))
+                for i, raw in enumerate(message_jsons)
+            ]
+            members = {id(m): m for m in loaded}
+            if summary_json:
+                self._redis_summary = Message.model_validate_json(summary_json)
+                loaded.insert(0, self._redis_summary)
+            self.messages = loaded
+            self._redis_members = members
+            self._adopt_into_journal(loaded)
         except Exception as e:
             logger.error(f"Error loading memory from Redis: {e}")
 
+    def _adopt_into_journal(self, loaded: List[Message]) -> None:
+        """
+        Links messages loaded from Redis to their journal records (matched by
+        content, newest first) and journals only those the journal lacks, so
+        later edits can reference them without rewriting the journal.
+        """
+        try:
+            # Room for the journal's pinned prompt and summaries on top of the loaded messages
+            budget = self.max_tokens + sum(count_message_tokens(m, self.tokenizer) for m in loaded)
+            journaled: Dict[str, List[Message]] = {}
+            for message in self.journal.load_tail(budget, self.tokenizer):
+                journaled.setdefault(message.model_dump_json(exclude_none=True), []).append(message)
+            for message in reversed(loaded):
+                candidates = journaled.get(message.model_dump_json(exclude_none=True))
+                if candidates:
+                    message._journal_seq = candidates.pop()._journal_seq
+
+            following: Optional[Message] = None
+            missing = []
+            for message in reversed(loaded):
+                if message._journal_seq is None:
+                    missing.append((following, message))
+                else:
+                    following = message
+            for before, message in reversed(missing):
+                self.journal.insert(before, message)
+        except Exception as e:
+            logger.error(f"Error writing memory journal: {e}")
+
+    def flush(self) -> None:
+        """Pushes buffered messages to Redis in a single round trip."""
+        if not self._redis_pending:
+            return
+        pending, self._redis_pending = self._redis_pending, []
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.rpush(self.redis_key, *pending)
+        except Exception as e:
+            logger.error(f"Error writing memory to Redis: {e}")
+
+    def _trim_redis(self, removed: List[Message], replacement: Optional[Message]) -> None:
+        """Mirrors a prune/summary swap in Redis: LTRIM the list and store the new summary."""
+        if not self.redis_client:
+            return
+        self.flush()
+        dropped = sum(1 for m in removed if self._redis_members.pop(id(m), None) is m)
+        kept = len(self._redis_members)
+        summary_removed = self._redis_summary is not None and any(m is self._redis_summary for m in removed)
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            if dropped:
+                # Entries that were never loaded are older than anything summarized and go too
+                if kept:
+                    pipe.ltrim(self.redis_key, -kept, -1)
+                else:
+                    pipe.delete(self.redis_key)
+            if replacement is not None:
+                pipe.set(self.redis_summary_key, replacement.model_dump_json())
+            elif summary_removed:
+                pipe.delete(self.redis_summary_key)
+            pipe.execute()
+            if replacement is not None:
+                self._redis_summary = replacement
+            elif summary_removed:
+                self._redis_summary = None
+        except Exception as e:
+            logger.error(f"Error trimming memory in Redis: {e}")
+
     def load_from_file(self) -> None:
-        if not os.path.exists(self.file_path): return
+        """Loads the system messages and the newest messages that fit the token budget from the journal."""
         try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.messages = [Message(**msg_data) for msg_data in data]
+            self.journal.migrate_from_json(self.file_path)
+            self.messages = self.journal.load_tail(self.max_tokens, self.tokenizer)
         except Exception as e:
             logger.error(f"Error loading memory from file: {e}")
 
     def save_to_file(self) -> None:
+        """Messages are journaled as they arrive; this syncs the journal and compacts it when due."""
+        self.flush()
         try:
-            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-            data = [msg.model_dump(exclude_none=True) for msg in self.messages]
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self.journal.flush()
+            self.journal.compact_if_needed(self.messages)
         except Exception as e:
             logger.error(f"Error saving memory to file: {e}")
 
+    def _journal(self, op: str, *args: Any) -> None:
+        try:
+            getattr(self.journal, op)(*args)
+        except Exception as e:
+            logger.error(f"Error writing memory journal: {e}")
+
     def add(self, role: str, content: str, tool_calls: Optional[List[Any]] = None) -> None:
         message = Message(role=role, content=content, tool_calls=tool_calls)
         self.append(message)
@@ -72,58 +234,62 @@ class EpisodicMemory:
     def append(self, message: Union[Message, Dict[str, Any]]) -> None:
         if isinstance(message, dict):
             message = Message(**message)
-        self.messages.append(message)
+        self._sync_token_total()
+        self._messages.append(message)
+        self._token_total += count_message_tokens(message, self.tokenizer)
+        self._counted_messages += 1
         if self.redis_client:
-            self.redis_client.rpush(self.redis_key, message.model_dump_json())
-        
-        # Check for pruning/summarization
-        if self.get_token_count() > self.max_tokens:
-            self.semantic_pruning()
+            self._redis_members[id(message)] = message
+            self._redis_pending.append(message.model_dump_json())
+            if len(self._redis_pending) >= settings.memory_redis_batch_size:
+                self.flush()
+        self._journal("append", message)
+
+        # Soft threshold: summarize in the background; hard threshold is enforced by ensure_within_budget
+        self.summarizer.maybe_start()
+
+    def insert(self, index: int, message: Message) -> None:
+        """Inserts a message at ``index`` (e.g. a system prompt at 0)."""
+        self._sync_token_total()
+        before = self._messages[index] if index < len(self._messages) else None
+        self._messages.insert(index, message)
+        self._token_total += count_message_tokens(message, self.tokenizer)
+        self._counted_messages += 1
+        self._journal("insert", before, message)
+
+    async def ensure_within_budget(self) -> None:
+        """Wait for pending summarization only if the history exceeds the hard token limit."""
+        await self.summarizer.wait()
 
     def get_messages(self) -> List[Dict[str, Any]]:
         return [msg.model_dump(exclude_none=True) for msg in self.messages]
 
+    def get_context(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Returns the history (optionally only the last ``limit`` messages) for an LLM call."""
+        # An LLM call is a natural batch boundary: persist this step's messages first
+        self.flush()
+        messages = self.messages[-limit:] if limit else self.messages
+        return [msg.model_dump(exclude_none=True) for msg in messages]
+
     def get_token_count(self) -> int:
-        return sum(len(msg.content.split()) for msg in self.messages if msg.content)
+        """Running token total of the history; O(1) per call."""
+        self._sync_token_total()
+        return self._token_total
 
     def semantic_pruning(self) -> None:
         """
-        Intelligently summarizes older messages using LLM instead of simple deletion.
-        Also extracts entities to LongTermMemory.
+        Synchronously summarizes older messages with one structured LLM call
+        and stores extracted entities in LongTermMemory. The agent loop relies
+        on the background worker instead; this is for synchronous callers.
         """
-        if len(self.messages) < 10: return
-
-        # 1. Extract Entities from the oldest chunk
-        old_chunk = self.messages[:5]
-        chunk_text = "\n".join([f"{m.role}: {m.content}" for m in old_chunk])
-
-        if self.llm:
-            try:
-                # Entity Extraction
-                entity_prompt = f"Extract key entities (User Name, Project, Goal) from this conversation:\n{chunk_text}"
-                entities = self.llm.chat([{"role": "user", "content": entity_prompt}]).content
-                self.long_term_memory.add_knowledge(entities, source="conversation_history")
-
-                # Summarization
-                summary_prompt = f"Summarize this conversation concisely:\n{chunk_text}"
-                summary = self.llm.chat([{"role": "user", "content": summary_prompt}]).content
-
-                summary_msg = Message(role="system", content=f"Previous Context: {summary}")
-
-                # Replace old messages with summary
-                self.messages = [summary_msg] + self.messages[5:]
-                logger.info("Memory summarized and entities extracted.")
-
-            except Exception as e:
-                logger.error(f"Semantic pruning failed: {e}")
-                # Fallback to simple pruning
-                self.messages = self.messages[5:]
-        else:
-            self.messages = self.messages[5:]
+        self.summarizer.compact_now()
 
     def clear(self) -> None:
         self.messages = []
-        if self.redis_client: self.redis_client.delete(self.redis_key)
+        self._redis_pending = []
+        self._redis_summary = None
+        if self.redis_client: self.redis_client.delete(self.redis_key, self.redis_summary_key)
+        self.journal.clear()
         if os.path.exists(self.file_path): os.remove(self.file_path)
 
 # Aliases
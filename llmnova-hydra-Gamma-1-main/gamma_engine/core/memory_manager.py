@@ -5,17 +5,33 @@ memory layers (Working, Short-term, Long-term, and Episodic) to provide
 a comprehensive and context-aware memory system for the agent.
 """
 
+import datetime
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ..interfaces.llm_provider import Message
-from .working_memory import WorkingMemory # Renamed from memory.py
-from .episodic_memory import EpisodicStore, Episode, Action # New episodic memory components
+from .memory import WorkingMemory
+from .episodic_memory import EpisodicStore, Episode, Action, get_shared_episodic_store # New episodic memory components
 from .short_term_memory import ShortTermMemory # New short-term memory component
 from .long_term_memory import LongTermMemory # New long-term memory component
+from .config import settings
+from .rag_service import get_shared_rag_provider
 
 logger = logging.getLogger(__name__)
 
+def _episode_embedder() -> Tuple[Optional[Callable[[List[str]], List[List[float]]]], str]:
+    """
+    The shared RAG provider's sentence embedder when the local provider is
+    configured (loading it if needed), else None for hashing embeddings.
+    """
+    if settings.rag_provider.lower() not in ("local", "numpy"):
+        return None, "hashing"
+    provider = get_shared_rag_provider()
+    embedder = getattr(provider.get(), "embedder", None) if provider.is_configured else None
+    if embedder is None or getattr(embedder, "model", None) is None:
+        return None, "hashing"
+    return embedder.embed_text, embedder.model_name
+
 class MemoryManager:
     """
     Orchestrates different memory layers for the agent.
@@ -39,7 +55,8 @@ class MemoryManager:
         self.working_memory = WorkingMemory(session_id=session_id, max_tokens=max_working_memory_tokens)
         self.short_term_memory = ShortTermMemory(session_id=session_id)
         self.long_term_memory = LongTermMemory(session_id=session_id)
-        self.episodic_store = EpisodicStore()
+        # Episodes are shared across sessions so experience carries over; one store per process
+        self.episodic_store: EpisodicStore = get_shared_episodic_store(settings.episodic_store_path, *_episode_embedder())
 
     def add_message(self, role: str, content: str, tool_calls: Optional[List[Any]] = None) -> None:
         """
@@ -81,18 +98,27 @@ class MemoryManager:
         # Also, extract knowledge from the episode for long-term memory
         self.long_term_memory.add_knowledge(content=f"Agent completed goal '{goal}' with outcome '{outcome}'. Reflection: {reflection}", source="episodic_memory")
 
-    def get_similar_episodes(self, current_goal: str, n_results: int = 1) -> List[Episode]:
+    def get_similar_episodes(
+        self,
+        current_goal: str,
+        n_results: int = 1,
+        outcome: Optional[str] = "success",
+        since: Optional[datetime.datetime] = None
+    ) -> List[Episode]:
         """
-        Retrieves similar past episodes from the episodic store.
+        Retrieves the past episodes most similar to the current goal, optionally
+        filtered by outcome (None for any) and recency.
         """
-        return self.episodic_store.find_similar_episodes(current_goal, n_results)
+        return self.episodic_store.find_similar_episodes(current_goal, n_results, outcome=outcome, since=since)
 
     def clear_all_memory(self) -> None:
-        """Clears all memory layers."""
+        """
+        Clears this session's memory layers. The episodic store is shared by
+        every session (experience carries over), so it is left untouched.
+        """
         self.working_memory.clear()
         self.short_term_memory.clear()
         self.long_term_memory.clear()
-        self.episodic_store.episodes = [] # Clear in-memory episodes
         logger.info(f"All memory cleared for session {self.session_id}.")
 
     def __str__(self) -> str:
@@ -0,0 +1,237 @@
+"""
+Background summarization of episodic memory.
+
+A SummaryWorker compacts the oldest part of a session's history into a
+single "Previous Context" message without blocking the agent loop:
+- crossing the soft threshold starts one background asyncio task
+- the task makes a single structured LLM call returning both the summary
+  and the entities worth keeping in LongTermMemory
+- the summarized span is swapped in atomically, and only if it is still
+  unchanged; messages appended meanwhile are kept
+- callers only wait (``EpisodicMemory.ensure_within_budget``) when the hard
+  threshold is exceeded before the task has finished
+- if the LLM call fails the messages are kept and summarization is retried
+  after ``retry_delay``; only when the hard threshold is exceeded is the
+  oldest span dropped without a summary
+
+Without a running event loop (scripts, synchronous callers) compaction runs
+inline once the hard threshold is crossed.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+from ..interfaces.llm_provider import Message, async_chat
+from .metrics import get_metrics_collector
+from .rate_limiter import Priority, llm_priority
+from .tokenizer import count_message_tokens
+
+if TYPE_CHECKING:
+    from .memory import EpisodicMemory
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Previous Context: "
+
+SUMMARY_PROMPT = (
+    "Compress the following conversation excerpt for an AI agent's memory.\n"
+    "Return only a JSON object of the form "
+    '{{"summary": "<concise summary preserving decisions, results and open tasks>", '
+    '"entities": ["<key facts: user name, project, goals, constraints>"]}}\n\n'
+    "{transcript}"
+)
+
+
+def parse_summary(content: Optional[str]) -> Tuple[str, List[str]]:
+    """Extract (summary, entities) from the model's reply, tolerating non-JSON output."""
+    text = (content or "").strip()
+    if "```" in text:
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+    try:
+        data = json.loads(text)
+        summary = str(data.get("summary", "")).strip()
+        entities = [str(e) for e in data.get("entities", []) if e]
+        if summary:
+            return summary, entities
+    except (json.JSONDecodeError, AttributeError):
+        pass
+    return (content or "").strip(), []
+
+
+class SummaryWorker:
+    """
+    Per-session compaction worker owned by an EpisodicMemory.
+
+    Args:
+        memory: The memory to compact.
+        soft_ratio: Fraction of ``memory.max_tokens`` that starts background compaction.
+        target_ratio: Fraction of ``memory.max_tokens`` to compact down to.
+        keep_recent: Number of most recent messages that are never summarized.
+        retry_delay: Seconds to wait after a failed summarization before the next background attempt.
+    """
+
+    def __init__(
+        self,
+        memory: "EpisodicMemory",
+        soft_ratio: float = 0.75,
+        target_ratio: float = 0.5,
+        keep_recent: int = 6,
+        retry_delay: float = 30.0
+    ):
+        self.memory = memory
+        self.soft_ratio = soft_ratio
+        self.target_ratio = target_ratio
+        self.keep_recent = keep_recent
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+        self.metrics = get_metrics_collector()
+
+    @property
+    def soft_limit(self) -> int:
+        return int(self.memory.max_tokens * self.soft_ratio)
+
+    @property
+    def in_flight(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def plan(self) -> Optional[Tuple[int, int]]:
+        """Return the [start, end) span to summarize, or None if nothing can be compacted."""
+        messages = self.memory.messages
+        # Keep a leading system prompt verbatim; earlier summaries are folded into the new one
+        start = 1 if messages and messages[0].role == "system" and not (messages[0].content or "").startswith(SUMMARY_PREFIX) else 0
+        limit = len(messages) - self.keep_recent
+        if limit - start < 2:
+            return None
+
+        excess = self.memory.get_token_count() - int(self.memory.max_tokens * self.target_ratio)
+        end = start
+        removed = 0
+        while end < limit and removed < excess:
+            removed += count_message_tokens(messages[end], self.memory.tokenizer)
+            end += 1
+        end = max(end, start + 2)
+        # Never separate tool results from the assistant message that requested them
+        while end < limit and messages[end].role == "tool":
+            end += 1
+        return start, end
+
+    def maybe_start(self) -> None:
+        """Called after each append: start or run compaction as thresholds require."""
+        total = self.memory.get_token_count()
+        if total <= self.soft_limit or self.in_flight:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None and self.memory.llm is not None:
+            if time.monotonic() >= self._retry_at:
+                self._task = loop.create_task(self._run())
+        elif total > self.memory.max_tokens:
+            self.compact_now()
+
+    async def wait(self) -> None:
+        """Ensure the history is within the hard limit, waiting on (or starting) compaction."""
+        if self.memory.get_token_count() <= self.memory.max_tokens:
+            return
+        start = time.perf_counter()
+        if not self.in_flight:
+            if self.memory.llm is None:
+                self.compact_now()
+                return
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        await asyncio.shield(self._task)
+        if self.memory.get_token_count() > self.memory.max_tokens:
+            # Summarization failed and the hard limit is exceeded: drop the span
+            self._drop_oldest()
+        self.metrics.record("memory.summarize.blocked_ms", (time.perf_counter() - start) * 1000)
+
+    def _transcript(self, span: List[Message]) -> List[dict]:
+        transcript = "\n".join(f"{m.role}: {m.content}" for m in span if m.content)
+        return [{"role": "user", "content": SUMMARY_PROMPT.format(transcript=transcript)}]
+
+    async def _run(self) -> None:
+        span_range = self.plan()
+        if span_range is None:
+            return
+        start, end = span_range
+        snapshot = list(self.memory.messages[start:end])
+        began = time.perf_counter()
+        try:
+            with llm_priority(Priority.BACKGROUND):
+                response = await async_chat(self.memory.llm, self._transcript(snapshot))
+            summary, entities = parse_summary(response.content)
+        except Exception as e:
+            summary, entities = None, []
+            logger.error(f"Background memory summarization failed: {e}")
+
+        if not summary:
+            self._failed()
+            return
+        self._swap(start, snapshot, summary)
+        self.metrics.record("memory.summarize.duration_ms", (time.perf_counter() - began) * 1000)
+        if entities:
+            await asyncio.to_thread(self._persist_entities, entities)
+
+    def compact_now(self) -> None:
+        """Synchronous compaction (no event loop available)."""
+        span_range = self.plan()
+        if span_range is None:
+            return
+        start, end = span_range
+        snapshot = list(self.memory.messages[start:end])
+        summary, entities = None, []
+        if self.memory.llm is not None:
+            try:
+                with llm_priority(Priority.BACKGROUND):
+                    response = self.memory.llm.chat(self._transcript(snapshot))
+                summary, entities = parse_summary(response.content)
+            except Exception as e:
+                logger.error(f"Memory summarization failed: {e}")
+        if not summary:
+            if self.memory.llm is not None:
+                self._failed()
+            if self.memory.get_token_count() <= self.memory.max_tokens:
+                return
+        self._swap(start, snapshot, summary)
+        if entities:
+            self._persist_entities(entities)
+
+    def _failed(self) -> None:
+        """Keep the messages and hold off background attempts for ``retry_delay``."""
+        self._retry_at = time.monotonic() + self.retry_delay
+        self.metrics.increment("memory.summarize.failures")
+
+    def _drop_oldest(self) -> None:
+        span_range = self.plan()
+        if span_range is not None:
+            start, end = span_range
+            logger.warning(f"Dropping {end - start} messages of session {self.memory.session_id} without a summary (over the token limit).")
+            self._swap(start, list(self.memory.messages[start:end]), None)
+
+    def _swap(self, start: int, snapshot: List[Message], summary: Optional[str]) -> None:
+        messages = self.memory.messages
+        if not (start < len(messages) and messages[start] is snapshot[0]):
+            # Messages may have been inserted before the span (e.g. a system prompt)
+            start = next((i for i, m in enumerate(messages) if m is snapshot[0]), -1)
+        current = messages[start:start + len(snapshot)] if start >= 0 else []
+        if len(current) != len(snapshot) or any(a is not b for a, b in zip(current, snapshot)):
+            logger.info("History changed during summarization; discarding stale summary.")
+            return
+        replacement = Message(role="system", content=f"{SUMMARY_PREFIX}{summary}") if summary else None
+        self.memory._replace_range(start, start + len(snapshot), replacement)
+        self.metrics.increment("memory.summarize.swaps")
+        logger.info(f"Compacted {len(snapshot)} messages of session {self.memory.session_id}.")
+
+    def _persist_entities(self, entities: List[Any]) -> None:
+        try:
+            self.memory.long_term_memory.add_knowledge("\n".join(entities), source="conversation_history")
+        except Exception as e:
+            logger.error(f"Persisting extracted entities failed: {e}")
@@ -2,6 +2,7 @@
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 from gamma_engine.core.logger import logger
+from gamma_engine.interfaces.llm_provider import async_chat
 
 class PlanStep(BaseModel):
     id: int
@@ -22,20 +23,36 @@ class Planner:
         """
         Creates a high-level plan.
         """
-        prompt = f"""
-        Goal: {goal}
-        Create a execution plan. Return a JSON list of strings.
-        Example: ["Step 1", "Step 2"]
+        try:
+            response = self.llm.chat([{"role": "user", "content": self._plan_prompt(goal)}])
+            return self._set_plan(response.content)
+        except Exception as e:
+            logger.error(f"Planning failed: {e}")
+            return [PlanStep(id=1, description=goal)]
+
+    async def acreate_plan(self, goal: str) -> List[PlanStep]:
+        """
+        Async variant of create_plan that uses the provider's native async client.
         """
         try:
-            response = self.llm.chat([{"role": "user", "content": prompt}])
-            steps_text = self._parse_json(response.content)
-            self.plan = [PlanStep(id=i+1, description=s) for i, s in enumerate(steps_text)]
-            return self.plan
+            response = await async_chat(self.llm, [{"role": "user", "content": self._plan_prompt(goal)}])
+            return self._set_plan(response.content)
         except Exception as e:
             logger.error(f"Planning failed: {e}")
             return [PlanStep(id=1, description=goal)]
 
+    def _plan_prompt(self, goal: str) -> str:
+        return f"""
+        Goal: {goal}
+        Create a execution plan. Return a JSON list of strings.
+        Example: ["Step 1", "Step 2"]
+        """
+
+    def _set_plan(self, content: str) -> List[PlanStep]:
+        steps_text = self._parse_json(content)
+        self.plan = [PlanStep(id=i+1, description=s) for i, s in enumerate(steps_text)]
+        return self.plan
+
     def create_subtasks(self, step_id: int) -> List[PlanStep]:
         """
         Decomposes a step into subtasks (Hierarchical).
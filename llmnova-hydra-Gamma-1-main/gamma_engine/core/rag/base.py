@@ -1,5 +1,11 @@
+import os
+import tempfile
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence
+
+from gamma_engine.core.config import settings
+from gamma_engine.core.rag.fusion import merge_corpus_results
 
 class RAGProvider(ABC):
     """
@@ -29,6 +35,40 @@ class RAGProvider(ABC):
         """
         pass
 
+    def add_texts(
+        self,
+        corpus_name: str,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Ingests in-memory texts into the corpus, one document per text.
+        Returns the identifiers of the stored documents.
+
+        Providers should override this with a batched write; the default
+        falls back to uploading each text through a temporary file.
+        """
+        stored = []
+        for i, text in enumerate(texts):
+            doc_id = ids[i] if ids else f"text-{i}"
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp:
+                temp.write(text)
+                temp_path = temp.name
+            try:
+                if self.upload_document_to_corpus(corpus_name, temp_path, doc_id):
+                    stored.append(doc_id)
+            finally:
+                os.remove(temp_path)
+        return stored
+
+    def delete_corpus(self, corpus_name: str) -> bool:
+        """
+        Deletes the corpus and everything stored in it.
+        Returns True if the corpus is gone; providers without deletion return False.
+        """
+        return False
+
     @abstractmethod
     def query_rag_corpus(self, corpus_name: str, query_text: str, num_results: int = 5) -> List[Dict[str, Any]]:
         """
@@ -36,3 +76,19 @@ class RAGProvider(ABC):
         Returns a list of retrieved passages.
         """
         pass
+
+    def query_many(self, corpus_names: Sequence[str], query_text: str, num_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        Queries several corpora concurrently and returns one merged list,
+        best first, with near-duplicate passages removed. Each passage is
+        tagged with the ``corpus`` it came from.
+
+        The default runs ``query_rag_corpus`` for every corpus on its own
+        thread, so latency is that of the slowest corpus, not the sum.
+        """
+        corpus_names = list(dict.fromkeys(corpus_names))
+        if not corpus_names:
+            return []
+        with ThreadPoolExecutor(max_workers=len(corpus_names), thread_name_prefix="rag-query") as pool:
+            results = list(pool.map(lambda name: self.query_rag_corpus(name, query_text, num_results), corpus_names))
+        return merge_corpus_results(dict(zip(corpus_names, results)), num_results, settings.rag_dedup_threshold)
@@ -0,0 +1,67 @@
+import re
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """
+    Merge ranked id lists with reciprocal-rank fusion, best first.
+
+    Each list contributes ``1 / (k + rank)`` for every id it ranks. Scores are
+    normalized by the best possible total, so 1.0 means "ranked first by every
+    list" and a passage only one of two retrievers found scores at most 0.5.
+    """
+    if not rankings:
+        return []
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    best = len(rankings) / (k + 1)
+    return sorted(((doc_id, score / best) for doc_id, score in scores.items()), key=lambda item: item[1], reverse=True)
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = re.findall(r"\w+", text.lower())
+    return {tuple(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+
+def dedup_passages(results: Sequence[Dict[str, Any]], threshold: float = 0.9) -> List[Dict[str, Any]]:
+    """
+    Drop passages whose ``content`` is near-identical to a better-ranked one:
+    Jaccard similarity of word 3-shingles at or above ``threshold``.
+    """
+    kept: List[Dict[str, Any]] = []
+    kept_shingles: List[Set[Tuple[str, ...]]] = []
+    for result in results:
+        shingles = _shingles(result.get("content") or "")
+        if any(len(shingles & other) >= threshold * len(shingles | other) for other in kept_shingles):
+            continue
+        kept.append(result)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def merge_corpus_results(
+    per_corpus: Dict[str, List[Dict[str, Any]]],
+    num_results: int,
+    dedup_threshold: Optional[float] = 0.9
+) -> List[Dict[str, Any]]:
+    """
+    Merge the results of several corpora, tagging each with its ``corpus``.
+
+    Ordered by ``score`` when every result has one, otherwise by rank within
+    its corpus (round-robin), then near-duplicates are dropped.
+    """
+    tagged = [
+        (result.get("score"), rank, {**result, "corpus": corpus})
+        for corpus, results in per_corpus.items()
+        for rank, result in enumerate(results)
+    ]
+    if all(score is not None for score, _, _ in tagged):
+        tagged.sort(key=lambda item: (-item[0], item[1]))
+    else:
+        tagged.sort(key=lambda item: item[1])
+    merged = [result for _, _, result in tagged]
+    if dedup_threshold is not None:
+        merged = dedup_passages(merged, dedup_threshold)
+    return merged[:num_results]
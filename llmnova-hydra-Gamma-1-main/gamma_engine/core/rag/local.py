@@ -1,6 +1,13 @@
+import hashlib
 import os
+import re
 import shutil
-from typing import List, Dict, Any, Optional
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Set, Tuple
 
 from gamma_engine.core.logger import logger
 from gamma_engine.core.rag.base import RAGProvider
@@ -8,28 +15,115 @@ from gamma_engine.core.rag.base import RAGProvider
 # New Modular Ingestion Components
 from gamma_engine.core.ingestion.loaders import LoaderFactory
 from gamma_engine.core.ingestion.processors import TextProcessor, SemanticProcessor
-from gamma_engine.core.ingestion.embeddings import SentenceTransformerEmbeddings
-from gamma_engine.core.ingestion.vector_store import ChromaVectorStore
+from gamma_engine.core.ingestion.embeddings import SentenceTransformerEmbeddings, ChromaEmbeddingFunction
+from gamma_engine.core.ingestion.embedding_cache import EmbeddingCache
+from gamma_engine.core.ingestion.bulk import BulkIngestor, IngestionStats
+from gamma_engine.core.ingestion.bm25 import BM25Index
+from gamma_engine.core.ingestion.manifest import ChunkRecord, DocumentManifest, DocumentUpdate, file_fingerprint
+from gamma_engine.core.config import settings
+from gamma_engine.core.ingestion.vector_store import ChromaVectorStore, VectorStore
+from gamma_engine.core.ingestion.numpy_store import NumpyVectorStore
+from gamma_engine.core.rag.fusion import dedup_passages, reciprocal_rank_fusion
+from gamma_engine.core.rag.query_cache import QueryEmbeddingCache
+
+
+def corpus_namespace(corpus_name: str) -> str:
+    """
+    Collection name of a corpus: a readable slug plus a hash of the full
+    name, so distinct corpora never collide and the result is a valid Chroma
+    collection and file name (3-63 characters of ``[A-Za-z0-9_-]``).
+    """
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", corpus_name).strip("-_")[:40] or "corpus"
+    return f"{slug}-{hashlib.blake2b(corpus_name.encode('utf-8'), digest_size=4).hexdigest()}"
+
+
+class CorpusNamespace:
+    """
+    The stores of one corpus: dense vectors, keyword index and document manifest.
+
+    ``users`` counts the operations currently holding the namespace (see
+    ``LocalRAGProvider._lease``); it is only closed or dropped at zero.
+    """
+
+    def __init__(self, collection_name: str, vector_store: VectorStore, keyword_index: BM25Index, manifest: DocumentManifest):
+        self.collection_name = collection_name
+        self.vector_store = vector_store
+        self.keyword_index = keyword_index
+        self.manifest = manifest
+        self.users = 0
+
+    def close(self) -> None:
+        self.vector_store.close()
+        self.keyword_index.close()
+
+    def drop(self) -> None:
+        """Delete everything stored for the corpus (cost proportional to the corpus only)."""
+        self.vector_store.drop()
+        self.keyword_index.drop()
+        self.manifest.drop()
+
 
 class LocalRAGProvider(RAGProvider):
     """
     RAG Provider implementation using ChromaDB and Sentence Transformers.
     Refactored to use the new modular Ingestion Pipeline.
+
+    Queries are hybrid: dense and keyword (BM25) candidates are merged with
+    reciprocal-rank fusion. ``vector_backend`` selects the dense store:
+    "chroma" or "numpy" (memory-mapped, no chromadb import, fast cold start).
+
+    Every corpus is its own namespace (collection, keyword index and
+    manifest, named by :func:`corpus_namespace`), so a query only touches the
+    requested corpus and :meth:`delete_corpus` drops one corpus without
+    scanning the others. ``collection_name`` is the default corpus, used when
+    no corpus name is given. At most ``settings.rag_max_open_corpora``
+    namespaces are kept open; the least recently used are closed first.
+
+    Data written before corpora had their own namespaces is in the default
+    corpus, which every corpus used to share. With
+    ``settings.rag_legacy_corpus_fallback``, queries of a corpus that has
+    never been written to (no namespace, or an empty one) search the default
+    corpus instead. Once the corpus holds data, it only searches its own
+    namespace; to keep legacy data for a long-lived corpus, re-ingest it
+    into that corpus.
+
+    Each corpus directory is open at most once: operations lease their
+    namespace, an evicted namespace is closed when its last lease ends (and
+    reused if the corpus is needed again before that), and a namespace being
+    closed or deleted cannot be reopened until that has finished.
     """
-    def __init__(self, persistence_path: str = "./chroma_db", collection_name: str = "gamma_knowledge_base"):
+    def __init__(self, persistence_path: str = "./chroma_db", collection_name: str = "gamma_knowledge_base", vector_backend: str = "chroma"):
         self.persistence_path = persistence_path
         self.collection_name = collection_name
+        self.vector_backend = vector_backend
         self._is_configured = False
+        self._corpora: "OrderedDict[str, CorpusNamespace]" = OrderedDict()
+        # Evicted from the LRU but still leased; closed by the last release
+        self._draining: Dict[str, CorpusNamespace] = {}
+        # Collection names being closed or dropped; leases wait for them
+        self._busy: Set[str] = set()
+        self._corpora_lock = threading.Condition()
+        # Repeated queries skip the embedding model
+        self.query_embeddings = QueryEmbeddingCache(settings.rag_query_embedding_cache_size)
 
         try:
             # Initialize Pipeline Components
-            self.embedder = SentenceTransformerEmbeddings()
+            model_name = "all-MiniLM-L6-v2"
+            cache = None
+            if settings.embedding_cache_path:
+                cache = EmbeddingCache.for_model(settings.embedding_cache_path, model_name, dtype=settings.embedding_cache_dtype)
+            self.embedder = SentenceTransformerEmbeddings(
+                model_name,
+                cache=cache,
+                batch_size=settings.embedding_batch_size,
+                processes=settings.embedding_processes
+            )
             if self.embedder.model:
-                self.vector_store = ChromaVectorStore(
-                    collection_name=collection_name,
-                    embedding_function=self.embedder.model.encode, # Pass raw embedding fn
-                    persist_directory=persistence_path
-                )
+                # The default corpus stays open and is exposed as vector_store/keyword_index/manifest
+                self.default_corpus = self._open_namespace(collection_name)
+                self.vector_store = self.default_corpus.vector_store
+                self.keyword_index = self.default_corpus.keyword_index
+                self.manifest = self.default_corpus.manifest
                 self._is_configured = True
                 logger.info(f"Local RAG Provider (Modular) initialized at {self.persistence_path}")
             else:
@@ -44,63 +138,425 @@ class LocalRAGProvider(RAGProvider):
     def is_configured(self) -> bool:
         return self._is_configured
 
+    def _keyword_index_path(self, collection_name: str) -> str:
+        return os.path.join(self.persistence_path, f"{collection_name}.bm25.sqlite")
+
+    def _open_namespace(self, collection_name: str) -> CorpusNamespace:
+        keyword_index = BM25Index(self._keyword_index_path(collection_name))
+        if self.vector_backend == "numpy":
+            vector_store = NumpyVectorStore(
+                os.path.join(self.persistence_path, collection_name),
+                embedding_function=self.embedder.embed_text,
+                dtype=settings.vector_store_dtype,
+                max_segments=settings.vector_store_max_segments,
+                keyword_index=keyword_index,
+                index=settings.vector_index,
+                nprobe=settings.vector_index_nprobe,
+                nlist=settings.vector_index_nlist,
+                index_train_size=settings.vector_index_train_size,
+                quantization=settings.vector_quantization,
+                pq_subspaces=settings.vector_pq_subspaces,
+                rerank_factor=settings.vector_rerank_factor
+            )
+        else:
+            vector_store = ChromaVectorStore(
+                collection_name=collection_name,
+                embedding_function=ChromaEmbeddingFunction(self.embedder), # Cached embeddings for documents and queries
+                persist_directory=self.persistence_path,
+                batch_size=settings.ingest_upsert_batch_size,
+                keyword_index=keyword_index
+            )
+        self._backfill_keyword_index(collection_name, vector_store, keyword_index)
+        # Document/chunk hashes for incremental re-ingestion
+        manifest = DocumentManifest.for_store(self.persistence_path, collection_name)
+        return CorpusNamespace(collection_name, vector_store, keyword_index, manifest)
+
+    def _backfill_keyword_index(self, collection_name: str, vector_store: VectorStore, keyword_index: BM25Index) -> None:
+        """Index collections that were populated before the keyword index existed."""
+        try:
+            if len(keyword_index) == 0 and vector_store.count() > 0:
+                count = keyword_index.rebuild(vector_store.iter_records())
+                logger.info(f"Keyword index rebuilt from '{collection_name}' ({count} chunks).")
+        except Exception as e:
+            logger.warning(f"Could not rebuild keyword index for '{collection_name}': {e}")
+
+    def _acquire(self, corpus_name: Optional[str], create: bool = True) -> Optional[CorpusNamespace]:
+        if not corpus_name or corpus_name == self.collection_name:
+            return self.default_corpus
+        collection_name = corpus_namespace(corpus_name)
+        evicted: List[CorpusNamespace] = []
+        with self._corpora_lock:
+            while collection_name in self._busy:
+                self._corpora_lock.wait()
+            namespace = self._corpora.get(collection_name) or self._draining.pop(collection_name, None)
+            if namespace is not None:
+                evicted = self._publish(collection_name, namespace)
+            elif not create and not os.path.exists(self._keyword_index_path(collection_name)):
+                # Every namespace has a keyword index file, so it marks existing corpora
+                return None
+            else:
+                # Opened outside the lock (it may rebuild the keyword index); leases of this name wait
+                self._busy.add(collection_name)
+
+        if namespace is None:
+            try:
+                namespace = self._open_namespace(collection_name)
+            finally:
+                with self._corpora_lock:
+                    self._busy.discard(collection_name)
+                    self._corpora_lock.notify_all()
+                    if namespace is not None:
+                        evicted = self._publish(collection_name, namespace)
+        for old in evicted:
+            self._close(old)
+        return namespace
+
+    def _publish(self, collection_name: str, namespace: CorpusNamespace) -> List[CorpusNamespace]:
+        """Lease ``namespace`` as the most recently used corpus (lock held); returns namespaces to close."""
+        self._corpora[collection_name] = namespace
+        self._corpora.move_to_end(collection_name)
+        namespace.users += 1
+        evicted = []
+        while len(self._corpora) > max(1, settings.rag_max_open_corpora):
+            _, old = self._corpora.popitem(last=False)
+            if old.users:
+                self._draining[old.collection_name] = old
+            else:
+                self._busy.add(old.collection_name)
+                evicted.append(old)
+        return evicted
+
+    def _release(self, namespace: CorpusNamespace) -> None:
+        if namespace is self.default_corpus:
+            return
+        with self._corpora_lock:
+            namespace.users -= 1
+            if namespace.users:
+                return
+            self._corpora_lock.notify_all()  # wakes delete_corpus waiting for the last lease
+            if self._draining.get(namespace.collection_name) is not namespace:
+                return
+            del self._draining[namespace.collection_name]
+            self._busy.add(namespace.collection_name)
+        self._close(namespace)
+
+    def _close(self, namespace: CorpusNamespace) -> None:
+        try:
+            namespace.close()
+        except Exception as e:
+            logger.warning(f"Could not close corpus namespace '{namespace.collection_name}': {e}")
+        finally:
+            with self._corpora_lock:
+                self._busy.discard(namespace.collection_name)
+                self._corpora_lock.notify_all()
+
+    @contextmanager
+    def _lease(self, corpus_name: Optional[str], create: bool = True) -> Iterator[Optional[CorpusNamespace]]:
+        """Hold the namespace of ``corpus_name`` open for the duration of an operation."""
+        namespace = self._acquire(corpus_name, create)
+        try:
+            yield namespace
+        finally:
+            if namespace is not None:
+                self._release(namespace)
+
+    def corpus(self, corpus_name: Optional[str], create: bool = True) -> Optional[CorpusNamespace]:
+        """
+        The namespace of ``corpus_name`` (the default corpus if empty or equal
+        to ``collection_name``). With ``create=False``, returns None for a
+        corpus that was never written instead of creating it. The namespace
+        is not leased, so it may be closed once evicted; operations use
+        ``_lease`` instead.
+        """
+        with self._lease(corpus_name, create) as namespace:
+            return namespace
+
+    def _or_legacy(self, namespace: Optional[CorpusNamespace]) -> Optional[CorpusNamespace]:
+        """``namespace``, or the default corpus if it was never written to (see class docstring)."""
+        if settings.rag_legacy_corpus_fallback and (namespace is None or len(namespace.keyword_index) == 0):
+            return self.default_corpus
+        return namespace
+
     def create_or_get_corpus(self, display_name: str) -> Optional[str]:
-        # Chroma handles get_or_create internally
-        return display_name
+        if not self.is_configured:
+            return None
+        try:
+            self.corpus(display_name)
+            return display_name
+        except Exception as e:
+            logger.error(f"Could not open corpus '{display_name}': {e}")
+            return None
+
+    def delete_corpus(self, corpus_name: str) -> bool:
+        if not self.is_configured:
+            return False
+        if not corpus_name or corpus_name == self.collection_name:
+            logger.warning(f"Refusing to delete the default corpus '{self.collection_name}'.")
+            return False
+        collection_name = corpus_namespace(corpus_name)
+        try:
+            with self._corpora_lock:
+                while collection_name in self._busy:
+                    self._corpora_lock.wait()
+                # New leases wait until the drop has finished
+                self._busy.add(collection_name)
+                namespace = self._corpora.pop(collection_name, None) or self._draining.pop(collection_name, None)
+                while namespace is not None and namespace.users:
+                    self._corpora_lock.wait()
+            try:
+                if namespace is None:
+                    if not os.path.exists(self._keyword_index_path(collection_name)):
+                        return True
+                    namespace = self._open_namespace(collection_name)
+                namespace.drop()
+            finally:
+                with self._corpora_lock:
+                    self._busy.discard(collection_name)
+                    self._corpora_lock.notify_all()
+            logger.info(f"Corpus '{corpus_name}' deleted.")
+            return True
+        except Exception as e:
+            logger.error(f"Could not delete corpus '{corpus_name}': {e}")
+            return False
 
     def upload_document_to_corpus(self, corpus_name: str, file_path: str, display_name: str) -> Optional[str]:
         if not self.is_configured:
             return None
 
         try:
-            # 1. Load
-            loader = LoaderFactory.get_loader(file_path)
-            raw_text = loader.load(file_path)
+            with self._lease(corpus_name) as namespace:
+                return self._upload(namespace, file_path, display_name)
+        except Exception as e:
+            logger.error(f"Ingestion pipeline error for '{display_name}': {e}")
+            return None
 
-            # 2. Process / Chunk
-            chunks = TextProcessor.chunk_text(raw_text, chunk_size=500, overlap=50)
+    def _upload(self, namespace: CorpusNamespace, file_path: str, display_name: str) -> str:
+        file_hash = file_fingerprint(file_path)
+        previous = namespace.manifest.get(display_name)
+        if previous is not None and previous.file_hash == file_hash:
+            logger.info(f"Document '{display_name}' is unchanged, skipping ingestion.")
+            return display_name
 
-            # 3. Store
-            ids = [f"{display_name}_{i}" for i in range(len(chunks))]
-            metadatas = [{"source": display_name, "chunk_index": i} for i in range(len(chunks))]
+        # 1. Load (page by page) and 2. Chunk, as streams
+        loader = LoaderFactory.get_loader(file_path)
+        chunks = TextProcessor.iter_chunks(loader.iter_blocks(file_path), chunk_size=500, overlap=50)
 
-            self.vector_store.add_texts(
-                texts=chunks,
-                metadatas=metadatas,
-                ids=ids
-            )
+        # 3. Store new/changed chunks in batches, so only one batch is held at a time
+        update = DocumentUpdate(display_name, file_hash, previous)
+        batch = []
+        for chunk in chunks:
+            record = update.add(chunk)
+            if record is not None:
+                batch.append((chunk.text, record))
+                if len(batch) >= settings.ingest_upsert_batch_size:
+                    self._store_chunks(namespace, batch)
+                    batch = []
+        if batch:
+            self._store_chunks(namespace, batch)
 
-            logger.info(f"Document '{display_name}' ({len(chunks)} chunks) ingested via pipeline.")
-            return display_name
+        # 4. Drop orphaned chunks and record the document
+        update.apply(namespace.vector_store, namespace.manifest)
 
+        logger.info(
+            f"Document '{display_name}' ({len(update.chunks)} chunks, {update.changed} new) ingested via pipeline."
+        )
+        return display_name
+
+    def _store_chunks(self, namespace: CorpusNamespace, batch: List[Tuple[str, ChunkRecord]]) -> None:
+        namespace.vector_store.upsert_texts(
+            texts=[text for text, _ in batch],
+            metadatas=[record.metadata for _, record in batch],
+            ids=[record.id for _, record in batch]
+        )
+
+    def bulk_ingest(self, corpus_name: str, paths: List[str]) -> Optional[IngestionStats]:
+        """
+        High-throughput ingestion of many files and/or directories: pipelined
+        loading, batched (optionally multi-process) embedding, chunked upserts.
+        """
+        if not self.is_configured:
+            return None
+
+        with self._lease(corpus_name) as namespace:
+            return self._bulk_ingest(namespace, corpus_name, paths)
+
+    def _bulk_ingest(self, namespace: CorpusNamespace, corpus_name: str, paths: List[str]) -> Optional[IngestionStats]:
+        ingestor = BulkIngestor(
+            self.embedder,
+            namespace.vector_store,
+            batch_size=settings.ingest_batch_size,
+            upsert_batch_size=settings.ingest_upsert_batch_size,
+            max_in_flight_batches=settings.ingest_max_in_flight_batches,
+            manifest=namespace.manifest
+        )
+        files, roots = [], []
+        for path in paths:
+            if os.path.isdir(path):
+                roots.append(os.path.abspath(path))
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in sorted(names))
+            else:
+                roots.append(os.path.dirname(os.path.abspath(path)))
+                files.append(path)
+        try:
+            # Keys are relative to the given paths, not to whichever files happen to be found
+            stats = ingestor.ingest_files(files, root=os.path.commonpath(roots) if roots else None)
+            logger.info(f"Bulk ingestion into '{corpus_name}': {stats.as_dict()}")
+            return stats
         except Exception as e:
-            logger.error(f"Ingestion pipeline error for '{display_name}': {e}")
+            logger.error(f"Bulk ingestion error for '{corpus_name}': {e}")
             return None
 
+    def add_texts(
+        self,
+        corpus_name: str,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        if not self.is_configured or not texts:
+            return []
+
+        ids = ids or [f"text-{uuid.uuid4().hex}" for _ in texts]
+        metadatas = metadatas or [{"source": corpus_name} for _ in texts]
+        try:
+            with self._lease(corpus_name) as namespace:
+                # One model invocation and one upsert for the whole batch
+                embeddings = self.embedder.embed_text(texts)
+                namespace.vector_store.upsert_texts(
+                    texts=texts,
+                    metadatas=metadatas,
+                    ids=ids,
+                    embeddings=embeddings or None
+                )
+            logger.info(f"{len(texts)} texts ingested into '{corpus_name}'.")
+            return ids
+        except Exception as e:
+            logger.error(f"Batch ingestion error for '{corpus_name}': {e}")
+            return []
+
     def query_rag_corpus(self, corpus_name: str, query_text: str, num_results: int = 5) -> List[Dict[str, Any]]:
         if not self.is_configured:
             return []
 
         try:
-            results = self.vector_store.similarity_search(query_text, k=num_results)
+            with self._lease(corpus_name, create=False) as namespace:
+                namespace = self._or_legacy(namespace)
+                if namespace is None:
+                    return []  # nothing was ever stored in this corpus
+                candidates = max(num_results, settings.rag_hybrid_candidates)
+                embedding = self.query_embeddings.get_or_embed(query_text, self.embedder.embed_text)
+                return self._fuse([(corpus_name, self._search(namespace, query_text, candidates, embedding))], num_results)
 
-            # Reformat Chroma output
-            formatted_results = []
-            if 'documents' in results and results['documents']:
-                docs = results['documents'][0]
-                metas = results['metadatas'][0] if 'metadatas' in results else []
+        except Exception as e:
+            logger.error(f"Query error: {e}")
+            return []
 
-                for i, doc in enumerate(docs):
-                    meta = metas[i] if i < len(metas) else {}
-                    formatted_results.append({
-                        "content": doc,
-                        "source_uri": meta.get('source', 'unknown'),
-                        "display_name": meta.get('source', 'unknown'),
-                        "vector_score": 0.0 # Placeholder
-                    })
+    def query_many(self, corpus_names: Sequence[str], query_text: str, num_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        Hybrid search over several corpora at once. The query is embedded
+        once, each corpus is searched on its own thread, and the candidates of
+        all corpora are fused together: dense candidates ranked by cosine
+        similarity and keyword candidates by BM25 score relative to the best
+        match of their corpus. BM25 depends on each corpus' own term
+        statistics, so raw scores are not comparable across corpora.
+        """
+        if not self.is_configured:
+            return []
 
-            return formatted_results
+        try:
+            with ExitStack() as leases:
+                namespaces = []
+                for name in dict.fromkeys(corpus_names):
+                    namespace = self._or_legacy(leases.enter_context(self._lease(name, create=False)))
+                    # Several corpora may fall back to the default corpus; search it once
+                    if namespace is not None and all(namespace is not other for _, other in namespaces):
+                        namespaces.append((name, namespace))
+                if not namespaces:
+                    return []
+                candidates = max(num_results, settings.rag_hybrid_candidates)
+                embedding = self.query_embeddings.get_or_embed(query_text, self.embedder.embed_text)
+                with ThreadPoolExecutor(max_workers=len(namespaces), thread_name_prefix="rag-query") as pool:
+                    hits = list(pool.map(
+                        lambda item: self._search(item[1], query_text, candidates, embedding),
+                        namespaces
+                    ))
+            fused = self._fuse(
+                [(name, corpus_hits) for (name, _), corpus_hits in zip(namespaces, hits)],
+                num_results=candidates
+            )
+            return dedup_passages(fused, settings.rag_dedup_threshold)[:num_results]
 
         except Exception as e:
             logger.error(f"Query error: {e}")
             return []
+
+    def _search(
+        self,
+        namespace: CorpusNamespace,
+        query_text: str,
+        candidates: int,
+        query_embedding: List[float]
+    ) -> "_CorpusHits":
+        """Dense and keyword candidates of one corpus, with the text of each."""
+        vector_store = namespace.vector_store
+        hits = _CorpusHits()
+
+        # Dense candidates (Chroma returns one result list per query)
+        results = vector_store.similarity_search(query_text, k=candidates, query_embedding=query_embedding)
+        if results and results.get('ids'):
+            distances = results.get('distances') or [[]]
+            for i, (id_, doc, meta) in enumerate(zip(results['ids'][0], results['documents'][0], results['metadatas'][0])):
+                hits.dense.append((id_, vector_store.similarity(distances[0][i]) if i < len(distances[0]) else None))
+                hits.records[id_] = (doc, meta or {})
+
+        # Keyword candidates; fetch the text of those dense search did not return
+        hits.keyword = namespace.keyword_index.search(query_text, k=candidates)
+        missing = [id_ for id_, _ in hits.keyword if id_ not in hits.records]
+        if missing:
+            hits.records.update(vector_store.get_records(missing))
+        return hits
+
+    def _fuse(self, per_corpus: List[Tuple[str, "_CorpusHits"]], num_results: int) -> List[Dict[str, Any]]:
+        """Reciprocal-rank fusion of the dense and keyword candidates of one or more corpora."""
+        dense = [(score, (corpus, id_)) for corpus, hits in per_corpus for id_, score in hits.dense]
+        keyword = [(score, (corpus, id_)) for corpus, hits in per_corpus for id_, score in hits.keyword]
+        vector_scores = {key: score for score, key in dense}
+        bm25_scores = {key: score for score, key in keyword}
+        if len(per_corpus) > 1:
+            # Merge the corpora's lists by score (stable, so each corpus keeps its own order);
+            # BM25 is scaled by the corpus' top score, since raw BM25 is per-corpus
+            top_bm25 = {corpus: max((score for _, score in hits.keyword), default=0.0) for corpus, hits in per_corpus}
+            dense.sort(key=lambda item: -(item[0] if item[0] is not None else float("-inf")))
+            keyword.sort(key=lambda item: -(item[0] / top_bm25[item[1][0]] if top_bm25[item[1][0]] > 0 else 0.0))
+        records = {(corpus, id_): record for corpus, hits in per_corpus for id_, record in hits.records.items()}
+
+        fused = reciprocal_rank_fusion([[key for _, key in dense], [key for _, key in keyword]], k=settings.rag_rrf_k)
+        formatted_results = []
+        for key, score in fused:
+            if key not in records:
+                continue  # deleted since it was indexed
+            doc, meta = records[key]
+            formatted_results.append({
+                "id": key[1],
+                "corpus": key[0],
+                "content": doc,
+                "source_uri": meta.get('source', 'unknown'),
+                "display_name": meta.get('source', 'unknown'),
+                "score": score,
+                "vector_score": vector_scores.get(key),
+                "bm25_score": bm25_scores.get(key)
+            })
+            if len(formatted_results) == num_results:
+                break
+
+        return formatted_results
+
+
+class _CorpusHits:
+    """Candidates of one corpus: dense ``(id, similarity)``, keyword ``(id, bm25)`` and id -> (text, metadata)."""
+
+    def __init__(self):
+        self.dense: List[Tuple[str, Optional[float]]] = []
+        self.keyword: List[Tuple[str, float]] = []
+        self.records: Dict[str, Tuple[str, Dict[str, Any]]] = {}
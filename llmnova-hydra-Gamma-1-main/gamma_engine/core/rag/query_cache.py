@@ -0,0 +1,145 @@
+"""
+Query-side caches for RAG retrieval.
+
+- QueryLRU: bounded, thread-safe LRU with TTL, counting hits and misses
+- QueryEmbeddingCache: query text -> query vector, so a repeated query skips
+  the embedding model
+- RAGResultCache: (corpora, query, k) -> retrieved passages, invalidated per
+  corpus by a generation counter that every write to the corpus bumps
+
+Queries are keyed with whitespace runs collapsed, so trivially different
+spellings of the same query share an entry. Hits, misses and the running
+hit rate are exported through ``MetricsCollector`` as
+``rag.query_cache.{hits,misses,hit_rate}``, labelled by cache name.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from gamma_engine.core.metrics import get_metrics_collector
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+class QueryLRU:
+    """
+    LRU of at most ``max_entries`` values, each expiring ``ttl_seconds`` after
+    it was stored (0 disables expiry). ``max_entries`` 0 disables the cache.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl_seconds: float = 0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = get_metrics_collector()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            hit_rate = self.hit_rate
+        labels = {"cache": self.name}
+        self.metrics.increment("rag.query_cache.hits" if entry is not None else "rag.query_cache.misses", labels=labels)
+        self.metrics.set_gauge("rag.query_cache.hit_rate", hit_rate, labels=labels)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hit_rate, 4)
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QueryEmbeddingCache(QueryLRU):
+    """Query vectors of one embedding model (they never go stale)."""
+
+    def __init__(self, max_entries: int = 1024):
+        super().__init__("embeddings", max_entries=max_entries)
+
+    def get_or_embed(self, query: str, embed) -> List[float]:
+        """The cached vector of ``query``, or ``embed([query])[0]`` stored for next time."""
+        key = normalize_query(query)
+        vector = self.get(key)
+        if vector is None:
+            vector = embed([query])[0]
+            self.set(key, vector)
+        return vector
+
+
+class RAGResultCache(QueryLRU):
+    """
+    Retrieved passages per (corpora, query, k).
+
+    The key includes each corpus' generation, so :meth:`invalidate` makes
+    every cached result that involves the corpus unreachable at once; the
+    stale entries then age out of the LRU. Read the key *before* querying
+    and store under it afterwards: a write that lands in between bumps the
+    generation, so the possibly stale result is stored under a dead key.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        super().__init__("results", max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._generations: Dict[str, int] = {}
+
+    def invalidate(self, corpus_name: str) -> None:
+        with self._lock:
+            self._generations[corpus_name] = self._generations.get(corpus_name, 0) + 1
+
+    def generation(self, corpus_name: str) -> int:
+        with self._lock:
+            return self._generations.get(corpus_name, 0)
+
+    def key(self, corpus_names: Sequence[str], query: str, num_results: int) -> Hashable:
+        with self._lock:
+            corpora = tuple((name, self._generations.get(name, 0)) for name in corpus_names)
+        return corpora, normalize_query(query), num_results
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        results = super().get(key)
+        # Copies, so callers cannot mutate the cached passages
+        return [dict(result) for result in results] if results is not None else None
+
+    def set(self, key: Hashable, results: List[Dict[str, Any]]) -> None:
+        super().set(key, [dict(result) for result in results])
@@ -83,6 +83,31 @@ class VertexRAGProvider(RAGProvider):
             logger.error(f"Error uploading document '{display_name}' to Vertex RAG corpus '{corpus_name}': {e}")
             return None
 
+    def add_texts(
+        self,
+        corpus_name: str,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        if not self.is_configured:
+            logger.error("Vertex RAG Provider not configured.")
+            return []
+
+        stored = []
+        for i, text in enumerate(texts):
+            display_name = ids[i] if ids else f"text-{i}"
+            try:
+                # Inline content: no temporary file or text extraction round trip
+                rag_file = aiplatform.gapic.RagFile(display_name=display_name, inline_content=text)
+                create_request = aiplatform.gapic.CreateRagFileRequest(parent=corpus_name, rag_file=rag_file)
+                response = self.rag_client.create_rag_file(request=create_request).result()
+                stored.append(response.name)
+            except GoogleAPIError as e:
+                logger.error(f"Error adding text '{display_name}' to Vertex RAG corpus '{corpus_name}': {e}")
+        logger.info(f"{len(stored)} texts added to Vertex RAG corpus '{corpus_name}'.")
+        return stored
+
     def query_rag_corpus(self, corpus_name: str, query_text: str, num_results: int = 5) -> List[Dict[str, Any]]:
         if not self.is_configured:
             logger.error("Vertex RAG Provider not configured.")
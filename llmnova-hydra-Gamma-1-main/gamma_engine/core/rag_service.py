@@ -1,22 +1,233 @@
+import inspect
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from gamma_engine.core.logger import logger
 from gamma_engine.core.rag.vertex import VertexRAGProvider
 from gamma_engine.core.rag.local import LocalRAGProvider
 from gamma_engine.core.rag.base import RAGProvider
+from gamma_engine.core.rag.query_cache import RAGResultCache
 
 # Backward compatibility alias
 RAGService = VertexRAGProvider
 
 from gamma_engine.core.config import settings
 
-def get_rag_provider(provider_type: str = "vertex", **kwargs) -> RAGProvider:
-    """Factory function to get the appropriate RAG provider."""
+def _provider_config(provider_type: str, kwargs: Dict[str, Any]) -> Tuple[type, Dict[str, Any]]:
+    """Resolve the provider class and its full constructor arguments (defaults applied)."""
     if provider_type.lower() == "local":
-        return LocalRAGProvider(**kwargs)
+        cls = LocalRAGProvider
+    elif provider_type.lower() == "numpy":
+        cls = LocalRAGProvider
+        kwargs = {"vector_backend": "numpy", **kwargs}
     else:
         # Default to Vertex for backward compatibility
         # Inject settings if not provided in kwargs
-        if 'project_id' not in kwargs:
-            kwargs['project_id'] = settings.google_cloud_project
-        if 'location' not in kwargs:
-            kwargs['location'] = settings.google_cloud_location
+        cls = VertexRAGProvider
+        kwargs = {"project_id": settings.google_cloud_project, "location": settings.google_cloud_location, **kwargs}
+    bound = inspect.signature(cls).bind(**kwargs)
+    bound.apply_defaults()
+    return cls, dict(bound.arguments)
+
+def get_rag_provider(provider_type: str = "vertex", **kwargs) -> RAGProvider:
+    """Factory function to get the appropriate RAG provider."""
+    cls, config = _provider_config(provider_type, kwargs)
+    return cls(**config)
+
+
+class SharedRAGProvider(RAGProvider):
+    """
+    Process-wide handle to one RAG provider instance.
+
+    The wrapped provider (embedding model, vector store client) is built on
+    first use or by :meth:`warm` in a background thread; concurrent callers
+    wait for the same load instead of building their own. ``is_ready`` tells
+    whether loading has finished without blocking.
+
+    Query results are cached per (corpora, query, k) in ``result_cache``;
+    every write made through this handle invalidates the written corpus.
+    Aliases of the default corpus (an empty name and the provider's
+    ``collection_name``) share one cache name, see :meth:`_cache_name`.
+    Writes made by other processes are only picked up once entries expire
+    (``Settings.rag_query_cache_ttl_seconds``).
+    """
+
+    def __init__(self, factory: Callable[[], RAGProvider], name: str, result_cache: Optional[RAGResultCache] = None):
+        self._factory = factory
+        self.name = name
+        self.result_cache = result_cache or RAGResultCache(
+            max_entries=settings.rag_query_cache_max_entries,
+            ttl_seconds=settings.rag_query_cache_ttl_seconds
+        )
+        self._provider: Optional[RAGProvider] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._warm_lock = threading.Lock()
+        self._warm_thread: Optional[threading.Thread] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def get(self) -> Optional[RAGProvider]:
+        """The underlying provider, loading it if needed (None if it failed to build)."""
+        if self._ready.is_set():
+            return self._provider
+        with self._lock:
+            if not self._ready.is_set():
+                try:
+                    self._provider = self._factory()
+                except Exception as e:
+                    logger.error(f"Failed to initialize RAG provider {self.name}: {e}")
+                    self._provider = None
+                self._ready.set()
+                if not self.is_configured:
+                    logger.warning(f"RAG provider {self.name} is not configured. RAG tools will be disabled.")
+        return self._provider
+
+    def warm(self) -> threading.Thread:
+        """Start loading in a background thread (idempotent)."""
+        with self._warm_lock:
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self.get, name=f"rag-warm-{self.name}", daemon=True)
+                self._warm_thread.start()
+            return self._warm_thread
+
+    @property
+    def is_configured(self) -> bool:
+        provider = self.get()
+        return provider is not None and provider.is_configured
+
+    def create_or_get_corpus(self, display_name: str) -> Optional[str]:
+        provider = self.get()
+        return provider.create_or_get_corpus(display_name) if provider else None
+
+    def upload_document_to_corpus(self, corpus_name: str, file_path: str, display_name: str) -> Optional[str]:
+        provider = self.get()
+        if not provider:
+            return None
+        try:
+            return provider.upload_document_to_corpus(corpus_name, file_path, display_name)
+        finally:
+            self.result_cache.invalidate(self._cache_name(provider, corpus_name))
+
+    def add_texts(
+        self,
+        corpus_name: str,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        provider = self.get()
+        if not provider:
+            return []
+        try:
+            return provider.add_texts(corpus_name, texts, metadatas=metadatas, ids=ids)
+        finally:
+            self.result_cache.invalidate(self._cache_name(provider, corpus_name))
+
+    def bulk_ingest(self, corpus_name: str, paths: List[str]) -> Any:
+        provider = self.get()
+        if not provider:
+            return None
+        try:
+            return provider.bulk_ingest(corpus_name, paths)
+        finally:
+            self.result_cache.invalidate(self._cache_name(provider, corpus_name))
+
+    def query_rag_corpus(self, corpus_name: str, query_text: str, num_results: int = 5) -> List[Dict[str, Any]]:
+        provider = self.get()
+        if not provider:
+            return []
+        return self._cached(provider, [corpus_name], query_text, num_results, lambda: provider.query_rag_corpus(corpus_name, query_text, num_results))
+
+    def query_many(self, corpus_names: Sequence[str], query_text: str, num_results: int = 5) -> List[Dict[str, Any]]:
+        provider = self.get()
+        if not provider:
+            return []
+        corpus_names = list(corpus_names)
+        return self._cached(provider, corpus_names, query_text, num_results, lambda: provider.query_many(corpus_names, query_text, num_results))
+
+    @staticmethod
+    def _cache_name(provider: RAGProvider, corpus_name: Optional[str]) -> str:
+        """Name of a corpus in the result cache; an empty name is the provider's default corpus."""
+        default = getattr(provider, "collection_name", None)
+        return corpus_name or (default if isinstance(default, str) else "")
+
+    def _cached(
+        self,
+        provider: RAGProvider,
+        corpus_names: List[str],
+        query_text: str,
+        num_results: int,
+        query: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        # The key (with generations) is taken before querying; see RAGResultCache
+        names = [self._cache_name(provider, name) for name in corpus_names]
+        key = self.result_cache.key(names, query_text, num_results)
+        results = self.result_cache.get(key)
+        if results is None:
+            results = query()
+            if results:  # empty results are cheap to recompute and may be a transient failure
+                self.result_cache.set(key, results)
+        return results
+
+    def delete_corpus(self, corpus_name: str) -> bool:
+        provider = self.get()
+        if not provider:
+            return False
+        try:
+            return provider.delete_corpus(corpus_name)
+        finally:
+            self.result_cache.invalidate(self._cache_name(provider, corpus_name))
+
+    def __getattr__(self, name: str) -> Any:
+        # Provider-specific extensions (e.g. vector_store on LocalRAGProvider)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+_shared_providers: Dict[Tuple, SharedRAGProvider] = {}
+_shared_providers_lock = threading.Lock()
+
+def _registry_key(provider_type: str, config: Dict[str, Any]) -> Tuple:
+    normalized = {
+        k: os.path.abspath(v) if k == "persistence_path" and isinstance(v, str) else v
+        for k, v in config.items()
+    }
+    return (provider_type.lower(), tuple(sorted(normalized.items())))
+
+def get_shared_rag_provider(provider_type: Optional[str] = None, **kwargs) -> SharedRAGProvider:
+    """
+    Return the process-wide provider for this configuration (default:
+    ``Settings.rag_provider``). Equivalent configurations share one instance,
+    so the embedding model and vector store client are loaded only once.
+    """
+    provider_type = (provider_type or settings.rag_provider).lower()
+    cls, config = _provider_config(provider_type, kwargs)
+    key = _registry_key(provider_type, config)
+    with _shared_providers_lock:
+        shared = _shared_providers.get(key)
+        if shared is None:
+            shared = SharedRAGProvider(lambda: cls(**config), name=f"{provider_type}:{cls.__name__}")
+            _shared_providers[key] = shared
+        return shared
 
-        return VertexRAGProvider(**kwargs)
+def rag_providers_status() -> List[Dict[str, Any]]:
+    """Readiness of every shared provider, for status endpoints."""
+    with _shared_providers_lock:
+        shared = list(_shared_providers.values())
+    return [
+        {
+            "name": p.name,
+            "ready": p.is_ready,
+            "configured": p.is_ready and p.is_configured,
+            "query_cache": p.result_cache.stats()
+        }
+        for p in shared
+    ]
@@ -0,0 +1,342 @@
+"""
+Adaptive client-side rate limiting for LLM providers.
+
+Each (provider, model) pair gets one LLMGovernor that combines:
+- Token buckets for requests/minute and estimated tokens/minute
+- A concurrency cap on in-flight requests
+- AIMD adaptation: limits are halved on 429 / overload responses (honouring
+  ``retry-after``) and recover additively on success
+- Jittered exponential retries of throttled calls via tenacity
+- Priority admission: interactive calls are admitted ahead of background
+  work such as memory summarization and scheduled jobs
+
+Priority is carried in a context variable, so it follows the call through
+asyncio tasks and ``asyncio.to_thread``:
+
+    >>> with llm_priority(Priority.BACKGROUND):
+    ...     llm.chat(history)
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from .metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Admission priority of an LLM call (lower value is admitted first)."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "llm_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextlib.contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Run the enclosed LLM calls with the given admission priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for provider throttling responses (HTTP 429, Anthropic 529 overload)."""
+    status = getattr(error, "status_code", None)
+    if status in (429, 529):
+        return True
+    return "RateLimit" in type(error).__name__
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Extract the server-requested back-off from a throttling error, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe on its own (guarded by the governor)."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float, scale: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second * scale)
+
+    def wait_time(self, amount: float, scale: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if available now)."""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / max(self.rate_per_second * scale, 1e-9)
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMGovernor:
+    """
+    Rate limiter and concurrency governor for one provider/model.
+
+    Args:
+        name: Label used for metrics, e.g. "openai:gpt-4o".
+        requests_per_minute: Steady-state request budget.
+        tokens_per_minute: Steady-state estimated-token budget.
+        max_concurrency: Upper bound on simultaneous in-flight requests.
+        burst_seconds: Bucket capacity expressed in seconds of budget.
+        max_retries: Attempts for a throttled call before giving up.
+        min_scale: Floor for the AIMD scale factor applied to all limits.
+        recovery_step: Additive scale increase after each successful call.
+    """
+
+    _POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 150_000,
+        max_concurrency: int = 32,
+        burst_seconds: float = 10.0,
+        max_retries: int = 5,
+        min_scale: float = 0.05,
+        recovery_step: float = 0.05
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.min_scale = min_scale
+        self.recovery_step = recovery_step
+
+        self._requests = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute / 60.0 * burst_seconds))
+        self._tokens = TokenBucket(tokens_per_minute / 60.0, max(1.0, tokens_per_minute / 60.0 * burst_seconds))
+        self._scale = 1.0
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._waiting: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self.metrics = get_metrics_collector()
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(1, int(self.max_concurrency * self._scale))
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def _try_acquire(self, priority: Priority, tokens: float) -> float:
+        """Admit the caller (returns 0) or return how long it should wait. Lock must be held."""
+        now = time.monotonic()
+        self._requests.refill(now, self._scale)
+        self._tokens.refill(now, self._scale)
+
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        # Higher-priority callers waiting get the next free slot
+        if any(self._waiting[p] for p in Priority if p < priority):
+            return self._POLL_INTERVAL
+        if self._in_flight >= self.concurrency_limit:
+            return self._POLL_INTERVAL
+
+        wait = max(self._requests.wait_time(1, self._scale), self._tokens.wait_time(tokens, self._scale))
+        if wait > 0:
+            return wait
+
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        self._in_flight += 1
+        self.metrics.set_gauge("llm.governor.in_flight", self._in_flight, labels={"model": self.name})
+        return 0.0
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.metrics.set_gauge("llm.governor.in_flight", self._in_flight, labels={"model": self.name})
+            self._released.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, tokens: float = 1.0) -> Iterator[None]:
+        """Block until admitted, then hold one concurrency slot."""
+        priority = current_priority()
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    wait = self._try_acquire(priority, tokens)
+                    if wait == 0:
+                        break
+                    self._released.wait(timeout=min(wait, 1.0))
+            finally:
+                self._waiting[priority] -= 1
+        self._record_queue_time(priority, start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextlib.asynccontextmanager
+    async def aslot(self, tokens: float = 1.0):
+        """Async variant of :meth:`slot` that never blocks the event loop."""
+        priority = current_priority()
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_acquire(priority, tokens)
+                if wait == 0:
+                    break
+                await asyncio.sleep(min(wait, self._POLL_INTERVAL))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+        self._record_queue_time(priority, start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _record_queue_time(self, priority: Priority, start: float) -> None:
+        self.metrics.record(
+            "llm.governor.queue_ms",
+            (time.perf_counter() - start) * 1000,
+            labels={"model": self.name, "priority": priority.name.lower()}
+        )
+
+    # ------------------------------------------------------------------
+    # AIMD feedback
+    # ------------------------------------------------------------------
+    def on_success(self) -> None:
+        with self._lock:
+            self._scale = min(1.0, self._scale + self.recovery_step)
+        self.metrics.set_gauge("llm.governor.rate_scale", self._scale, labels={"model": self.name})
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self._scale = max(self.min_scale, self._scale / 2)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        self.metrics.increment("llm.governor.throttled", labels={"model": self.name})
+        self.metrics.set_gauge("llm.governor.rate_scale", self._scale, labels={"model": self.name})
+        logger.warning(f"LLM governor '{self.name}' throttled; scaling limits to {self._scale:.2f}")
+
+    # ------------------------------------------------------------------
+    # Governed calls
+    # ------------------------------------------------------------------
+    def _wait_strategy(self) -> Callable[[Any], float]:
+        jitter = wait_random_exponential(multiplier=0.5, max=30)
+
+        def wait(retry_state: Any) -> float:
+            error = retry_state.outcome.exception() if retry_state.outcome else None
+            return max(retry_after_seconds(error) or 0.0, jitter(retry_state))
+        return wait
+
+    def observe_error(self, error: BaseException) -> bool:
+        """Feed a failed call back into AIMD; returns True if it was a throttle."""
+        if is_rate_limit_error(error):
+            self.on_throttle(retry_after_seconds(error))
+            return True
+        return False
+
+    def call(self, fn: Callable[[], T], tokens: float = 1.0) -> T:
+        """Run ``fn`` under the governor, retrying throttled attempts with jitter."""
+        for attempt in Retrying(
+            retry=retry_if_exception(self.observe_error),
+            wait=self._wait_strategy(),
+            stop=stop_after_attempt(self.max_retries),
+            reraise=True
+        ):
+            with attempt:
+                with self.slot(tokens):
+                    result = fn()
+                self.on_success()
+                return result
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], tokens: float = 1.0) -> T:
+        """Async variant of :meth:`call`."""
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception(self.observe_error),
+            wait=self._wait_strategy(),
+            stop=stop_after_attempt(self.max_retries),
+            reraise=True
+        ):
+            with attempt:
+                async with self.aslot(tokens):
+                    result = await fn()
+                self.on_success()
+                return result
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+
+_governors: Dict[Tuple[str, str], LLMGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(provider: str, model: str, **kwargs: Any) -> LLMGovernor:
+    """
+    Return the process-wide governor for (provider, model), creating it on first use.
+
+    Keyword arguments are only applied when the governor is first created.
+    """
+    key = (provider, model)
+    with _governors_lock:
+        governor = _governors.get(key)
+        if governor is None:
+            governor = LLMGovernor(name=f"{provider}:{model}", **kwargs)
+            _governors[key] = governor
+        return governor
+
+
+def estimate_tokens(messages: Any) -> int:
+    """Cheap token estimate (~4 characters per token) used for bucket admission."""
+    total = 0
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            total += len(content)
+        elif isinstance(content, list):
+            total += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    return total // 4 + 1
@@ -0,0 +1,242 @@
+"""
+Deterministic record/replay LLM provider.
+
+ReplayLLMProvider lets the agent loop run without network access or model
+cost, so the engine's own overhead can be measured and regression-tested:
+- record mode forwards each call to a real provider and appends the
+  request/response pair (plus observed latency) to a JSON cassette
+- replay mode serves responses from the cassette, matched by a hash of the
+  request, with a configurable simulated latency
+
+Example:
+    >>> recorder = ReplayLLMProvider("agent.json", mode="record", upstream=LLMProvider("gpt-4o"))
+    >>> ... run the agent once, then:
+    >>> replay = ReplayLLMProvider("agent.json", latency=lognormal_latency(median=0.8, sigma=0.4))
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from openai.types.chat import ChatCompletionMessageToolCall
+
+from ..interfaces.llm_provider import LLMProviderInterface, Message, async_chat
+from .llm_cache import CACHE_KEY_PREFIX, HistoryHasher
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+LatencyFn = Callable[[Dict[str, Any]], float]
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when no recorded interaction matches a request."""
+
+
+def no_latency() -> LatencyFn:
+    return lambda interaction: 0.0
+
+
+def fixed_latency(seconds: float) -> LatencyFn:
+    return lambda interaction: seconds
+
+
+def uniform_latency(low: float, high: float, seed: int = 0) -> LatencyFn:
+    rng = random.Random(seed)
+    return lambda interaction: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5, seed: int = 0) -> LatencyFn:
+    """Long-tailed latency typical of hosted models; ``median`` in seconds."""
+    rng = random.Random(seed)
+    mu = math.log(median)
+    return lambda interaction: rng.lognormvariate(mu, sigma)
+
+
+def recorded_latency(scale: float = 1.0) -> LatencyFn:
+    """Replay the latency observed while recording, optionally scaled."""
+    return lambda interaction: interaction.get("latency", 0.0) * scale
+
+
+class ReplayLLMProvider(LLMProviderInterface):
+    """
+    LLM provider that records real exchanges to a cassette and replays them.
+
+    Args:
+        cassette_path: JSON cassette file. Optional when ``interactions`` are given.
+        mode: "record" (call ``upstream`` and append to the cassette) or "replay".
+        upstream: Real provider used in record mode.
+        latency: Simulated latency per replayed call (see the ``*_latency`` helpers).
+        match: "hash" (exact request hash, raise CassetteMiss otherwise),
+            "hash_then_sequence" (fall back to the next unused interaction) or
+            "sequence" (ignore the request and replay in recorded order).
+        interactions: In-memory interactions, e.g. from :meth:`from_messages`.
+    """
+
+    def __init__(
+        self,
+        cassette_path: Optional[str] = None,
+        mode: str = "replay",
+        upstream: Optional[Any] = None,
+        latency: Optional[LatencyFn] = None,
+        match: str = "hash_then_sequence",
+        interactions: Optional[List[Dict[str, Any]]] = None
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown mode '{mode}'. Use 'record' or 'replay'.")
+        if mode == "record" and upstream is None:
+            raise ValueError("Record mode requires an upstream provider.")
+        if match not in ("hash", "hash_then_sequence", "sequence"):
+            raise ValueError(f"Unknown match strategy '{match}'.")
+
+        self.cassette_path = cassette_path
+        self.mode = mode
+        self.upstream = upstream
+        self.latency = latency or no_latency()
+        self.match = match
+        self.model = getattr(upstream, "model", "replay")
+        self._hasher = HistoryHasher()
+        self._lock = threading.Lock()
+
+        if interactions is not None:
+            self.interactions = list(interactions)
+        elif cassette_path and os.path.exists(cassette_path):
+            self.interactions = self._load(cassette_path)
+        else:
+            self.interactions = []
+        self.rewind()
+
+    @classmethod
+    def from_messages(cls, messages: List[Message], **kwargs: Any) -> "ReplayLLMProvider":
+        """Build a sequence-matched provider from a scripted list of responses."""
+        interactions = [{"key": None, "response": m.model_dump(mode="json"), "latency": 0.0} for m in messages]
+        kwargs.setdefault("match", "sequence")
+        return cls(interactions=interactions, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Cassette handling
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _load(path: str) -> List[Dict[str, Any]]:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version in {path}: {data.get('version')}")
+        return data.get("interactions", [])
+
+    def save(self) -> None:
+        """Write all interactions to ``cassette_path``."""
+        if not self.cassette_path:
+            return
+        directory = os.path.dirname(self.cassette_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cassette_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions}, f, indent=2, ensure_ascii=False)
+
+    def rewind(self) -> None:
+        """Make every recorded interaction available again (e.g. between benchmark runs)."""
+        with self._lock:
+            self._by_key: Dict[Optional[str], Deque[int]] = defaultdict(deque)
+            for index, interaction in enumerate(self.interactions):
+                self._by_key[interaction.get("key")].append(index)
+            self._used = [False] * len(self.interactions)
+            self._cursor = 0
+            # Replay statistics; benchmarks use them to separate model time from engine overhead
+            self.calls = 0
+            self.simulated_seconds = 0.0
+
+    def request_key(self, history: List[Dict[str, Any]], tools: Optional[List[Any]] = None, **kwargs: Any) -> str:
+        """Stable hash of a request, independent of the model serving it."""
+        key = self._hasher.key("", history, tools, kwargs.get("tool_choice"), kwargs.get("temperature", 0.0))
+        return key[len(CACHE_KEY_PREFIX):]
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+    def _next_interaction(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            index: Optional[int] = None
+            if self.match != "sequence":
+                candidates = self._by_key.get(key)
+                while candidates:
+                    candidate = candidates.popleft()
+                    if not self._used[candidate]:
+                        index = candidate
+                        break
+            if index is None and self.match != "hash":
+                while self._cursor < len(self._used) and self._used[self._cursor]:
+                    self._cursor += 1
+                if self._cursor < len(self._used):
+                    index = self._cursor
+            if index is None:
+                raise CassetteMiss(f"No recorded interaction for request {key[:12]}")
+            self._used[index] = True
+            self.calls += 1
+            return self.interactions[index]
+
+    def _delay(self, interaction: Dict[str, Any]) -> float:
+        delay = max(0.0, self.latency(interaction))
+        with self._lock:
+            self.simulated_seconds += delay
+        return delay
+
+    @staticmethod
+    def _to_message(data: Dict[str, Any]) -> Message:
+        message = Message(**data)
+        if message.tool_calls:
+            # Restore the attribute-style tool calls the agent loop expects
+            message.tool_calls = [
+                ChatCompletionMessageToolCall.model_validate({"type": "function", **call})
+                if isinstance(call, dict) and "function" in call else call
+                for call in message.tool_calls
+            ]
+        return message
+
+    def _record(self, key: str, history: List[Dict[str, Any]], tools: Optional[List[Any]], kwargs: Dict[str, Any], response: Message, latency: float) -> None:
+        interaction = {
+            "key": key,
+            "request": json.loads(json.dumps({"history": history, "tools": tools, "kwargs": kwargs}, default=str)),
+            "response": response.model_dump(mode="json"),
+            "latency": latency
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+            self._used.append(True)
+            self.save()
+
+    def chat(self, history: List[Dict[str, Any]], tools: Optional[List[Any]] = None, **kwargs: Any) -> Message:
+        key = self.request_key(history, tools, **kwargs)
+        if self.mode == "record":
+            start = time.perf_counter()
+            response = self.upstream.chat(history, tools=tools, **kwargs)
+            self._record(key, history, tools, kwargs, response, time.perf_counter() - start)
+            return response
+
+        interaction = self._next_interaction(key)
+        delay = self._delay(interaction)
+        if delay > 0:
+            time.sleep(delay)
+        return self._to_message(interaction["response"])
+
+    async def achat(self, history: List[Dict[str, Any]], tools: Optional[List[Any]] = None, **kwargs: Any) -> Message:
+        key = self.request_key(history, tools, **kwargs)
+        if self.mode == "record":
+            start = time.perf_counter()
+            response = await async_chat(self.upstream, history, tools=tools, **kwargs)
+            self._record(key, history, tools, kwargs, response, time.perf_counter() - start)
+            return response
+
+        interaction = self._next_interaction(key)
+        delay = self._delay(interaction)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._to_message(interaction["response"])
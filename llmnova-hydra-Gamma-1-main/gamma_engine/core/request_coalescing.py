@@ -0,0 +1,226 @@
+"""
+Request coalescing ("single-flight") for duplicate LLM calls.
+
+When several callers issue an identical request at the same moment only the
+first one (the leader) performs the upstream call; the others wait for and
+share its result. This module provides:
+- SingleFlight: in-process coalescing shared by threads and asyncio tasks
+- RedisFlightLock: optional Redis-backed lock so that, across workers, only
+  one process calls the model while the rest wait for the shared cache
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _FlightAbandoned(Exception):
+    """Raised to followers when the leader was cancelled before finishing."""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share the same key.
+
+    In-flight calls are tracked as ``concurrent.futures.Future`` objects, so a
+    synchronous caller in a worker thread and an asyncio task on any event
+    loop can join the same flight. If the leader is cancelled, waiting
+    followers retry and one of them becomes the new leader.
+
+    Example:
+        >>> flight = SingleFlight()
+        >>> flight.do(key, lambda: llm.chat(history))
+        >>> await flight.ado(key, lambda: llm.achat(history))
+    """
+
+    def __init__(self, name: str = "llm"):
+        self.name = name
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.metrics = get_metrics_collector()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run ``fn`` once for all concurrent synchronous callers of ``key``."""
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                try:
+                    result = fn()
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result=result)
+                return result
+            try:
+                return future.result()
+            except _FlightAbandoned:
+                continue
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()`` once for all concurrent callers of ``key``."""
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                try:
+                    result = await fn()
+                except asyncio.CancelledError:
+                    self._finish(key, future, cancelled=True)
+                    raise
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result=result)
+                return result
+            try:
+                # Shield so a cancelled follower does not cancel the shared flight
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _FlightAbandoned:
+                continue
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being fetched."""
+        with self._lock:
+            return len(self._calls)
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.metrics.increment("llm.coalesced", labels={"flight": self.name})
+                return future, False
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            return future, True
+
+    def _finish(
+        self,
+        key: str,
+        future: Future,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+        cancelled: bool = False
+    ) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if cancelled:
+            # A running future cannot be cancelled; signal followers to retry
+            future.set_exception(_FlightAbandoned())
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+class RedisFlightLock:
+    """
+    Cross-worker leader election for coalesced requests.
+
+    The leader holds ``SET key NX PX`` on a lock key; other workers poll a
+    ``probe`` (normally a read of the shared response cache) until it yields
+    a result, the lock disappears, or ``wait_timeout`` elapses. A worker that
+    gives up waiting falls back to making the call itself.
+    """
+
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        lock_ttl_ms: int = 120_000,
+        poll_interval: float = 0.1,
+        wait_timeout: float = 120.0
+    ):
+        self.client_getter = client_getter
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval = poll_interval
+        self.wait_timeout = wait_timeout
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"{key}:lock"
+
+    def acquire(self, key: str) -> Optional[str]:
+        """
+        Try to become the cross-worker leader for ``key``.
+
+        Returns a token to pass to :meth:`release`, or None if another worker
+        holds the lock. When Redis is unavailable every caller is a leader.
+        """
+        client = self.client_getter()
+        token = uuid.uuid4().hex
+        if not client:
+            return token
+        try:
+            if client.set(self._lock_key(key), token, nx=True, px=self.lock_ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Flight lock acquire failed, proceeding uncoordinated: {e}")
+            return token
+
+    async def aacquire(self, key: str) -> Optional[str]:
+        """Async variant of :meth:`acquire`; the Redis round trip runs off the event loop."""
+        return await asyncio.to_thread(self.acquire, key)
+
+    def release(self, key: str, token: str) -> None:
+        client = self.client_getter()
+        if not client:
+            return
+        try:
+            client.eval(self._RELEASE_SCRIPT, 1, self._lock_key(key), token)
+        except Exception as e:
+            logger.warning(f"Flight lock release failed: {e}")
+
+    async def arelease(self, key: str, token: str) -> None:
+        await asyncio.to_thread(self.release, key, token)
+
+    def _lock_held(self, key: str) -> bool:
+        client = self.client_getter()
+        if not client:
+            return False
+        try:
+            return bool(client.exists(self._lock_key(key)))
+        except Exception:
+            return False
+
+    def wait(self, key: str, probe: Callable[[], Optional[T]]) -> Optional[T]:
+        """Block until ``probe`` returns a value or the leader goes away."""
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            result = probe()
+            if result is not None:
+                return result
+            if not self._lock_held(key):
+                return probe()
+            time.sleep(self.poll_interval)
+        return None
+
+    async def await_result(self, key: str, probe: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        Async variant of :meth:`wait` that yields to the event loop while
+        polling; ``probe`` and the lock check run in a worker thread.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            result = await asyncio.to_thread(probe)
+            if result is not None:
+                return result
+            if not await asyncio.to_thread(self._lock_held, key):
+                return await asyncio.to_thread(probe)
+            await asyncio.sleep(self.poll_interval)
+        return None
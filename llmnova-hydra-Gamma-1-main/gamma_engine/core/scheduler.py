@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import json
 import logging
 import os
@@ -11,6 +12,8 @@ from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from pydantic import BaseModel
 
+from .rate_limiter import Priority, llm_priority
+
 
 class JobDefinition(BaseModel):
     id: str
@@ -20,6 +23,21 @@ class JobDefinition(BaseModel):
     args: List[Any] = []
     kwargs: Dict[str, Any] = {}
 
+def _as_background(func):
+    """Wraps a job so any LLM calls it makes yield to interactive sessions."""
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with llm_priority(Priority.BACKGROUND):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with llm_priority(Priority.BACKGROUND):
+            return func(*args, **kwargs)
+    return wrapper
+
 class ScheduleManager:
     """
     Manages background task scheduling using APScheduler.
@@ -82,7 +100,7 @@ class ScheduleManager:
             raise ValueError(f"Unknown trigger type: {trigger_type}")
 
         job = self.scheduler.add_job(
-            func,
+            _as_background(func),
             trigger=trigger,
             id=job_id,
             args=args,
@@ -0,0 +1,421 @@
+"""
+Append-only JSONL journal for session history.
+
+Each change to a session's history is one JSON line, so persisting a new
+message costs one small append instead of rewriting the whole history:
+
+    {"seq": 7, "op": "append", "message": {...}}
+    {"seq": 8, "op": "insert", "before": 0, "message": {...}}
+    {"seq": 9, "op": "replace", "remove": [1, 2, 3], "message": {...}}
+
+Messages are addressed by their sequence number (kept on the Message), so
+operations stay valid even when only the tail of the history was loaded.
+Compaction replays the journal and atomically rewrites it as plain appends,
+folding summaries in and dropping pruned messages, once ``compact_after``
+dead records accumulated. The offset of the first edit record since the
+last compaction is kept in ``<path>.edits``: everything before it is plain
+appends, so :meth:`SessionJournal.load_tail` replays only the records from
+that offset on and reads the appends before it backwards, as far as the
+token budget goes.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from ..interfaces.llm_provider import Message
+from .tokenizer import Tokenizer, count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_READ_BLOCK = 64 * 1024
+
+
+def _seq(message: Message) -> Optional[int]:
+    return message._journal_seq
+
+
+def _to_message(record: Dict[str, Any]) -> Message:
+    message = Message(**record["message"])
+    message._journal_seq = record["seq"]
+    return message
+
+
+class SessionJournal:
+    """
+    JSONL journal for one session.
+
+    Args:
+        path: Journal file path (created on first write).
+        fsync_policy: "always" (fsync every record), "interval" (at most every
+            ``fsync_interval`` seconds and on flush) or "never" (leave it to the OS).
+        fsync_interval: Seconds between fsyncs under the "interval" policy.
+        compact_after: Number of dead records (pruned messages and edit
+            records) that triggers compaction in :meth:`compact_if_needed`.
+            The count is re-derived from the file when it is loaded.
+    """
+
+    def __init__(self, path: str, fsync_policy: str = "interval", fsync_interval: float = 1.0, compact_after: int = 256):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. Use one of {FSYNC_POLICIES}.")
+        self.path = path
+        self.edits_path = f"{path}.edits"
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        self.dead_records = 0
+        # Set when an edit touched messages the journal has never seen (e.g. loaded from Redis)
+        self.needs_rewrite = False
+        self._file = None
+        self._next_seq: Optional[int] = None
+        self._last_fsync = 0.0
+        self._edits_offset: Optional[int] = None  # cached contents of edits_path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def _allocate_seq(self) -> int:
+        if self._next_seq is None:
+            last = self._last_record()
+            self._next_seq = last["seq"] + 1 if last else 0
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        if record["op"] != "append" and self._first_edit() is None:
+            self._mark_edits(os.path.getsize(self.path))
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync_policy == "always":
+            os.fsync(self._file.fileno())
+        elif self.fsync_policy == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
+
+    def _first_edit(self) -> Optional[int]:
+        """Offset of the first edit record since the last compaction (None if there is none)."""
+        if self._edits_offset is None and os.path.exists(self.edits_path):
+            try:
+                with open(self.edits_path, "r", encoding="utf-8") as f:
+                    self._edits_offset = int(f.read())
+            except (OSError, ValueError):
+                logger.warning(f"Ignoring unreadable {self.edits_path}")
+        return self._edits_offset
+
+    def _mark_edits(self, offset: int) -> None:
+        # Written before the edit record itself; a lost marker only costs a full replay on load
+        with open(self.edits_path, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+            if self.fsync_policy != "never":
+                f.flush()
+                os.fsync(f.fileno())
+        self._edits_offset = offset
+
+    def _clear_edits(self) -> None:
+        if os.path.exists(self.edits_path):
+            os.remove(self.edits_path)
+        self._edits_offset = None
+
+    @staticmethod
+    def _dump(message: Message) -> Dict[str, Any]:
+        return message.model_dump(mode="json", exclude_none=True)
+
+    def append(self, message: Message) -> None:
+        message._journal_seq = self._allocate_seq()
+        self._write({"seq": message._journal_seq, "op": "append", "message": self._dump(message)})
+
+    def insert(self, before: Optional[Message], message: Message) -> None:
+        """Record ``message`` inserted in front of ``before`` (appended if None)."""
+        if before is None:
+            self.append(message)
+            return
+        if _seq(before) is None:
+            self.needs_rewrite = True
+            return
+        message._journal_seq = self._allocate_seq()
+        self._write({"seq": message._journal_seq, "op": "insert", "before": _seq(before), "message": self._dump(message)})
+        self.dead_records += 1
+
+    def replace(self, removed: List[Message], replacement: Optional[Message]) -> None:
+        """Record ``removed`` messages replaced by ``replacement`` (or just dropped)."""
+        if not removed:
+            return
+        if any(_seq(m) is None for m in removed):
+            self.needs_rewrite = True
+            return
+        record: Dict[str, Any] = {"seq": self._allocate_seq(), "op": "replace", "remove": [_seq(m) for m in removed]}
+        if replacement is not None:
+            replacement._journal_seq = record["seq"]
+            record["message"] = self._dump(replacement)
+        self._write(record)
+        self.dead_records += len(removed) + 1
+
+    def adopt(self, messages: List[Message]) -> None:
+        """Start a journal from messages loaded elsewhere (e.g. Redis)."""
+        for message in messages:
+            self.append(message)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            if self.fsync_policy != "never":
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def clear(self) -> None:
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._clear_edits()
+        self.dead_records = 0
+        self.needs_rewrite = False
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def _records(self, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(offset)
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write; everything before it is intact
+                        logger.warning(f"Skipping corrupt journal line in {self.path}")
+
+    def _reverse_lines(self, stop_offset: int = 0, end_offset: Optional[int] = None) -> Iterator[str]:
+        """Yield complete lines from ``end_offset`` (default: the end of the file) back to ``stop_offset``."""
+        with open(self.path, "rb") as f:
+            position = f.seek(0, os.SEEK_END) if end_offset is None else end_offset
+            remainder = b""
+            while position > stop_offset:
+                size = min(_READ_BLOCK, position - stop_offset)
+                position -= size
+                f.seek(position)
+                block = f.read(size) + remainder
+                lines = block.split(b"\n")
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line.decode("utf-8")
+            if remainder.strip():
+                yield remainder.decode("utf-8")
+
+    def _last_record(self) -> Optional[Dict[str, Any]]:
+        if not self.exists():
+            return None
+        for line in self._reverse_lines():
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+    @staticmethod
+    def _replay(records: Iterator[Dict[str, Any]], leading: Optional[List[Message]] = None) -> List[Message]:
+        """
+        Apply ``records`` in order. When replaying only part of the journal,
+        ``leading`` collects the messages placed relative to earlier,
+        unloaded messages (e.g. a summary of the oldest span), which precede
+        everything the part appended.
+        """
+        messages: List[Message] = []
+        for record in records:
+            op = record.get("op")
+            if op == "append":
+                messages.append(_to_message(record))
+                continue
+            if op == "insert":
+                targets = {record["before"]}
+            elif op == "replace":
+                targets = set(record["remove"])
+            else:
+                continue
+            index = next((i for i, m in enumerate(messages) if _seq(m) in targets), None)
+            lead_index = next((i for i, m in enumerate(leading or []) if _seq(m) in targets), None)
+            if op == "replace":
+                messages = [m for m in messages if _seq(m) not in targets]
+                if leading:
+                    leading[:] = [m for m in leading if _seq(m) not in targets]
+                if "message" not in record:
+                    continue
+            message = _to_message(record)
+            if index is not None:
+                messages.insert(index, message)
+            elif lead_index is not None:
+                leading.insert(lead_index, message)
+            elif leading is not None:
+                leading.append(message)
+            else:
+                messages.append(message)
+        return messages
+
+    def load_all(self) -> List[Message]:
+        records = list(self._records())
+        messages = self._replay(iter(records))
+        self.dead_records = len(records) - len(messages)
+        self._next_seq = max((_seq(m) for m in messages), default=-1) + 1
+        last = self._last_record()
+        if last:
+            self._next_seq = max(self._next_seq, last["seq"] + 1)
+        return messages
+
+    def load_tail(self, token_budget: int, tokenizer: Tokenizer) -> List[Message]:
+        """
+        Load leading system messages (prompt, summaries) plus the newest
+        messages that fit in ``token_budget``. Records since the first edit
+        are replayed; the plain appends before them are read backwards.
+        Falls back to a full replay if an edit record turns up among those.
+        """
+        if not self.exists():
+            return []
+        self._next_seq = None  # resolved lazily from the last record
+
+        pinned: List[Message] = []
+        head_end = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    break
+                if record.get("op") != "append" or record["message"].get("role") != "system":
+                    break
+                pinned.append(_to_message(record))
+                head_end += len(raw)
+
+        leading: List[Message] = []
+        recent: List[Message] = []
+        removed: Set[int] = set()
+        end_offset = None
+        first_edit = self._first_edit()
+        edits = list(self._records(first_edit)) if first_edit is not None and first_edit <= os.path.getsize(self.path) else []
+        if edits and edits[0].get("op") == "append":
+            edits = []  # stale marker; the backward read below falls back to a full replay
+        if edits:
+            for record in edits:
+                if record.get("op") == "replace":
+                    removed.update(record["remove"])
+            recent = self._replay(iter(edits), leading)
+            end_offset = first_edit
+            # Dead: edit records and removed messages, whether appended before or after the first edit
+            self.dead_records = len(edits) - len(recent) - len(leading) + len(removed - {r["seq"] for r in edits})
+        pinned = [m for m in pinned if _seq(m) not in removed]
+
+        budget = token_budget - sum(count_message_tokens(m, tokenizer) for m in pinned + leading)
+        tail: List[Message] = []
+        for message in reversed(recent):
+            cost = count_message_tokens(message, tokenizer)
+            if tail and cost > budget:
+                return pinned + leading + list(reversed(tail))
+            budget -= cost
+            tail.append(message)
+
+        for line in self._reverse_lines(stop_offset=head_end, end_offset=end_offset):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("op") != "append":
+                # No (valid) edits marker: replay everything once and compact
+                messages = self.load_all()
+                self._rewrite(messages)
+                return self._tail_of(messages, token_budget, tokenizer)
+            if record["seq"] in removed:
+                continue
+            message = _to_message(record)
+            cost = count_message_tokens(message, tokenizer)
+            if tail and cost > budget:
+                break
+            budget -= cost
+            tail.append(message)
+
+        return pinned + leading + list(reversed(tail))
+
+    @staticmethod
+    def _tail_of(messages: List[Message], token_budget: int, tokenizer: Tokenizer) -> List[Message]:
+        pinned = 0
+        while pinned < len(messages) and messages[pinned].role == "system":
+            pinned += 1
+        budget = token_budget - sum(count_message_tokens(m, tokenizer) for m in messages[:pinned])
+        start = len(messages)
+        while start > pinned:
+            cost = count_message_tokens(messages[start - 1], tokenizer)
+            if start < len(messages) and cost > budget:
+                break
+            budget -= cost
+            start -= 1
+        return messages[:pinned] + messages[start:]
+
+    # ------------------------------------------------------------------
+    # Compaction and migration
+    # ------------------------------------------------------------------
+    def _rewrite(self, messages: List[Message], live: Optional[List[Message]] = None) -> None:
+        """
+        Write ``messages`` as plain appends numbered from 0. ``live`` are the
+        owner's copies of (some of) them, renumbered to match.
+        """
+        self.close()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        renumbered: Dict[Optional[int], int] = {}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq, message in enumerate(messages):
+                if _seq(message) is not None:
+                    renumbered[_seq(message)] = seq
+                message._journal_seq = seq
+                f.write(json.dumps({"seq": seq, "op": "append", "message": self._dump(message)}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._clear_edits()
+        for message in live or []:
+            message._journal_seq = renumbered.get(_seq(message))
+        self._next_seq = len(messages)
+        self.dead_records = 0
+        self.needs_rewrite = False
+
+    def compact(self, live: Optional[List[Message]] = None) -> None:
+        """Replay the journal and rewrite it as plain appends, renumbering ``live`` (the owner's messages)."""
+        self._rewrite(self.load_all(), live)
+
+    def compact_if_needed(self, messages: List[Message]) -> None:
+        """
+        Compact when enough dead records accumulated. If edits could not be
+        journaled, ``messages`` (which must be the full history) is written instead.
+        """
+        if self.needs_rewrite:
+            self._rewrite(messages)
+        elif self.dead_records >= self.compact_after:
+            self.compact(messages)
+
+    def migrate_from_json(self, json_path: str) -> bool:
+        """Convert a legacy ``memory.json`` into this journal; the old file is kept as ``.migrated``."""
+        if self.exists() or not os.path.exists(json_path):
+            return False
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._rewrite([Message(**msg_data) for msg_data in data])
+        os.replace(json_path, f"{json_path}.migrated")
+        logger.info(f"Migrated {json_path} to journal {self.path}")
+        return True
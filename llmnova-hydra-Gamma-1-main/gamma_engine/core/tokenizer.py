@@ -0,0 +1,218 @@
+"""
+Token accounting for conversation memory.
+
+Provides pluggable tokenizers and per-model context budgets:
+- TiktokenTokenizer: exact counts when the optional ``tiktoken`` package is installed
+- BPETokenizer: pure-Python byte-pair encoder over an offline ``.tiktoken``
+  rank table (``Settings.tokenizer_bpe_path``), for hosts without tiktoken
+- HeuristicTokenizer: fast ~4 characters/token estimate, always available
+
+Counts are cached on each Message, so a message is tokenized at most once
+per tokenizer no matter how often the history is re-evaluated.
+"""
+
+import base64
+import logging
+import math
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from ..interfaces.llm_provider import Message
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fixed per-message framing cost of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Billed cost of one high-detail image tile set; base64 payloads are not tokenized as text
+IMAGE_TOKENS = 765
+
+# Context windows by model-name prefix (longest prefix wins)
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 200_000,
+    "o3": 200_000,
+    "claude-": 200_000,
+}
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+# Approximation of the cl100k pre-tokenizer using only the stdlib ``re`` module
+_PRETOKENIZE_PATTERN = re.compile(
+    r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+""",
+    re.IGNORECASE
+)
+
+
+class Tokenizer(ABC):
+    """Counts tokens in a string."""
+
+    name: str = "tokenizer"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        pass
+
+
+class HeuristicTokenizer(Tokenizer):
+    """Character-ratio estimate; within ~10-15% of BPE for English prose and code."""
+
+    name = "heuristic"
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact OpenAI token counts via ``tiktoken``."""
+
+    def __init__(self, encoding: object):
+        self._encoding = encoding
+        self.name = f"tiktoken:{getattr(encoding, 'name', 'unknown')}"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class BPETokenizer(Tokenizer):
+    """
+    Pure-Python BPE over a tiktoken-format rank table (``<base64 token> <rank>`` per line).
+
+    Pre-tokenized pieces are merged lowest-rank-first, exactly like tiktoken;
+    the pre-tokenizer is a stdlib-regex approximation of cl100k's. Piece
+    results are memoized since natural text repeats pieces heavily.
+    """
+
+    def __init__(self, ranks: Dict[bytes, int], name: str = "bpe", max_memo_entries: int = 65536):
+        self.ranks = ranks
+        self.name = name
+        self.max_memo_entries = max_memo_entries
+        self._memo: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "BPETokenizer":
+        ranks: Dict[bytes, int] = {}
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                token, rank = line.split()
+                ranks[base64.b64decode(token)] = int(rank)
+        return cls(ranks, name=f"bpe:{os.path.basename(path)}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return sum(self._piece_count(m.group().encode("utf-8")) for m in _PRETOKENIZE_PATTERN.finditer(text))
+
+    def _piece_count(self, piece: bytes) -> int:
+        if piece in self.ranks:
+            return 1
+        with self._lock:
+            cached = self._memo.get(piece)
+        if cached is not None:
+            return cached
+
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_index, best_rank = -1, None
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_index, best_rank = i, rank
+            if best_rank is None:
+                break
+            parts[best_index:best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+
+        with self._lock:
+            self._memo[piece] = len(parts)
+            if len(self._memo) > self.max_memo_entries:
+                self._memo.popitem(last=False)
+        return len(parts)
+
+
+_tokenizers: Dict[str, Tokenizer] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def _build_tokenizer(model: Optional[str]) -> Tokenizer:
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model or "gpt-4o")
+        except KeyError:
+            # Non-OpenAI models (e.g. Claude): cl100k is a close approximation
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return TiktokenTokenizer(encoding)
+    except Exception as e:
+        logger.debug(f"tiktoken unavailable ({e}); trying offline BPE table.")
+
+    if settings.tokenizer_bpe_path and os.path.exists(settings.tokenizer_bpe_path):
+        try:
+            return BPETokenizer.from_file(settings.tokenizer_bpe_path)
+        except Exception as e:
+            logger.warning(f"Could not load BPE table {settings.tokenizer_bpe_path}: {e}")
+    return HeuristicTokenizer()
+
+
+def get_tokenizer(model: Optional[str] = None) -> Tokenizer:
+    """Return the best available tokenizer for ``model`` (shared per model)."""
+    key = model or ""
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(key)
+        if tokenizer is None:
+            tokenizer = _build_tokenizer(model)
+            _tokenizers[key] = tokenizer
+        return tokenizer
+
+
+def count_message_tokens(message: Message, tokenizer: Tokenizer) -> int:
+    """Token cost of ``message``, cached on the message per tokenizer."""
+    cache = message._token_counts
+    cached = cache.get(tokenizer.name)
+    if cached is not None:
+        return cached
+
+    total = MESSAGE_OVERHEAD_TOKENS + tokenizer.count(message.content or "")
+    for call in message.tool_calls or []:
+        function = call.get("function", {}) if isinstance(call, dict) else getattr(call, "function", None)
+        if isinstance(function, dict):
+            total += tokenizer.count(function.get("name", "")) + tokenizer.count(function.get("arguments", ""))
+        elif function is not None:
+            total += tokenizer.count(function.name or "") + tokenizer.count(function.arguments or "")
+    if message.base64_image:
+        total += IMAGE_TOKENS
+
+    cache[tokenizer.name] = total
+    return total
+
+
+def context_window(model: Optional[str]) -> int:
+    if not model:
+        return DEFAULT_CONTEXT_WINDOW
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def context_budget(model: Optional[str], reserved_output_tokens: Optional[int] = None) -> int:
+    """History budget for ``model``: its context window minus room for the reply."""
+    reserved = settings.memory_reserved_output_tokens if reserved_output_tokens is None else reserved_output_tokens
+    window = context_window(model)
+    return max(window // 4, window - reserved)
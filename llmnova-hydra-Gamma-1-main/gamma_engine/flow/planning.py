@@ -6,7 +6,7 @@ from typing import Optional, Dict, Any, List
 from .base import BaseFlow
 from ..core.agent import Agent
 from ..tools.planning import PlanningTool
-from ..interfaces.llm_provider import Message
+from ..interfaces.llm_provider import Message, async_chat
 
 logger = logging.getLogger(__name__)
 
@@ -164,9 +164,8 @@ class PlanningFlow(BaseFlow):
 
     async def _llm_call(self, messages: List[Dict], tools: List[Dict]) -> Message:
         """Helper to call the agent's LLM provider directly."""
-        import asyncio
-        return await asyncio.to_thread(
-            self.primary_agent.llm.chat,
+        return await async_chat(
+            self.primary_agent.llm,
             history=messages,
             tools=tools,
             tool_choice="auto"
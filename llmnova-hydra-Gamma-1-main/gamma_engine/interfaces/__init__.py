@@ -5,11 +5,12 @@ the architecture of the Gamma Engine. Concrete implementations must
 adhere to these interfaces.
 """
 
-from .llm_provider import LLMProviderInterface, Message
+from .llm_provider import LLMProviderInterface, Message, StreamEvent
 from .tool import ToolInterface
 
 __all__ = [
     'LLMProviderInterface',
     'Message',
+    'StreamEvent',
     'ToolInterface',
 ]
@@ -4,10 +4,11 @@ This module defines the abstract interface for Large Language Model providers
 and the Message data structure for LLM communication.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class Message(BaseModel):
@@ -51,6 +52,44 @@ class Message(BaseModel):
         None,
         description="List of tool calls requested by the assistant"
     )
+    # Token counts per tokenizer name, filled lazily by the memory layer
+    _token_counts: Dict[str, int] = PrivateAttr(default_factory=dict)
+    # Position in the session journal, assigned when the message is persisted
+    _journal_seq: Optional[int] = PrivateAttr(default=None)
+
+
+class StreamEvent(BaseModel):
+    """A single incremental event produced while streaming an LLM response.
+
+    Streams yield any number of ``text`` and ``tool_call`` events followed by
+    exactly one terminal ``message`` event carrying the fully assembled
+    Message, so consumers can render deltas as they arrive and still act on
+    the complete response.
+
+    Attributes:
+        type: One of 'text' (content delta), 'tool_call' (tool call argument
+            fragment) or 'message' (final assembled response).
+        content: Text delta for 'text' events, or the argument fragment for
+            'tool_call' events.
+        tool_call_index: Position of the tool call a fragment belongs to.
+        tool_call_id: Provider id of the tool call, when known.
+        tool_name: Name of the tool being called, when known.
+        message: The complete response, set only on the 'message' event.
+
+    Examples:
+        >>> async for event in provider.astream(history):
+        ...     if event.type == "text":
+        ...         print(event.content, end="")
+        ...     elif event.type == "message":
+        ...         final = event.message
+    """
+
+    type: str = Field(..., description="Event type: 'text', 'tool_call' or 'message'")
+    content: Optional[str] = Field(None, description="Text delta or tool argument fragment")
+    tool_call_index: Optional[int] = Field(None, description="Index of the tool call being streamed")
+    tool_call_id: Optional[str] = Field(None, description="Provider id of the tool call")
+    tool_name: Optional[str] = Field(None, description="Name of the tool being called")
+    message: Optional[Message] = Field(None, description="Final assembled message")
 
 
 class LLMProviderInterface(ABC):
@@ -111,3 +150,78 @@ class LLMProviderInterface(ABC):
         """
         pass
 
+
+    async def achat(
+        self,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]] = None,
+        **kwargs: Any
+    ) -> Message:
+        """Asynchronous counterpart of :meth:`chat`.
+
+        The default implementation runs :meth:`chat` in a worker thread so
+        every provider is awaitable. Providers backed by an async SDK should
+        override this to avoid holding a thread per in-flight request.
+
+        Args:
+            history: Conversation history, as for :meth:`chat`.
+            tools: Optional list of tool schemas for function calling.
+            **kwargs: Provider-specific options (e.g. ``tool_choice``,
+                ``temperature``) forwarded to :meth:`chat`.
+
+        Returns:
+            A Message object containing the LLM's response.
+        """
+        return await asyncio.to_thread(self.chat, history, tools, **kwargs)
+
+    async def astream(
+        self,
+        history: List[Dict[str, Any]],
+        tools: Optional[List[Any]] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream the response as incremental :class:`StreamEvent` objects.
+
+        The default implementation awaits :meth:`achat` and replays the
+        result as a single text event followed by the final message.
+        Providers with native streaming support should override this.
+
+        Args:
+            history: Conversation history, as for :meth:`chat`.
+            tools: Optional list of tool schemas for function calling.
+            **kwargs: Provider-specific options forwarded to :meth:`achat`.
+
+        Yields:
+            StreamEvent objects, ending with one ``message`` event.
+        """
+        message = await self.achat(history, tools, **kwargs)
+        if message.content:
+            yield StreamEvent(type="text", content=message.content)
+        yield StreamEvent(type="message", message=message)
+
+
+async def async_chat(
+    provider: Any,
+    history: List[Dict[str, Any]],
+    tools: Optional[List[Any]] = None,
+    **kwargs: Any
+) -> Message:
+    """Call an LLM provider from async code.
+
+    Uses the provider's native ``achat`` coroutine when it has one and falls
+    back to running the synchronous ``chat`` in a worker thread for
+    duck-typed providers that only implement ``chat``.
+
+    Args:
+        provider: Any object exposing ``chat`` (and optionally ``achat``).
+        history: Conversation history to send.
+        tools: Optional list of tool schemas for function calling.
+        **kwargs: Extra options such as ``tool_choice`` or ``temperature``.
+
+    Returns:
+        The provider's response Message.
+    """
+    achat = getattr(provider, "achat", None)
+    if achat is not None and asyncio.iscoroutinefunction(achat):
+        return await achat(history, tools=tools, **kwargs)
+    return await asyncio.to_thread(provider.chat, history=history, tools=tools, **kwargs)
@@ -54,10 +54,8 @@ def extract_text_from_pdf(file_path: str) -> str:
         return "Error: PDF text extraction requires pypdf. Install with: pip install pypdf"
     try:
         reader = pypdf.PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        # Joined once at the end; repeated += is quadratic on large documents
+        return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
     except Exception as e:
         return f"Error extracting text from PDF: {e}"
 
@@ -1,18 +1,35 @@
 """Tool for querying the RAG (Retrieval-Augmented Generation) service."""
 
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 
 from .base import Tool
 from ..core.rag_service import RAGService
 from ..core.logger import logger
+from ..core.config import settings
 
 class KnowledgeBaseSearchTool(Tool):
     """
     A tool to search a RAG-powered knowledge base for relevant information.
+
+    Passages whose embedding similarity to the query (``vector_score``) is
+    below ``min_similarity`` (default ``Settings.rag_min_similarity``) are
+    dropped. Keyword-only matches (exact terms the dense retriever missed)
+    and results from providers that do not score passages are kept.
+
+    With ``additional_corpora`` (e.g. the session's LTM corpus), every search
+    also covers those corpora in one concurrent ``query_many`` call. Like
+    ``corpus_display_name`` they are display names, resolved through
+    ``create_or_get_corpus`` (e.g. to Vertex resource names) on first use.
     """
 
-    def __init__(self, rag_service: RAGService, corpus_display_name: str = "default-gamma-corpus"):
+    def __init__(
+        self,
+        rag_service: RAGService,
+        corpus_display_name: str = "default-gamma-corpus",
+        min_similarity: Optional[float] = None,
+        additional_corpora: Sequence[str] = ()
+    ):
         super().__init__(
             name="knowledge_base_search",
             description=(
@@ -38,6 +55,9 @@ class KnowledgeBaseSearchTool(Tool):
         self.rag_service = rag_service
         self.corpus_display_name = corpus_display_name
         self.corpus_name = None # Will be set after corpus is created/retrieved
+        self.additional_corpora = list(additional_corpora)
+        self.additional_corpus_names: Optional[List[str]] = None # Resolved with the main corpus
+        self.min_similarity = settings.rag_min_similarity if min_similarity is None else min_similarity
 
     def _initialize_corpus(self):
         """Ensures the RAG corpus is created or retrieved."""
@@ -46,6 +66,14 @@ class KnowledgeBaseSearchTool(Tool):
             if not self.corpus_name:
                 logger.error(f"Failed to initialize RAG corpus '{self.corpus_display_name}'. RAG tool will be disabled.")
                 self.rag_service.is_configured = False # Disable if corpus init fails
+        if self.additional_corpus_names is None and self.corpus_name:
+            self.additional_corpus_names = []
+            for display_name in self.additional_corpora:
+                name = self.rag_service.create_or_get_corpus(display_name)
+                if name:
+                    self.additional_corpus_names.append(name)
+                else:
+                    logger.warning(f"RAG corpus '{display_name}' is unavailable; searching without it.")
 
     def execute(self, query: str, num_results: int = 3) -> str:
         """
@@ -64,14 +92,20 @@ class KnowledgeBaseSearchTool(Tool):
             return "Error: KnowledgeBaseSearchTool is not configured or corpus not initialized. Please check RAG service configuration."
 
         try:
-            results = self.rag_service.query_rag_corpus(self.corpus_name, query, num_results)
-            
+            if self.additional_corpus_names:
+                results = self.rag_service.query_many([self.corpus_name, *self.additional_corpus_names], query, num_results)
+            else:
+                results = self.rag_service.query_rag_corpus(self.corpus_name, query, num_results)
+            results = [r for r in results if r.get("vector_score") is None or r["vector_score"] >= self.min_similarity]
+
             if not results:
                 return f"No relevant information found in the knowledge base for '{query}'."
 
             output = [f"Information from knowledge base for '{query}':\n"]
             for i, item in enumerate(results, 1):
-                output.append(f"{i}. Source: {item.get('source_uri', 'N/A')}\n   Content: {item['content']}\n")
+                score = f" (score {item['score']:.2f})" if item.get("score") is not None else ""
+                corpus = f" [{item['corpus']}]" if self.additional_corpus_names and item.get("corpus") else ""
+                output.append(f"{i}. Source: {item.get('source_uri', 'N/A')}{corpus}{score}\n   Content: {item['content']}\n")
 
             return "\n".join(output)
         except Exception as e:
@@ -13,11 +13,11 @@ from watchdog.events import FileSystemEventHandler
 
 from gamma_engine.core.agent import Agent
 from gamma_engine.core.llm import LLMProvider
+from gamma_engine.core.llm_router import CircuitBreaker, RoutedLLMProvider
 from gamma_engine.core.memory import EpisodicMemory
 from gamma_engine.core.reporting import generate_report_pdf
 from gamma_engine.core.logger import logger
-from gamma_engine.core.rag.local import LocalRAGProvider
-from gamma_engine.core.rag.vertex import VertexRAGProvider
+from gamma_engine.core.rag_service import get_shared_rag_provider
 from gamma_engine.tools.filesystem import ListFilesTool, ReadFileTool, WriteFileTool, DiffFilesTool
 from gamma_engine.tools.terminal import RunBashTool
 from gamma_engine.tools.editor import StrReplaceEditorTool
@@ -36,6 +36,7 @@ from gamma_engine.core.config import settings
 from gamma_engine.core.health_monitor import HealthMonitor
 from gamma_engine.core.workflow_engine import WorkflowEngine
 from gamma_engine.core.long_term_memory import LongTermMemory
+from gamma_engine.core.ltm_write_queue import close_write_queues
 from gamma_engine.flow.planning import PlanningFlow
 
 load_dotenv()
@@ -77,7 +78,20 @@ workflow_engine = WorkflowEngine(scheduler)
 # For MVP dashboard, we use a shared system view.
 global_ltm = LongTermMemory(session_id="system_shared")
 
-llm_provider = LLMProvider(model=settings.llm_model)
+fallback_models = [m.strip() for m in settings.llm_fallback_models.split(",") if m.strip()]
+if fallback_models:
+    llm_provider = RoutedLLMProvider(
+        [LLMProvider(model=m) for m in [settings.llm_model, *fallback_models]],
+        hedge_percentile=settings.llm_hedge_percentile,
+        default_hedge_delay=settings.llm_hedge_default_delay,
+        breaker_factory=lambda: CircuitBreaker(
+            error_rate_threshold=settings.llm_breaker_error_rate,
+            latency_threshold=settings.llm_breaker_latency_seconds,
+            cooldown=settings.llm_breaker_cooldown_seconds
+        )
+    )
+else:
+    llm_provider = LLMProvider(model=settings.llm_model)
 health_monitor = HealthMonitor(
     interval=settings.health_monitor_interval,
     cpu_threshold=settings.cpu_alert_threshold,
@@ -88,19 +102,11 @@ health_monitor = HealthMonitor(
 brain_api_module.workflow_engine = workflow_engine
 brain_api_module.long_term_memory = global_ltm
 
-# Initialize RAG Provider based on configuration
+# Shared RAG Provider based on configuration (the same instance LongTermMemory uses);
+# it is loaded in the background at startup
 rag_provider_type = settings.rag_provider.lower()
-rag_service = None
-
-if rag_provider_type == "local":
-    logger.info("Initializing Local RAG Provider...")
-    rag_service = LocalRAGProvider(persistence_path="./chroma_db")
-else:
-    logger.info("Initializing Vertex AI RAG Provider...")
-    rag_service = VertexRAGProvider(
-        project_id=settings.google_cloud_project,
-        location=settings.google_cloud_location
-    )
+logger.info(f"Using {rag_provider_type} RAG Provider.")
+rag_service = get_shared_rag_provider(rag_provider_type)
 
 # Prometheus Metrics
 instrumentator = Instrumentator().instrument(app)
@@ -117,13 +123,16 @@ def startup_event():
     if not settings.gamma_api_key:
         logger.warning("GAMMA_API_KEY is not set. Server is running in an insecure mode.")
 
-    if rag_service and not rag_service.is_configured:
-        logger.warning(f"{rag_provider_type.capitalize()} RAG Service is not configured. RAG tools will be disabled.")
+    # Load the embedding model / vector store off the startup path; a warning
+    # is logged once loading finishes if the provider is not configured
+    rag_service.warm()
 
 @app.on_event("shutdown")
 def shutdown_event():
     scheduler.stop()
     health_monitor.stop()
+    # Persist knowledge still waiting in the LTM write-behind queue
+    close_write_queues()
 
 class FileChangeHandler(FileSystemEventHandler):
     def on_any_event(self, event):
@@ -239,7 +248,8 @@ async def websocket_endpoint(websocket: WebSocket):
         RunBashTool(),
         WebDevTool(),
         WebSearchTool(),
-        KnowledgeBaseSearchTool(rag_service=rag_service, corpus_display_name=f"session-{session_id}-corpus"),
+        # Searches the session's uploads and its long-term memory in one fan-out
+        KnowledgeBaseSearchTool(rag_service=rag_service, corpus_display_name=f"session-{session_id}-corpus", additional_corpora=[f"ltm-{session_id}"]),
         SystemStatusTool(),
         ModelTrainingTool(trainer=LocalTrainer())
     ]
@@ -257,9 +267,9 @@ async def websocket_endpoint(websocket: WebSocket):
         llm_provider=llm_provider,
         tools=tools,
         session_id=session_id,
-        event_callback=event_callback
+        event_callback=event_callback,
+        stream=True
     )
-    agent.memory.load_from_file()
 
     await websocket.send_json({"type": "session_info", "sessionId": session_id})
 
@@ -58,3 +58,26 @@ def test_agent_add_message(agent):
     # Using 'messages' as EpisodicMemory uses 'messages' list, not 'memories'
     assert len(agent.memory.messages) == 1
     assert agent.memory.messages[0].content == "hello"
+
+@pytest.mark.asyncio
+async def test_agent_stream_forwards_thought_deltas():
+    import uuid
+    from gamma_engine.interfaces.llm_provider import Message, StreamEvent
+
+    class StreamingLLM:
+        async def astream(self, history, tools=None):
+            yield StreamEvent(type="text", content="Hel")
+            yield StreamEvent(type="text", content="lo")
+            yield StreamEvent(type="message", message=Message(role="assistant", content="Hello"))
+
+    events = []
+
+    async def callback(event_type, data):
+        events.append((event_type, data))
+
+    agent = Agent(tools=[], llm_provider=StreamingLLM(), session_id=str(uuid.uuid4()),
+                  event_callback=callback, stream=True)
+    response = await agent._stream_llm([{"role": "user", "content": "Hi"}])
+
+    assert response.content == "Hello"
+    assert events == [("thought_delta", {"content": "Hel"}), ("thought_delta", {"content": "lo"})]
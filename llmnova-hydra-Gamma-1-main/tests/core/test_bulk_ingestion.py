@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from benchmarks.ingestion import make_corpus, run_all
+from gamma_engine.core.ingestion.bulk import BulkIngestor
+from gamma_engine.core.ingestion.embeddings import SentenceTransformerEmbeddings
+
+
+class RecordingEmbedder:
+    def __init__(self):
+        self.batches = []
+
+    def embed_text(self, texts):
+        self.batches.append(len(texts))
+        return [[1.0, 0.0] for _ in texts]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    for i in range(3):
+        # 25 words, chunk_size 10, overlap 2: chunks start at words 0, 8, 16, 24 -> 4 chunks per file
+        (tmp_path / f"doc{i}.txt").write_text(" ".join(f"w{j}" for j in range(25)))
+    return tmp_path
+
+
+def test_batches_are_bounded_and_upserts_chunked(corpus):
+    embedder = RecordingEmbedder()
+    store = MagicMock()
+    ingestor = BulkIngestor(embedder, store, batch_size=5, upsert_batch_size=2, max_in_flight_batches=1, chunk_size=10, overlap=2)
+
+    stats = ingestor.ingest_directory(str(corpus), extensions=[".txt"])
+
+    assert stats.files == 3
+    assert stats.chunks == 12
+    assert embedder.batches == [5, 5, 2]
+    assert max(len(c.kwargs["texts"]) for c in store.upsert_texts.call_args_list) == 2
+    first = store.upsert_texts.call_args_list[0].kwargs
+    assert [m["chunk_index"] for m in first["metadatas"]] == [0, 1]
+    assert all(i.startswith("doc0.txt_") for i in first["ids"])
+    assert first["embeddings"] == [[1.0, 0.0], [1.0, 0.0]]
+    assert stats.peak_rss_bytes > 0
+    assert stats.chunks_per_second > 0
+
+
+def test_unreadable_file_is_counted_not_fatal(corpus):
+    store = MagicMock()
+    ingestor = BulkIngestor(RecordingEmbedder(), store, batch_size=100, chunk_size=10, overlap=2)
+
+    stats = ingestor.ingest_files([str(corpus / "missing.txt"), str(corpus / "doc0.txt")])
+
+    assert stats.failed_files == 1
+    assert stats.files == 1
+    assert stats.chunks == 4
+
+
+def test_embedding_failure_stops_the_loader(corpus):
+    embedder = MagicMock()
+    embedder.embed_text.side_effect = RuntimeError("encoder crashed")
+    ingestor = BulkIngestor(embedder, MagicMock(), batch_size=1, max_in_flight_batches=1, chunk_size=10, overlap=2)
+
+    with pytest.raises(RuntimeError):
+        ingestor.ingest_directory(str(corpus))
+    assert not any(t.name == "bulk-ingest-loader" for t in threading.enumerate())
+
+
+def test_sentence_transformer_uses_pool_for_large_inputs():
+    embedder = SentenceTransformerEmbeddings.__new__(SentenceTransformerEmbeddings)
+    embedder.model_name, embedder.cache, embedder.batch_size = "mini", None, 32
+    embedder.processes, embedder.min_pool_texts, embedder._pool = 4, 3, None
+    embedder.model = MagicMock()
+    embedder.model.encode.return_value.tolist.return_value = [[0.0]]
+    embedder.model.encode_multi_process.return_value.tolist.return_value = [[1.0]] * 3
+
+    assert embedder.embed_text(["a"]) == [[0.0]]
+    assert embedder.embed_text(["a", "b", "c"]) == [[1.0]] * 3
+    embedder.model.start_multi_process_pool.assert_called_once_with(target_devices=["cpu"] * 4)
+    embedder.model.encode.assert_called_once_with(["a"], batch_size=32)
+
+    embedder.close()
+    embedder.model.stop_multi_process_pool.assert_called_once()
+
+
+def test_ingestion_benchmark_runs_offline(tmp_path):
+    results = run_all(make_corpus(str(tmp_path), files=3, words=1200), batch_size=4)
+
+    assert results["per_document"].chunks == results["bulk"].chunks == 9
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from gamma_engine.core.ingestion.embedding_cache import EmbeddingCache, cached_embed, content_key
+from gamma_engine.core.ingestion.embeddings import ChromaEmbeddingFunction, SentenceTransformerEmbeddings
+from gamma_engine.core.metrics import get_metrics_collector
+
+
+def fake_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+    return encode
+
+
+def test_key_ignores_whitespace_differences():
+    assert content_key("Chapter 1\n  Introduction") == content_key("Chapter 1 Introduction")
+    assert content_key("a") != content_key("b")
+
+
+def test_only_distinct_misses_are_computed(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dtype="float32")
+    calls = []
+    compute = fake_encoder(calls)
+
+    first = cached_embed(cache, "m", ["alpha", "beta", "alpha"], compute)
+    second = cached_embed(cache, "m", ["beta", "gamma", "alpha"], compute)
+
+    assert calls == [["alpha", "beta"], ["gamma"]]
+    assert first[0] == first[2] == [5.0, 1.0, 0.5]
+    assert second == [[4.0, 1.0, 0.5], [5.0, 1.0, 0.5], [5.0, 1.0, 0.5]]
+
+
+def test_cache_persists_and_stays_aligned_after_torn_write(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many([content_key("one"), content_key("two")], [[1, 0], [0, 1]])
+    # A vector row whose key was never written (crash between the two appends)
+    with open(tmp_path / "vectors.bin", "ab") as f:
+        f.write(np.zeros(2, dtype=np.float16).tobytes())
+
+    reopened = EmbeddingCache(str(tmp_path))
+    reopened.put_many([content_key("three")], [[0.5, 0.5]])
+
+    again = EmbeddingCache(str(tmp_path))
+    assert len(again) == 3
+    vectors = again.get_many([content_key("two"), content_key("missing"), content_key("three")])
+    assert vectors[0].tolist() == [0.0, 1.0]
+    assert vectors[1] is None
+    assert vectors[2].tolist() == [0.5, 0.5]
+
+
+
+def test_partial_trailing_rows_are_truncated(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many([content_key("one")], [[1, 0]])
+    with open(tmp_path / "vectors.bin", "ab") as f:
+        f.write(b"\x00")  # half a float16
+    with open(tmp_path / "keys.bin", "ab") as f:
+        f.write(b"\x00" * 5)
+
+    reopened = EmbeddingCache(str(tmp_path))
+    reopened.put_many([content_key("two")], [[0, 1]])
+
+    again = EmbeddingCache(str(tmp_path))
+    assert len(again) == 2
+    assert again.get_many([content_key("two")])[0].tolist() == [0.0, 1.0]
+    assert (tmp_path / "keys.bin").stat().st_size == 2 * 16
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many([content_key("x")], [[1.0, 2.0]])
+    with pytest.raises(ValueError):
+        cache.put_many([content_key("y")], [[1.0, 2.0, 3.0]])
+
+
+def test_sentence_transformer_and_chroma_function_use_cache(tmp_path):
+    metrics = get_metrics_collector()
+    metrics.reset()
+    calls = []
+    embedder = SentenceTransformerEmbeddings.__new__(SentenceTransformerEmbeddings)
+    embedder.model_name = "mini"
+    embedder.cache = EmbeddingCache.for_model(str(tmp_path), "sentence-transformers/mini")
+    embedder.model = MagicMock()
+    embedder.batch_size, embedder.processes = 64, 0
+    embedder.model.encode.side_effect = lambda texts, **kwargs: np.array(fake_encoder(calls)(texts))
+
+    embedder.embed_text(["page one", "page two"])
+    ChromaEmbeddingFunction(embedder)(["page one", "page two"])
+
+    assert calls == [["page one", "page two"]]
+    assert (tmp_path / "sentence-transformers_mini" / "keys.bin").exists()
+    assert metrics.get_metric("embedding_cache.hits", labels={"model": "mini"}).value == 2
+    assert metrics.get_metric("embedding_cache.misses", labels={"model": "mini"}).value == 2
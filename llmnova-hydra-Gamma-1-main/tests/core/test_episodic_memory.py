@@ -0,0 +1,182 @@
+import datetime
+import sqlite3
+
+import numpy as np
+import pytest
+
+from gamma_engine.core.episodic_memory import Action, Episode, EpisodicStore
+
+
+def make_episode(goal, outcome="success", reflection=None, days_ago=0):
+    return Episode(
+        goal=goal,
+        context={"objective": goal},
+        outcome=outcome,
+        actions=[Action(tool_name="bash", arguments={"cmd": "ls"})],
+        reflection=reflection,
+        timestamp=datetime.datetime.now() - datetime.timedelta(days=days_ago)
+    )
+
+
+def test_finds_most_similar_goal_not_most_recent():
+    store = EpisodicStore()
+    store.save_episode(make_episode("deploy the web server with docker"))
+    store.save_episode(make_episode("write unit tests for the parser"))
+    store.save_episode(make_episode("summarize the quarterly sales report"))
+
+    results = store.find_similar_episodes("deploy a docker web server", n_results=1)
+
+    assert [e.goal for e in results] == ["deploy the web server with docker"]
+    assert results[0].actions[0].tool_name == "bash"
+
+
+def test_filters_by_outcome_and_time():
+    store = EpisodicStore()
+    store.save_episodes([
+        make_episode("fix the login bug", outcome="failure"),
+        make_episode("fix the login bug quickly", days_ago=30),
+        make_episode("fix a logging bug"),
+    ])
+
+    assert [e.goal for e in store.find_similar_episodes("fix the login bug", outcome="failure")] == ["fix the login bug"]
+
+    recent = store.find_similar_episodes(
+        "fix the login bug", n_results=5, since=datetime.datetime.now() - datetime.timedelta(days=1)
+    )
+    assert [e.goal for e in recent] == ["fix a logging bug"]
+    assert store.find_similar_episodes("anything", outcome="unknown") == []
+
+
+def test_persists_and_reloads_memory_mapped_vectors(tmp_path):
+    store = EpisodicStore(path=str(tmp_path))
+    store.save_episodes([make_episode(f"task number {i}") for i in range(50)])
+    store.save_episode(make_episode("migrate the database schema", reflection="run migrations in a transaction"))
+    store.close()
+
+    reopened = EpisodicStore(path=str(tmp_path))
+    assert len(reopened) == 51
+    assert isinstance(reopened._vectors(), np.memmap)
+    results = reopened.find_similar_episodes("database schema migration", n_results=1)
+    assert results[0].reflection == "run migrations in a transaction"
+
+    reopened.clear()
+    assert len(EpisodicStore(path=str(tmp_path))) == 0
+
+
+def test_truncates_vectors_without_rows(tmp_path):
+    store = EpisodicStore(path=str(tmp_path))
+    store.save_episode(make_episode("first"))
+    store.close()
+    # Simulate a crash after the vector append but before the row commit
+    with open(tmp_path / "embeddings.f32", "ab") as f:
+        f.write(np.zeros(256, dtype=np.float32).tobytes())
+
+    reopened = EpisodicStore(path=str(tmp_path))
+    reopened.save_episode(make_episode("second"))
+
+    assert [e.goal for e in reopened.find_similar_episodes("second", n_results=1)] == ["second"]
+    assert (tmp_path / "embeddings.f32").stat().st_size == 2 * 256 * 4
+
+
+
+def test_failed_insert_leaves_vectors_aligned(tmp_path):
+    store = EpisodicStore(path=str(tmp_path))
+    first = make_episode("first")
+    store.save_episode(first)
+
+    duplicate = make_episode("duplicate")
+    duplicate.id = first.id
+    with pytest.raises(sqlite3.IntegrityError):
+        store.save_episode(duplicate)
+    store.save_episode(make_episode("second"))
+
+    assert (tmp_path / "embeddings.f32").stat().st_size == 2 * 256 * 4
+    assert [e.goal for e in store.find_similar_episodes("second", n_results=1)] == ["second"]
+
+def test_memory_manager_uses_persistent_store(tmp_path, monkeypatch):
+    from gamma_engine.core.config import settings
+    from gamma_engine.core.memory_manager import MemoryManager
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "episodic_store_path", str(tmp_path / "episodes"))
+    manager = MemoryManager(session_id="s1")
+    manager.record_episode("refactor the billing module", {}, [], "success", reflection="small commits")
+    manager.record_episode("plan a team offsite", {}, [], "success")
+
+    results = MemoryManager(session_id="s2").get_similar_episodes("billing module refactor")
+
+    assert [e.goal for e in results] == ["refactor the billing module"]
+
+
+def test_clearing_a_session_keeps_shared_episodes(tmp_path, monkeypatch, mocker):
+    from gamma_engine.core.config import settings
+    from gamma_engine.core.memory_manager import MemoryManager
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "episodic_store_path", str(tmp_path / "episodes"))
+    MemoryManager(session_id="s1").record_episode("refactor the billing module", {}, [], "success")
+    other = MemoryManager(session_id="s2")
+    mocker.patch.object(other.long_term_memory, "clear")
+
+    other.clear_all_memory()
+
+    assert len(MemoryManager(session_id="s3").episodic_store) == 1
+
+
+def test_stale_writer_rollback_keeps_committed_vectors(tmp_path):
+    first = EpisodicStore(path=str(tmp_path))
+    stale = EpisodicStore(path=str(tmp_path))
+    first.save_episode(make_episode("committed"))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        stale.save_episode(make_episode("stale row number"))
+
+    reopened = EpisodicStore(path=str(tmp_path))
+    assert [e.goal for e in reopened.episodes] == ["committed"]
+    assert (tmp_path / "embeddings.f32").stat().st_size == 256 * 4
+
+
+def test_managers_share_one_store(tmp_path, monkeypatch):
+    from gamma_engine.core.config import settings
+    from gamma_engine.core.memory_manager import MemoryManager
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "episodic_store_path", str(tmp_path / "shared-episodes"))
+    first, second = MemoryManager(session_id="a"), MemoryManager(session_id="b")
+    first.record_episode("rotate the api keys", {}, [], "success")
+    second.record_episode("upgrade the database", {}, [], "success")
+
+    assert first.episodic_store is second.episodic_store
+    assert len(EpisodicStore(path=str(tmp_path / "shared-episodes"))) == 2
+
+
+def test_store_written_by_another_model_is_reembedded(tmp_path):
+    EpisodicStore(path=str(tmp_path)).save_episode(make_episode("deploy the service"))
+    embed = lambda texts: [[1.0, float(len(t))] for t in texts]
+
+    reopened = EpisodicStore(path=str(tmp_path), embed_fn=embed, embedding_model="tiny")
+    reopened.save_episode(make_episode("second"))
+
+    assert (tmp_path / "embeddings.f32").stat().st_size == 2 * 2 * 4
+    assert len(EpisodicStore(path=str(tmp_path), embed_fn=embed, embedding_model="tiny")) == 2
+
+
+def test_memory_manager_embeds_with_shared_sentence_model(tmp_path, monkeypatch, mocker):
+    from gamma_engine.core.config import settings
+    from gamma_engine.core.memory_manager import MemoryManager
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "episodic_store_path", str(tmp_path / "semantic-episodes"))
+    monkeypatch.setattr(settings, "rag_provider", "local")
+    embedder = mocker.MagicMock(model_name="all-MiniLM-L6-v2")
+    embedder.embed_text.side_effect = lambda texts: [[1.0, 0.0, 0.0] for _ in texts]
+    shared = mocker.MagicMock(is_configured=True)
+    shared.get.return_value.embedder = embedder
+    mocker.patch("gamma_engine.core.memory_manager.get_shared_rag_provider", return_value=shared)
+    mocker.patch("gamma_engine.core.memory_manager.LongTermMemory")
+
+    manager = MemoryManager(session_id="semantic")
+    manager.record_episode("fix the login bug", {}, [], "success")
+
+    assert manager.episodic_store.embedding_model == "all-MiniLM-L6-v2"
+    embedder.embed_text.assert_called()
@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from gamma_engine.core.ingestion.bm25 import BM25Index, tokenize
+from gamma_engine.core.ingestion.embeddings import HashingEmbeddings
+from gamma_engine.core.rag.local import LocalRAGProvider
+from gamma_engine.core.rag.fusion import reciprocal_rank_fusion
+from gamma_engine.tools.rag_tool import KnowledgeBaseSearchTool
+
+
+def test_tokenizer_keeps_identifiers_and_their_parts():
+    tokens = list(tokenize("Open config.yaml: ERR_CONN_RESET."))
+    assert "config.yaml" in tokens and "config" in tokens and "yaml" in tokens
+    assert "err_conn_reset" in tokens and "conn" in tokens
+    assert "." not in tokens
+
+
+def test_bm25_ranks_exact_identifier_first(tmp_path):
+    index = BM25Index(str(tmp_path / "kb.bm25.sqlite"))
+    index.upsert(
+        ["a", "b", "c"],
+        ["the connection was reset", "socket error ERR_CONN_RESET on retry", "reset the password"]
+    )
+
+    hits = index.search("ERR_CONN_RESET", k=2)
+
+    assert hits[0][0] == "b"
+    assert hits[0][1] > 0
+
+
+def test_bm25_upsert_replaces_and_delete_removes(tmp_path):
+    path = str(tmp_path / "kb.bm25.sqlite")
+    index = BM25Index(path)
+    index.upsert(["a", "b"], ["alpha beta", "gamma"])
+    index.upsert(["a"], ["delta"])
+    index.delete(["b"])
+    index.close()
+
+    reopened = BM25Index(path)
+    assert len(reopened) == 1
+    assert reopened.search("alpha") == []
+    assert [id_ for id_, _ in reopened.search("delta")] == ["a"]
+
+
+def test_bm25_rebuild_from_batches():
+    index = BM25Index()
+    index.upsert(["stale"], ["old text"])
+
+    count = index.rebuild([(["a", "b"], ["one", "two"]), (["c"], ["three"])])
+
+    assert count == 3
+    assert index.search("old") == []
+
+
+def test_rrf_rewards_agreement_and_normalizes():
+    fused = dict(reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=60))
+
+    assert fused["b"] > fused["a"] > fused["c"]
+    assert reciprocal_rank_fusion([["a"], ["a"]])[0][1] == pytest.approx(1.0)
+    assert fused["a"] <= 0.5
+
+
+def test_search_tool_drops_dissimilar_passages():
+    rag = MagicMock()
+    rag.is_configured = True
+    rag.create_or_get_corpus.return_value = "corpus"
+    rag.query_rag_corpus.return_value = [
+        {"content": "strong", "source_uri": "a", "score": 1.0, "vector_score": 0.7},
+        {"content": "weak", "source_uri": "b", "score": 0.5, "vector_score": 0.1},
+        {"content": "keyword", "source_uri": "c", "score": 0.5, "vector_score": None, "bm25_score": 3.2},
+        {"content": "unscored", "source_uri": "d"}
+    ]
+    tool = KnowledgeBaseSearchTool(rag, min_similarity=0.3)
+
+    output = tool.execute("query")
+
+    assert "strong" in output and "(score 1.00)" in output
+    assert "weak" not in output
+    assert "keyword" in output and "unscored" in output
+
+
+def test_off_topic_query_returns_fewer_passages(mocker, tmp_path):
+    embedder = HashingEmbeddings(dim=256)
+    embedder.model = object()  # stands in for a loaded sentence-transformers model
+    mocker.patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings", return_value=embedder)
+    provider = LocalRAGProvider(persistence_path=str(tmp_path), vector_backend="numpy")
+    provider.add_texts("kb", ["the deploy pipeline uses canary releases", "api keys are rotated every month"])
+    tool = KnowledgeBaseSearchTool(provider, corpus_display_name="kb")
+
+    on_topic = tool.execute("canary releases in the deploy pipeline", num_results=2)
+    off_topic = tool.execute("banana bread recipe", num_results=2)
+
+    assert "canary" in on_topic
+    assert off_topic == "No relevant information found in the knowledge base for 'banana bread recipe'."
@@ -0,0 +1,145 @@
+import pytest
+
+from gamma_engine.core.ingestion.bulk import BulkIngestor
+from gamma_engine.core.ingestion.manifest import DocumentManifest, DocumentUpdate
+from gamma_engine.core.ingestion.processors import Chunk
+from gamma_engine.core.ingestion.vector_store import VectorStore
+
+
+class DictVectorStore(VectorStore):
+    def __init__(self):
+        self.records = {}
+        self.upserted = []
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        self.upsert_texts(texts, metadatas, ids)
+
+    def upsert_texts(self, texts, metadatas=None, ids=None, embeddings=None):
+        self.upserted.extend(ids)
+        for text, meta, id_ in zip(texts, metadatas, ids):
+            self.records[id_] = (text, meta)
+
+    def delete(self, ids):
+        for id_ in ids:
+            self.records.pop(id_, None)
+
+    def update_metadatas(self, ids, metadatas):
+        for id_, meta in zip(ids, metadatas):
+            self.records[id_] = (self.records[id_][0], meta)
+
+    def find_ids(self, where):
+        return [i for i, (_, meta) in self.records.items() if all(meta.get(k) == v for k, v in where.items())]
+
+    def similarity_search(self, query, k=5):
+        return []
+
+
+class Embedder:
+    def embed_text(self, texts):
+        return [[1.0] for _ in texts]
+
+
+def words(start, stop):
+    return " ".join(f"w{i}" for i in range(start, stop))
+
+
+@pytest.fixture
+def setup(tmp_path):
+    store = DictVectorStore()
+    manifest_path = tmp_path / "store" / "kb.manifest.json"
+
+    def ingest(*paths):
+        ingestor = BulkIngestor(Embedder(), store, batch_size=3, chunk_size=10, overlap=0, manifest=DocumentManifest(str(manifest_path)))
+        return ingestor.ingest_files([str(p) for p in paths])
+
+    return store, ingest, manifest_path
+
+
+def test_unchanged_files_are_skipped(tmp_path, setup):
+    store, ingest, manifest_path = setup
+    doc = tmp_path / "doc.txt"
+    doc.write_text(words(0, 40))
+
+    first = ingest(doc)
+    second = ingest(doc)
+
+    assert first.chunks == 4
+    assert second.skipped_files == 1
+    assert second.chunks == 0
+    assert len(store.records) == 4
+    assert len(DocumentManifest(str(manifest_path)).get("doc.txt").chunks) == 4
+
+
+def test_only_changed_chunks_are_upserted_and_orphans_deleted(tmp_path, setup):
+    store, ingest, _ = setup
+    doc = tmp_path / "doc.txt"
+    doc.write_text(words(0, 40))
+    ingest(doc)
+    store.upserted.clear()
+
+    # Third chunk edited, fourth removed
+    doc.write_text(words(0, 20) + " " + words(100, 110))
+    stats = ingest(doc)
+
+    assert stats.chunks == 1
+    assert [store.records[i][0] for i in store.upserted] == [words(100, 110)]
+    assert sorted(text for text, _ in store.records.values()) == sorted([words(0, 10), words(10, 20), words(100, 110)])
+
+
+def test_moved_chunks_are_relabeled_not_reembedded(tmp_path, setup):
+    store, ingest, _ = setup
+    doc = tmp_path / "doc.txt"
+    doc.write_text(words(0, 20))
+    ingest(doc)
+    store.upserted.clear()
+
+    doc.write_text(words(10, 20) + " " + words(0, 10))
+    stats = ingest(doc)
+
+    assert stats.chunks == 0
+    assert {text: meta["chunk_index"] for text, meta in store.records.values()} == {words(10, 20): 0, words(0, 10): 1}
+
+
+def test_first_ingestion_sweeps_legacy_ids(tmp_path):
+    store = DictVectorStore()
+    store.upsert_texts(["old"], [{"source": "doc.txt", "chunk_index": 0}], ["doc.txt_0"])
+    manifest = DocumentManifest(str(tmp_path / "m.json"))
+
+    update = DocumentUpdate("doc.txt", "hash")
+    record = update.add(Chunk("new text", 0))
+    store.upsert_texts(["new text"], [record.metadata], [record.id])
+    update.apply(store, manifest)
+
+    assert list(store.records) == [record.id]
+    assert DocumentManifest(str(tmp_path / "m.json")).get("doc.txt").file_hash == "hash"
+
+
+def test_repeated_chunks_get_distinct_ids():
+    update = DocumentUpdate("doc.txt", "hash")
+    first = update.add(Chunk("same", 0))
+    second = update.add(Chunk("same", 1))
+    assert first.id != second.id
+
+
+def test_same_file_names_in_different_directories_stay_distinct(tmp_path):
+    for sub in ("a", "b"):
+        (tmp_path / "docs" / sub).mkdir(parents=True)
+        (tmp_path / "docs" / sub / "README.txt").write_text(f"readme of {sub}")
+    store = DictVectorStore()
+    manifest = DocumentManifest(str(tmp_path / "m.json"))
+
+    stats = BulkIngestor(Embedder(), store, chunk_size=10, overlap=0, manifest=manifest).ingest_directory(str(tmp_path / "docs"))
+
+    assert stats.files == 2
+    assert sorted(meta["source"] for _, meta in store.records.values()) == ["a/README.txt", "b/README.txt"]
+    assert manifest.get("a/README.txt") is not None and manifest.get("b/README.txt") is not None
+
+
+def test_legacy_sweep_only_touches_legacy_ids(tmp_path):
+    store = DictVectorStore()
+    store.upsert_texts(["old", "other"], [{"source": "doc.txt"}, {"source": "doc.txt"}], ["doc.txt_0", "doc.txt_from-elsewhere"])
+
+    update = DocumentUpdate("doc.txt", "hash")
+    update.add(Chunk("new text", 0))
+
+    assert update.orphans(store) == ["doc.txt_0"]
@@ -0,0 +1,61 @@
+import sys
+from unittest.mock import MagicMock
+
+from gamma_engine.core.ingestion import loaders
+from gamma_engine.core.ingestion.loaders import Block, PDFLoader, TextLoader
+from gamma_engine.core.ingestion.processors import TextProcessor
+
+
+def test_chunks_carry_page_ranges():
+    pages = [Block(" ".join(f"p{n}w{i}" for i in range(6)), page=n) for n in (1, 2, 3)]
+
+    chunks = list(TextProcessor.iter_chunks(pages, chunk_size=8, overlap=2))
+
+    assert [c.text.split()[0] for c in chunks] == ["p1w0", "p2w0", "p3w0"]
+    assert [(c.page_start, c.page_end) for c in chunks] == [(1, 2), (2, 3), (3, 3)]
+    assert chunks[0].metadata("manual.pdf") == {"source": "manual.pdf", "chunk_index": 0, "page_start": 1, "page_end": 2}
+    assert "page_start" not in next(TextProcessor.iter_chunks([Block("plain text")])).metadata("notes.txt")
+
+
+def test_chunker_is_lazy():
+    consumed = []
+
+    def blocks():
+        for n in range(1, 1000):
+            consumed.append(n)
+            yield Block("word " * 10, page=n)
+
+    first = next(TextProcessor.iter_chunks(blocks(), chunk_size=25, overlap=5))
+
+    assert first.page_end == 3
+    assert len(consumed) == 3
+
+
+def test_text_loader_streams_without_splitting_words(tmp_path, monkeypatch):
+    monkeypatch.setattr(loaders, "TEXT_BLOCK_CHARS", 16)
+    path = tmp_path / "doc.txt"
+    words = [f"token{i:03d}" for i in range(40)]
+    path.write_text(" ".join(words))
+
+    blocks = list(TextLoader().iter_blocks(str(path)))
+
+    assert len(blocks) > 1
+    assert "".join(b.text for b in blocks).split() == words
+    assert TextProcessor.chunk_text(path.read_text(), 10, 3) == [
+        c.text for c in TextProcessor.iter_chunks(blocks, 10, 3)
+    ]
+
+
+def test_pdf_loader_yields_numbered_pages(tmp_path, monkeypatch):
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF")
+    page = MagicMock()
+    page.extract_text.side_effect = ["first page", None]
+    reader = MagicMock(pages=[page, page])
+    fake_pypdf = MagicMock()
+    fake_pypdf.PdfReader.return_value = reader
+    monkeypatch.setitem(sys.modules, "pypdf", fake_pypdf)
+
+    blocks = list(PDFLoader().iter_blocks(str(pdf)))
+
+    assert [(b.page, b.text) for b in blocks] == [(1, "first page"), (2, "")]
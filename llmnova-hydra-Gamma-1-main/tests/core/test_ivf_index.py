@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from benchmarks.ann import _QueryVectors, build_store, format_results, make_vectors, run
+from gamma_engine.core.ingestion.ivf import IVFIndex
+from gamma_engine.core.ingestion.numpy_store import NumpyVectorStore
+
+
+@pytest.fixture
+def data():
+    vectors = make_vectors(4000, 32, clusters=40)
+    queries = vectors[:20] + 0.05
+    return vectors, queries
+
+
+def top_ids(store, queries, k=10, nprobe=None):
+    return [store.similarity_search(f"q{i}", k=k, nprobe=nprobe)["ids"][0] for i in range(len(queries))]
+
+
+def test_index_trains_in_background_and_matches_exact_at_full_probe(tmp_path, data):
+    vectors, queries = data
+    flat = build_store(str(tmp_path / "flat"), vectors, queries, "flat", batch=1000)
+    ivf = build_store(str(tmp_path / "ivf"), vectors, queries, "ivf", batch=1000, nlist=32, index_train_size=2000)
+
+    assert ivf.ivf.trained and ivf.ivf.nlist == 32
+    assert all(s.lists is not None for s in ivf._segments.values())
+    assert top_ids(ivf, queries, nprobe=32) == top_ids(flat, queries)
+
+
+def test_nprobe_trades_recall(tmp_path, data):
+    vectors, queries = data
+    flat = build_store(str(tmp_path / "flat"), vectors, queries, "flat", batch=1000)
+    ivf = build_store(str(tmp_path / "ivf"), vectors, queries, "ivf", batch=1000, nlist=32, index_train_size=2000)
+    exact = top_ids(flat, queries)
+
+    def recall(nprobe):
+        found = top_ids(ivf, queries, nprobe=nprobe)
+        return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact)])
+
+    assert recall(1) <= recall(8) <= recall(32) == 1.0
+    assert recall(8) > 0.9
+
+
+def test_index_persists_and_survives_merges(tmp_path, data):
+    vectors, queries = data
+    path = str(tmp_path / "ivf")
+    store = build_store(path, vectors, queries, "ivf", batch=500, nlist=16, index_train_size=1000, max_segments=3)
+    store.merge(all_segments=True)
+    expected = top_ids(store, queries, nprobe=4)
+
+    reopened = NumpyVectorStore(path, embedding_function=_QueryVectors(queries), index="ivf", nprobe=4)
+
+    assert reopened.ivf.nlist == 16
+    assert isinstance(reopened.ivf.centroids, np.memmap)
+    assert all(s.lists is not None for s in reopened._segments.values())
+    assert top_ids(reopened, queries) == expected
+
+
+def test_flat_store_ignores_index_settings(tmp_path, data):
+    vectors, queries = data
+    store = build_store(str(tmp_path), vectors[:500], queries, "flat", index_train_size=10)
+    assert store.ivf is None
+    with pytest.raises(ValueError):
+        store.train_index()
+
+
+def test_kmeans_reseeds_empty_lists():
+    sample = np.repeat(np.eye(4, dtype=np.float32), 10, axis=0)
+    centroids = IVFIndex("unused.npy").train(sample, nlist=4)
+    assert centroids.shape == (4, 4)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0)
+
+
+def test_ann_benchmark_runs(tmp_path):
+    results = run(rows=3000, dim=16, clusters=20, queries=10, k=5, nprobes=(1, 64), nlist=16)
+    assert results["ivf"][-1]["recall@5"] == 1.0
+    assert "nprobe" in format_results(results)
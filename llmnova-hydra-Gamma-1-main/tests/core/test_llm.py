@@ -1,9 +1,9 @@
 
 import pytest
 import json
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from gamma_engine.core.llm import LLMProvider
-from gamma_engine.interfaces.llm_provider import Message
+from gamma_engine.interfaces.llm_provider import Message, async_chat
 
 @pytest.fixture
 def mock_openai(mocker):
@@ -78,3 +78,128 @@ def test_anthropic_call(mocker, mock_redis):
 
     assert response.content == "Claude response"
     mock_client.messages.create.assert_called_once()
+@pytest.mark.asyncio
+async def test_achat_openai_uses_async_client(mock_openai, mock_redis, mocker):
+    mock_async_openai = mocker.patch("gamma_engine.core.llm.AsyncOpenAI")
+    mock_redis.return_value = None
+
+    mock_async_client = MagicMock()
+    mock_async_openai.return_value = mock_async_client
+
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock(message=MagicMock(role="assistant", content="Async hello!"))]
+    mock_async_client.chat.completions.create = AsyncMock(return_value=mock_completion)
+
+    provider = LLMProvider(model="gpt-4o")
+    response = await provider.achat([{"role": "user", "content": "Hi"}])
+    await provider.achat([{"role": "user", "content": "Hi again"}])
+
+    assert response.content == "Async hello!"
+    assert mock_async_client.chat.completions.create.await_count == 2
+    # One shared async client (and connection pool) per provider
+    mock_async_openai.assert_called_once()
+    mock_openai.return_value.chat.completions.create.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_async_chat_falls_back_to_sync_chat():
+    sync_only = MagicMock()
+    sync_only.chat.return_value = Message(role="assistant", content="From thread")
+
+    response = await async_chat(sync_only, [{"role": "user", "content": "Hi"}], tool_choice="auto")
+
+    assert response.content == "From thread"
+    sync_only.chat.assert_called_once_with(
+        history=[{"role": "user", "content": "Hi"}], tools=None, tool_choice="auto"
+    )
+
+def _stream_chunk(content=None, tool_calls=None):
+    delta = MagicMock(role=None, content=content, tool_calls=tool_calls)
+    return MagicMock(choices=[MagicMock(delta=delta)])
+
+@pytest.mark.asyncio
+async def test_astream_openai_yields_deltas_and_final_message(mock_openai, mock_redis, mocker):
+    mock_async_openai = mocker.patch("gamma_engine.core.llm.AsyncOpenAI")
+    mock_redis.return_value = None
+
+    function_fragment_1 = MagicMock(arguments='{"path": ')
+    function_fragment_1.name = "read_file"
+    function_fragment_2 = MagicMock(arguments='"a.txt"}')
+    function_fragment_2.name = None
+    chunks = [
+        _stream_chunk(content="Let me "),
+        _stream_chunk(content="check."),
+        _stream_chunk(tool_calls=[MagicMock(index=0, id="call_1", function=function_fragment_1)]),
+        _stream_chunk(tool_calls=[MagicMock(index=0, id=None, function=function_fragment_2)]),
+    ]
+
+    async def fake_stream():
+        for chunk in chunks:
+            yield chunk
+
+    mock_async_openai.return_value.chat.completions.create = AsyncMock(return_value=fake_stream())
+
+    provider = LLMProvider(model="gpt-4o")
+    events = [e async for e in provider.astream([{"role": "user", "content": "Hi"}])]
+
+    assert [e.content for e in events if e.type == "text"] == ["Let me ", "check."]
+    assert "".join(e.content for e in events if e.type == "tool_call") == '{"path": "a.txt"}'
+    final = events[-1].message
+    assert events[-1].type == "message"
+    assert final.content == "Let me check."
+    assert final.tool_calls[0].function.name == "read_file"
+    assert json.loads(final.tool_calls[0].function.arguments) == {"path": "a.txt"}
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_achat_calls_are_coalesced(mock_openai, mock_redis, mocker):
+    import asyncio
+    mock_async_openai = mocker.patch("gamma_engine.core.llm.AsyncOpenAI")
+    mock_redis.return_value = None
+
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock(message=MagicMock(role="assistant", content="Shared"))]
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.05)
+        return mock_completion
+
+    create = AsyncMock(side_effect=slow_create)
+    mock_async_openai.return_value.chat.completions.create = create
+
+    provider = LLMProvider(model="gpt-4o")
+    history = [{"role": "user", "content": "Same prompt"}]
+    responses = await asyncio.gather(*[provider.achat(history) for _ in range(3)])
+
+    assert [r.content for r in responses] == ["Shared"] * 3
+    assert create.await_count == 1
+    assert len({id(r) for r in responses}) == 3  # each caller gets its own copy
+
+@pytest.mark.asyncio
+async def test_achat_keeps_redis_round_trips_off_the_event_loop(mock_openai, mock_redis, mocker):
+    import threading
+    mocker.patch("gamma_engine.core.llm.settings.llm_coalesce_across_workers", True)
+    mock_async_openai = mocker.patch("gamma_engine.core.llm.AsyncOpenAI")
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock(message=MagicMock(role="assistant", content="Hi"))]
+    mock_async_openai.return_value.chat.completions.create = AsyncMock(return_value=mock_completion)
+
+    loop_thread = threading.get_ident()
+    redis_threads = []
+
+    def record(result):
+        def call(*args, **kwargs):
+            redis_threads.append(threading.get_ident())
+            return result
+        return call
+
+    client = MagicMock()
+    client.get.side_effect = record(None)
+    client.set.side_effect = record(True)
+    client.eval.side_effect = record(1)
+    mock_redis.return_value = client
+
+    provider = LLMProvider(model="gpt-4o")
+    response = await provider.achat([{"role": "user", "content": "Hi"}])
+
+    assert response.content == "Hi"
+    assert client.get.called and client.set.called and client.eval.called
+    assert loop_thread not in redis_threads
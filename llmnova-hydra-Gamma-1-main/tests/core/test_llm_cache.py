@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock
+
+from gamma_engine.core.llm_cache import HistoryHasher, InMemoryLRUTier, LLMResponseCache, RedisTier
+from gamma_engine.core.metrics import get_metrics_collector
+from gamma_engine.interfaces.llm_provider import Message
+
+
+def _msg(content):
+    return Message(role="assistant", content=content)
+
+
+def test_lru_tier_evicts_least_recently_used():
+    tier = InMemoryLRUTier(max_entries=2)
+    tier.set("a", _msg("A"), "x")
+    tier.set("b", _msg("B"), "x")
+    tier.get("a")  # 'a' becomes most recent
+    tier.set("c", _msg("C"), "x")
+
+    assert tier.get("b") is None
+    assert tier.get("a").content == "A"
+    assert tier.get("c").content == "C"
+
+
+def test_lru_tier_enforces_byte_budget_and_ttl(monkeypatch):
+    tier = InMemoryLRUTier(max_entries=10, max_bytes=10, ttl_seconds=5)
+    tier.set("a", _msg("A"), "123456")
+    tier.set("b", _msg("B"), "123456")
+    assert tier.get("a") is None  # evicted to stay under 10 bytes
+
+    clock = [1000.0]
+    monkeypatch.setattr("gamma_engine.core.llm_cache.time.monotonic", lambda: clock[0])
+    tier.set("c", _msg("C"), "1")
+    clock[0] += 6
+    assert tier.get("c") is None
+
+
+def test_redis_hit_is_promoted_to_memory_tier():
+    redis_client = MagicMock()
+    redis_client.get.return_value = _msg("from redis").model_dump_json()
+    memory = InMemoryLRUTier()
+    cache = LLMResponseCache([memory, RedisTier(lambda: redis_client)])
+
+    assert cache.get("k").content == "from redis"
+    redis_client.get.reset_mock()
+    assert cache.get("k").content == "from redis"
+    redis_client.get.assert_not_called()
+
+
+def test_cache_works_without_redis_and_records_metrics():
+    metrics = get_metrics_collector()
+    metrics.reset()
+    cache = LLMResponseCache([InMemoryLRUTier(), RedisTier(lambda: None)])
+
+    assert cache.get("k") is None
+    cache.set("k", _msg("hello"))
+    assert cache.get("k").content == "hello"
+
+    assert metrics.get_metric("llm.cache.misses").value == 1
+    assert metrics.get_metric("llm.cache.hits", labels={"tier": "memory"}).value == 1
+    assert len(metrics.get_metric("llm.cache.lookup_ms").value) == 2
+
+
+def test_history_hasher_is_stable_and_incremental(mocker):
+    hasher = HistoryHasher()
+    history = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+    key = hasher.key("gpt-4o", history, None, None, 0.0)
+
+    # Equal content in fresh dicts yields the same key
+    assert hasher.key("gpt-4o", [dict(m) for m in history], None, None, 0.0) == key
+    assert hasher.key("gpt-4o", history, None, None, 0.5) != key
+
+    # Appending one message only serializes the new message
+    spy = mocker.spy(HistoryHasher, "_sha256_json")
+    extended = history + [{"role": "assistant", "content": "hello"}]
+    assert hasher.key("gpt-4o", extended, None, None, 0.0) != key
+    assert spy.call_count == 1
+
+
+def test_history_hasher_memo_matches_serialized_content():
+    hasher = HistoryHasher()
+
+    def key(*history, tools=None):
+        return hasher.key("gpt-4o", list(history), tools, None, 0.0)
+
+    assert key({"role": "user", "content": "hi"}) != key({"role": "user", "content": "hi", "name": None})
+    assert key({"role": "user", "content": "hi", "n": 1}) != key({"role": "user", "content": "hi", "n": True})
+    assert key({"role": "user", "content": "hi", "name": None}) == HistoryHasher().key(
+        "gpt-4o", [{"role": "user", "content": "hi", "name": None}], None, None, 0.0
+    )
+
+    # The tools memo follows the schemas' content, not the list's identity
+    tools = [{"name": "read", "parameters": {}}]
+    before = key({"role": "user", "content": "hi"}, tools=tools)
+    tools[0]["parameters"] = {"path": "string"}
+    assert key({"role": "user", "content": "hi"}, tools=tools) != before
@@ -0,0 +1,205 @@
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock
+
+from gamma_engine.core.llm_router import CircuitBreaker, LatencyTracker, RoutedLLMProvider
+from gamma_engine.interfaces.llm_provider import Message
+
+
+class FakeBackend:
+    """Async backend with a fixed delay that records cancellations."""
+
+    def __init__(self, model, delay=0.0, error=None):
+        self.model = model
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def achat(self, history, tools=None, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return Message(role="assistant", content=self.model)
+
+    def chat(self, history, tools=None, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return Message(role="assistant", content=self.model)
+
+    async def astream(self, history, tools=None, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        for part in ("hello", self.model):
+            yield part
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker()
+    assert tracker.percentile(0.95) is None
+    for i in range(1, 101):
+        tracker.add(i / 100)
+    assert tracker.percentile(0.5) == pytest.approx(0.51)
+    assert tracker.percentile(0.95) == pytest.approx(0.96)
+
+
+def test_circuit_breaker_opens_on_errors_and_recovers():
+    breaker = CircuitBreaker(error_rate_threshold=0.5, min_calls=4, cooldown=0.0)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker._state == CircuitBreaker.OPEN
+
+    # Cool-down elapsed: exactly one trial is admitted
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_release_only_frees_the_trial_it_claimed():
+    breaker = CircuitBreaker(error_rate_threshold=0.5, min_calls=1, cooldown=60)
+    closed_token = breaker.claim()
+    breaker.record_failure()
+    breaker._opened_at -= 60  # cool-down elapsed
+
+    trial = breaker.claim()
+    assert closed_token == 0 and trial
+    breaker.release(closed_token)  # a cancelled call that was admitted while closed
+    assert breaker.claim() is None
+
+    breaker.release(trial)
+    assert breaker.claim()
+
+
+def test_circuit_breaker_opens_on_latency():
+    breaker = CircuitBreaker(latency_threshold=1.0, min_calls=3, cooldown=60)
+    for _ in range(3):
+        breaker.record_success(2.0)
+    assert not breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_and_cancels_slow_primary():
+    primary = FakeBackend("gpt-4o", delay=1.0)
+    secondary = FakeBackend("claude-3-5-sonnet-latest", delay=0.0)
+    router = RoutedLLMProvider([primary, secondary], default_hedge_delay=0.05)
+
+    response = await router.achat([{"role": "user", "content": "hi"}])
+    await asyncio.sleep(0)
+
+    assert response.content == "claude-3-5-sonnet-latest"
+    assert primary.cancelled
+    # A cancelled loser is not counted as a failure
+    assert not router.backends[0].breaker._outcomes
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    primary = FakeBackend("gpt-4o", delay=0.0)
+    secondary = FakeBackend("claude-3-5-sonnet-latest")
+    router = RoutedLLMProvider([primary, secondary], default_hedge_delay=1.0)
+
+    response = await router.achat([{"role": "user", "content": "hi"}])
+
+    assert response.content == "gpt-4o"
+    assert secondary.calls == 0
+    assert len(router.backends[0].latency) == 1
+
+
+@pytest.mark.asyncio
+async def test_failover_on_error_and_skips_open_circuit():
+    primary = FakeBackend("gpt-4o", error=RuntimeError("OpenAI API Error: boom"))
+    secondary = FakeBackend("claude-3-5-sonnet-latest")
+    router = RoutedLLMProvider(
+        [primary, secondary],
+        breaker_factory=lambda: CircuitBreaker(min_calls=1, cooldown=60)
+    )
+
+    response = await router.achat([{"role": "user", "content": "hi"}])
+    assert response.content == "claude-3-5-sonnet-latest"
+    assert router.backends[0].breaker.state == CircuitBreaker.OPEN
+
+    await router.achat([{"role": "user", "content": "again"}])
+    assert primary.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises():
+    router = RoutedLLMProvider([
+        FakeBackend("a", error=RuntimeError("down")),
+        FakeBackend("b", error=RuntimeError("down")),
+    ])
+    with pytest.raises(RuntimeError, match="All LLM backends failed"):
+        await router.achat([{"role": "user", "content": "hi"}])
+
+
+def test_sync_chat_fails_over():
+    primary = FakeBackend("gpt-4o", error=RuntimeError("down"))
+    secondary = FakeBackend("claude-3-5-sonnet-latest")
+    router = RoutedLLMProvider([primary, secondary])
+
+    assert router.chat([{"role": "user", "content": "hi"}]).content == "claude-3-5-sonnet-latest"
+    assert router.model == "gpt-4o"
+
+
+def test_hedge_delay_uses_recent_percentile():
+    router = RoutedLLMProvider([MagicMock(model="m")], default_hedge_delay=5.0, min_hedge_delay=0.1, min_latency_samples=10)
+    backend = router.backends[0]
+    assert router.hedge_delay(backend) == 5.0
+    for _ in range(10):
+        backend.latency.add(0.4)
+    assert router.hedge_delay(backend) == pytest.approx(0.4)
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_is_only_claimed_when_called():
+    primary = FakeBackend("gpt-4o")
+    secondary = FakeBackend("claude-3-5-sonnet-latest")
+    router = RoutedLLMProvider([primary, secondary], breaker_factory=lambda: CircuitBreaker(min_calls=1, cooldown=0.0))
+    router.backends[1].breaker.record_failure()
+
+    await router.achat([{"role": "user", "content": "hi"}])
+    router.chat([{"role": "user", "content": "hi"}])
+
+    # The secondary was never called, so its trial is still free
+    assert secondary.calls == 0
+    assert router.backends[1].breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_stream_is_hedged_until_first_event():
+    primary = FakeBackend("gpt-4o", delay=1.0)
+    secondary = FakeBackend("claude-3-5-sonnet-latest")
+    router = RoutedLLMProvider([primary, secondary], default_hedge_delay=0.05)
+
+    events = [event async for event in router.astream([{"role": "user", "content": "hi"}])]
+
+    assert events == ["hello", "claude-3-5-sonnet-latest"]
+    assert primary.cancelled
+    assert not router.backends[0].breaker._outcomes
+    assert len(router.backends[1].first_event_latency) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_event():
+    router = RoutedLLMProvider([FakeBackend("gpt-4o", error=RuntimeError("down")), FakeBackend("claude-3-5-sonnet-latest")])
+
+    events = [event async for event in router.astream([{"role": "user", "content": "hi"}])]
+
+    assert events[-1] == "claude-3-5-sonnet-latest"
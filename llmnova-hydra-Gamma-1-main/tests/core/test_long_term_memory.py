@@ -0,0 +1,122 @@
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+from gamma_engine.core.long_term_memory import LongTermMemory
+from gamma_engine.core.ltm_write_queue import KnowledgeWriteQueue
+
+
+@pytest.fixture
+def provider():
+    rag = MagicMock()
+    rag.is_configured = True
+    rag.add_texts.side_effect = lambda corpus, texts, metadatas=None, ids=None: ids
+    return rag
+
+
+def test_queue_batches_by_count(provider):
+    queue = KnowledgeWriteQueue(provider, batch_size=3, flush_interval=60)
+
+    for i in range(3):
+        queue.put("ltm-a", f"fact {i}", {"source": "test"}, f"id-{i}")
+
+    deadline = time.monotonic() + 2
+    while provider.add_texts.call_count == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queue.close()
+
+    provider.add_texts.assert_called_once()
+    args, kwargs = provider.add_texts.call_args
+    assert args[0] == "ltm-a"
+    assert args[1] == ["fact 0", "fact 1", "fact 2"]
+    assert kwargs["ids"] == ["id-0", "id-1", "id-2"]
+
+
+def test_queue_flushes_after_interval(provider):
+    queue = KnowledgeWriteQueue(provider, batch_size=100, flush_interval=0.05)
+    queue.put("ltm-a", "fact", {}, "id")
+
+    deadline = time.monotonic() + 2
+    while provider.add_texts.call_count == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert provider.add_texts.call_count == 1
+    assert queue.pending == 0
+    queue.close()
+
+
+def test_close_writes_pending_once_per_corpus(provider):
+    queue = KnowledgeWriteQueue(provider, batch_size=100, flush_interval=60)
+    queue.put("ltm-a", "a1", {}, "1")
+    queue.put("ltm-b", "b1", {}, "2")
+    queue.put("ltm-a", "a2", {}, "3")
+
+    queue.close()
+
+    written = {call.args[0]: call.args[1] for call in provider.add_texts.call_args_list}
+    assert written == {"ltm-a": ["a1", "a2"], "ltm-b": ["b1"]}
+
+
+def test_queue_creates_each_corpus_before_its_first_write(provider):
+    calls = []
+    provider.create_or_get_corpus.side_effect = lambda corpus: calls.append(("create", corpus)) or corpus
+    provider.add_texts.side_effect = lambda corpus, texts, metadatas=None, ids=None: calls.append(("add", corpus)) or ids
+    queue = KnowledgeWriteQueue(provider, batch_size=100, flush_interval=60)
+
+    queue.put("ltm-a", "a1", {}, "1")
+    queue.flush()
+    queue.put("ltm-a", "a2", {}, "2")
+    queue.flush()
+    queue.discard("ltm-a")  # e.g. the corpus is about to be deleted
+    queue.put("ltm-a", "a3", {}, "3")
+    queue.close()
+
+    assert calls == [("create", "ltm-a"), ("add", "ltm-a"), ("add", "ltm-a"), ("create", "ltm-a"), ("add", "ltm-a")]
+
+
+def test_ltm_queues_facts_and_flushes_before_retrieval(mocker, provider):
+    mocker.patch("gamma_engine.core.long_term_memory.get_shared_rag_provider", return_value=provider)
+    queue = KnowledgeWriteQueue(provider, batch_size=100, flush_interval=60)
+    mocker.patch("gamma_engine.core.long_term_memory.get_write_queue", return_value=queue)
+    ltm = LongTermMemory(session_id="s1")
+
+    ltm.add_knowledge("User prefers Python", source="conversation_history", metadata={"tags": ["x"], "turn": 3})
+    provider.add_texts.assert_not_called()
+
+    ltm.retrieve_knowledge("language")
+
+    args, kwargs = provider.add_texts.call_args
+    assert args[0] == "ltm-s1"
+    assert args[1][0].endswith("User prefers Python")
+    assert kwargs["metadatas"][0]["source"] == "conversation_history"
+    assert kwargs["metadatas"][0]["turn"] == 3
+    assert "tags" not in kwargs["metadatas"][0]
+    provider.query_rag_corpus.assert_called_once_with("ltm-s1", "language", num_results=3)
+    queue.close()
+
+
+def test_clear_discards_queued_facts_and_deletes_corpus(mocker, provider):
+    mocker.patch("gamma_engine.core.long_term_memory.get_shared_rag_provider", return_value=provider)
+    queue = KnowledgeWriteQueue(provider, batch_size=100, flush_interval=60)
+    mocker.patch("gamma_engine.core.long_term_memory.get_write_queue", return_value=queue)
+    provider.delete_corpus.return_value = True
+    ltm = LongTermMemory(session_id="s1")
+    ltm.add_knowledge("User prefers Python")
+
+    ltm.clear()
+    queue.close()
+
+    provider.delete_corpus.assert_called_once_with("ltm-s1")
+    provider.add_texts.assert_not_called()
+
+
+def test_retrieve_knowledge_fans_out_to_other_corpora(mocker, provider):
+    mocker.patch("gamma_engine.core.long_term_memory.get_shared_rag_provider", return_value=provider)
+    mocker.patch("gamma_engine.core.long_term_memory.get_write_queue", return_value=None)
+    ltm = LongTermMemory(session_id="s1")
+
+    ltm.retrieve_knowledge("deploys", other_corpora=["session-s1-corpus"])
+
+    provider.query_many.assert_called_once_with(["ltm-s1", "session-s1-corpus"], "deploys", num_results=3)
+    provider.query_rag_corpus.assert_not_called()
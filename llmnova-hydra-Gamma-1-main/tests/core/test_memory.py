@@ -2,8 +2,14 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from gamma_engine.core.memory import WorkingMemory
+from gamma_engine.core.tokenizer import count_message_tokens
 from gamma_engine.interfaces.llm_provider import Message
 
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    """Session journals are written under ./file_storage; keep each test's history separate."""
+    monkeypatch.chdir(tmp_path)
+
 @pytest.fixture
 def mock_redis_client(mocker):
     return mocker.patch("gamma_engine.core.memory.get_redis_client")
@@ -21,7 +27,8 @@ def test_memory_load_from_redis(mock_redis_client):
     # Mock Redis returning a list of JSON strings
     msg1 = Message(role="user", content="hello")
     msg2 = Message(role="assistant", content="hi")
-    mock_redis.lrange.return_value = [msg1.model_dump_json(), msg2.model_dump_json()]
+    # Pipelined load: summary, list length, tail of the list
+    mock_redis.pipeline.return_value.execute.return_value = [None, [msg1.model_dump_json(), msg2.model_dump_json()]]
 
     memory = WorkingMemory(session_id="test_session")
     
@@ -37,7 +44,8 @@ def test_memory_add_and_append(mock_redis_client):
     memory = WorkingMemory(session_id="test_session_new")
     memory.messages = [] # Force clear if it loaded from file/redis
     memory.add(role="user", content="new message")
-    
+    memory.flush()
+
     assert len(memory.messages) == 1
     assert memory.messages[0].content == "new message"
     
@@ -57,7 +65,7 @@ def test_memory_clear(mock_redis_client):
     memory.clear()
     
     assert len(memory.messages) == 0
-    mock_redis.delete.assert_called_with("session:test_session:history")
+    mock_redis.delete.assert_called_with("session:test_session:history", "session:test_session:summary")
 
 def test_get_context(mock_redis_client):
     memory = WorkingMemory(session_id="test_session")
@@ -81,3 +89,93 @@ def test_prune_memory(mock_redis_client):
     # Since specific prune logic depends on implementation details (which are placeholders),
     # we mainly check that it doesn't crash and maintains some state.
     assert len(memory.messages) >= 1
+
+def test_token_total_is_maintained_incrementally(mock_redis_client):
+    """The running total tracks appends, in-place edits and pruning without re-tokenizing."""
+    mock_redis_client.return_value = None
+    memory = WorkingMemory(session_id="test_tokens", model="gpt-4o")
+    memory.messages = []
+    memory.add("user", "hello world")
+    memory.add("assistant", "hi there")
+
+    expected = sum(count_message_tokens(m, memory.tokenizer) for m in memory.messages)
+    assert memory.get_token_count() == expected
+
+    memory.messages.insert(0, Message(role="system", content="You are Gamma."))
+    assert memory.get_token_count() == sum(count_message_tokens(m, memory.tokenizer) for m in memory.messages)
+
+    memory._replace_range(0, 2)
+    assert memory.get_token_count() == count_message_tokens(memory.messages[0], memory.tokenizer)
+
+def test_budget_defaults_to_model_context_window(mock_redis_client):
+    mock_redis_client.return_value = None
+    assert WorkingMemory(session_id="test_budget", model="claude-3-5-sonnet-latest").max_tokens == 200_000 - 4096
+    assert WorkingMemory(session_id="test_budget").max_tokens == 4000
+
+def test_redis_writes_are_batched(mock_redis_client):
+    mock_redis = MagicMock()
+    mock_redis_client.return_value = mock_redis
+    memory = WorkingMemory(session_id="test_batch")
+    memory.messages = []
+
+    memory.add("user", "one")
+    memory.add("assistant", "two")
+    mock_redis.rpush.assert_not_called()
+
+    memory.get_context()  # flushed once before the next LLM call
+    mock_redis.rpush.assert_called_once()
+    assert len(mock_redis.rpush.call_args[0]) == 3
+
+def test_redis_tail_load_and_trim_follow_pruning(mock_redis_client):
+    mock_redis = MagicMock()
+    mock_redis_client.return_value = mock_redis
+    summary = Message(role="system", content="Previous Context: earlier work")
+    tail = [Message(role="user", content=f"m{i}").model_dump_json() for i in range(4)]
+    mock_redis.pipeline.return_value.execute.return_value = [summary.model_dump_json(), tail]
+
+    memory = WorkingMemory(session_id="test_trim")
+    assert [m.content for m in memory.messages] == ["Previous Context: earlier work", "m0", "m1", "m2", "m3"]
+
+    # Summary + two list entries are folded into a new summary
+    memory._replace_range(0, 3, Message(role="system", content="Previous Context: newer"))
+
+    pipe = mock_redis.pipeline.return_value
+    # The six entries that were never loaded go too; the two remaining loaded entries are kept
+    pipe.ltrim.assert_called_once_with("session:test_trim:history", -2, -1)
+    pipe.set.assert_called_once()
+    assert "newer" in pipe.set.call_args[0][1]
+
+def test_redis_trim_after_messages_are_replaced(mock_redis_client):
+    mock_redis = MagicMock()
+    mock_redis_client.return_value = mock_redis
+    tail = [Message(role="user", content=f"m{i}").model_dump_json() for i in range(4)]
+    mock_redis.pipeline.return_value.execute.return_value = [None, tail]
+    memory = WorkingMemory(session_id="test_replaced")
+
+    # e.g. load_from_file after the Redis load: none of these are known list entries
+    memory.messages = [Message(role="user", content=f"f{i}") for i in range(4)]
+    memory.add("user", "new")
+    memory._replace_range(0, 2, Message(role="system", content="Previous Context: f0 f1"))
+    pipe = mock_redis.pipeline.return_value
+    pipe.ltrim.assert_not_called()
+
+    memory._replace_range(1, 4, None)  # f2, f3 and "new"
+    pipe.delete.assert_called_once_with("session:test_replaced:history")
+
+def test_redis_load_adopts_only_what_the_journal_lacks(mock_redis_client):
+    mock_redis_client.return_value = None
+    offline = WorkingMemory(session_id="test_adopt")
+    for i in range(5):
+        offline.add("user", f"m{i}")
+    offline.save_to_file()
+
+    mock_redis = MagicMock()
+    mock_redis_client.return_value = mock_redis
+    tail = [Message(role="user", content=f"m{i}").model_dump_json() for i in range(3, 6)]
+    mock_redis.pipeline.return_value.execute.return_value = [None, tail]
+    memory = WorkingMemory(session_id="test_adopt")
+    memory._replace_range(0, 1, None)  # m3, by its journal sequence number
+    memory.save_to_file()
+
+    # Older history stays on disk; m5 (only in Redis) was journaled
+    assert [m.content for m in memory.journal.load_all()] == ["m0", "m1", "m2", "m4", "m5"]
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock
+
+from gamma_engine.core.memory import EpisodicMemory
+from gamma_engine.core.memory_summarizer import SUMMARY_PREFIX, parse_summary
+from gamma_engine.core.tokenizer import HeuristicTokenizer
+from gamma_engine.interfaces.llm_provider import Message
+
+SUMMARY_JSON = '{"summary": "User is building a CLI.", "entities": ["Project: CLI"]}'
+
+
+class SlowLLM:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.started = asyncio.Event()
+
+    async def achat(self, history, tools=None, **kwargs):
+        self.calls += 1
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        return Message(role="assistant", content=SUMMARY_JSON)
+
+    def chat(self, history, tools=None, **kwargs):
+        self.calls += 1
+        return Message(role="assistant", content=SUMMARY_JSON)
+
+
+class FailingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def achat(self, history, tools=None, **kwargs):
+        self.calls += 1
+        raise RuntimeError("rate limited")
+
+
+@pytest.fixture(autouse=True)
+def isolated_memory(mocker, tmp_path):
+    mocker.patch("gamma_engine.core.memory.get_redis_client", return_value=None)
+    return mocker.patch("gamma_engine.core.memory.LongTermMemory")
+
+
+def make_memory(llm, max_tokens=200, tmp_path=None):
+    memory = EpisodicMemory(
+        session_id="summarizer-test",
+        llm_provider=llm,
+        max_tokens=max_tokens,
+        storage_path=str(tmp_path),
+        tokenizer=HeuristicTokenizer()
+    )
+    memory.summarizer.keep_recent = 2
+    return memory
+
+
+def fill(memory, count, size=80):
+    for i in range(count):
+        memory.add("user" if i % 2 == 0 else "assistant", f"{i}:" + "x" * size)
+
+
+def test_parse_summary_variants():
+    assert parse_summary(SUMMARY_JSON) == ("User is building a CLI.", ["Project: CLI"])
+    assert parse_summary(f"```json\n{SUMMARY_JSON}\n```")[0] == "User is building a CLI."
+    assert parse_summary("plain text summary") == ("plain text summary", [])
+
+
+@pytest.mark.asyncio
+async def test_soft_threshold_summarizes_in_background(tmp_path):
+    llm = SlowLLM()
+    memory = make_memory(llm, tmp_path=tmp_path)
+
+    fill(memory, 7)  # ~168 tokens: above the soft limit (150), below the hard limit (200)
+    assert memory.summarizer.in_flight
+    assert len(memory.messages) == 7  # append did not wait
+
+    await llm.started.wait()
+    memory.add("user", "arrived during summarization")
+    await memory.summarizer._task
+
+    assert llm.calls == 1  # entities and summary come from one call
+    assert memory.messages[0].content.startswith(SUMMARY_PREFIX)
+    assert memory.messages[-1].content == "arrived during summarization"
+    assert memory.get_token_count() == sum(
+        memory.tokenizer.count(m.content) + 4 for m in memory.messages
+    )
+    memory.long_term_memory.add_knowledge.assert_called_once_with("Project: CLI", source="conversation_history")
+
+
+@pytest.mark.asyncio
+async def test_hard_threshold_waits_for_compaction(tmp_path):
+    memory = make_memory(SlowLLM(), tmp_path=tmp_path)
+    fill(memory, 10)
+    assert memory.get_token_count() > memory.max_tokens
+
+    await memory.ensure_within_budget()
+
+    assert not memory.summarizer.in_flight
+    assert memory.messages[0].content.startswith(SUMMARY_PREFIX)
+
+
+@pytest.mark.asyncio
+async def test_stale_summary_is_discarded(tmp_path):
+    llm = SlowLLM()
+    memory = make_memory(llm, tmp_path=tmp_path)
+    fill(memory, 7)
+    await llm.started.wait()
+
+    memory.messages = memory.messages[3:]  # history rewritten underneath the worker
+    before = list(memory.messages)
+    await memory.summarizer._task
+
+    assert memory.messages == before
+
+
+def test_sync_callers_compact_inline_at_hard_limit(tmp_path):
+    llm = MagicMock()
+    llm.chat.return_value = Message(role="assistant", content=SUMMARY_JSON)
+    memory = make_memory(llm, tmp_path=tmp_path)
+
+    fill(memory, 10)
+
+    assert memory.get_token_count() <= memory.max_tokens
+    assert memory.messages[0].content.startswith(SUMMARY_PREFIX)
+    llm.chat.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_summary_keeps_messages_and_backs_off(tmp_path):
+    llm = FailingLLM()
+    memory = make_memory(llm, tmp_path=tmp_path)
+
+    fill(memory, 7)  # above the soft limit only
+    await memory.summarizer._task
+    memory.add("user", "next turn")
+
+    assert len(memory.messages) == 8
+    assert not memory.summarizer.in_flight  # no retry before retry_delay
+    assert llm.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_summary_drops_span_over_hard_limit(tmp_path):
+    memory = make_memory(FailingLLM(), tmp_path=tmp_path)
+    fill(memory, 10)
+
+    await memory.ensure_within_budget()
+
+    assert memory.get_token_count() <= memory.max_tokens
+    assert not memory.messages[0].content.startswith(SUMMARY_PREFIX)
@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+import pytest
+
+from gamma_engine.core.ingestion.bm25 import BM25Index
+from gamma_engine.core.ingestion.embeddings import HashingEmbeddings
+from gamma_engine.core.ingestion.numpy_store import NumpyVectorStore
+from gamma_engine.core.rag_service import _provider_config
+from gamma_engine.core.rag.local import LocalRAGProvider
+
+embed = HashingEmbeddings(dim=64).embed_text
+
+
+def open_store(path, **kwargs):
+    return NumpyVectorStore(str(path), embedding_function=embed, **kwargs)
+
+
+def test_search_returns_nearest_in_chroma_layout(tmp_path):
+    store = open_store(tmp_path)
+    store.upsert_texts(
+        ["vector index tuning", "baking bread at home", "approximate nearest neighbour index"],
+        [{"source": "a"}, {"source": "b"}, {"source": "c"}],
+        ["a", "b", "c"]
+    )
+
+    result = store.similarity_search("vector index tuning", k=2)
+
+    assert result["ids"][0][0] == "a"
+    assert result["documents"][0][0] == "vector index tuning"
+    assert result["metadatas"][0][0] == {"source": "a"}
+    assert store.similarity(result["distances"][0][0]) == pytest.approx(1.0, abs=1e-2)
+    assert len(result["ids"][0]) == 2
+
+
+def test_upserts_and_deletes_survive_reopen(tmp_path):
+    store = open_store(tmp_path)
+    store.upsert_texts(["one", "two", "three"], [{"n": 1}, {"n": 2}, {"n": 3}], ["1", "2", "3"])
+    store.upsert_texts(["two v2"], [{"n": 22}], ["2"])
+    store.delete(["3"])
+    store.update_metadatas(["1"], [{"n": 11}])
+
+    reopened = open_store(tmp_path)
+
+    assert reopened.count() == 2
+    assert reopened.get_records(["1", "2", "3"]) == {"1": ("one", {"n": 11}), "2": ("two v2", {"n": 22})}
+    assert reopened.find_ids({"n": 22}) == ["2"]
+    assert "3" not in reopened.similarity_search("three", k=5)["ids"][0]
+
+
+def test_background_merge_drops_dead_rows(tmp_path):
+    store = open_store(tmp_path, max_segments=2)
+    for i in range(6):
+        store.upsert_texts([f"text {i}", f"other {i}"], None, [f"a{i}", f"b{i}"])
+        store.wait_for_maintenance()
+    store.delete([f"b{i}" for i in range(6)])
+    store.merge(all_segments=True)
+
+    assert store.segment_count == 1
+    assert store.count() == 6
+    reopened = open_store(tmp_path)
+    assert reopened.segment_count == 1
+    assert sorted(reopened.get_records([f"a{i}" for i in range(6)])) == [f"a{i}" for i in range(6)]
+    assert len(list(tmp_path.glob("seg-*.vectors"))) == 1
+
+
+def test_float16_storage_and_precomputed_embeddings(tmp_path):
+    store = open_store(tmp_path, dtype="float16")
+    vectors = np.eye(4, dtype=np.float32).tolist()
+    store.upsert_texts(["x", "y", "z", "w"], None, ["x", "y", "z", "w"], embeddings=vectors)
+
+    assert np.dtype(np.float16).itemsize * 4 * 4 == (tmp_path / "seg-000001.vectors").stat().st_size
+
+
+def test_keyword_index_follows_writes(tmp_path):
+    index = BM25Index()
+    store = open_store(tmp_path, keyword_index=index)
+    store.upsert_texts(["ERR_DISK_FULL raised"], None, ["e"])
+    assert [i for i, _ in index.search("err_disk_full")] == ["e"]
+    store.delete(["e"])
+    assert index.search("err_disk_full") == []
+
+
+def test_open_is_fast_for_large_store(tmp_path):
+    store = open_store(tmp_path)
+    rng = np.random.default_rng(0)
+    for batch in range(4):
+        ids = [f"{batch}-{i}" for i in range(5000)]
+        store.upsert_texts(ids, None, ids, embeddings=rng.standard_normal((5000, 64)).tolist())
+
+    start = time.perf_counter()
+    reopened = open_store(tmp_path)
+    elapsed = time.perf_counter() - start
+
+    assert reopened.count() == 20000
+    assert elapsed < 0.5
+
+
+def test_numpy_provider_type_selects_backend():
+    cls, config = _provider_config("numpy", {})
+    assert cls is LocalRAGProvider
+    assert config["vector_backend"] == "numpy"
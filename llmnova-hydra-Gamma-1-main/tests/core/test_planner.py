@@ -57,3 +57,15 @@ def test_get_next_step():
     next_step = planner.get_next_step()
     assert next_step.id == 2
     assert next_step.description == "Task 2"
+
+@pytest.mark.asyncio
+async def test_acreate_plan_uses_native_async(mock_llm):
+    from unittest.mock import AsyncMock
+    mock_llm.achat = AsyncMock(return_value=Message(role="assistant", content='["Step A", "Step B"]'))
+    planner = Planner(mock_llm)
+
+    plan = await planner.acreate_plan("My Goal")
+
+    assert [s.description for s in plan] == ["Step A", "Step B"]
+    mock_llm.achat.assert_awaited_once()
+    mock_llm.chat.assert_not_called()
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from benchmarks.ann import _QueryVectors, build_store, make_vectors
+from benchmarks.quantization import format_results, run
+from gamma_engine.core.ingestion.numpy_store import NumpyVectorStore
+from gamma_engine.core.ingestion.quantization import Int8Quantizer, ProductQuantizer, default_subspaces
+
+
+@pytest.fixture
+def data():
+    vectors = make_vectors(3000, 32, clusters=30)
+    queries = vectors[:20] + 0.05
+    return vectors, queries
+
+
+def top_ids(store, queries, k=10):
+    return [store.similarity_search(f"q{i}", k=k)["ids"][0] for i in range(len(queries))]
+
+
+def test_int8_scores_approximate_inner_products(data):
+    vectors, queries = data
+    quantizer = Int8Quantizer()
+    quantizer.train(vectors)
+    q = queries[0] / np.linalg.norm(queries[0])
+    approx = quantizer.scores(quantizer.encode(vectors), quantizer.prepare(q))
+    assert np.abs(approx - vectors @ q).max() < 0.05
+
+
+def test_pq_codes_are_one_byte_per_subspace(data):
+    vectors, _ = data
+    quantizer = ProductQuantizer(8)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.shape == (3000, 8) and codes.dtype == np.uint8
+    q = vectors[0]
+    approx = quantizer.scores(codes, quantizer.prepare(q))
+    assert np.corrcoef(approx, vectors @ q)[0, 1] > 0.9
+
+
+@pytest.mark.parametrize("quantization", ["int8", "pq"])
+def test_quantized_store_reranks_to_exact_results(tmp_path, data, quantization):
+    vectors, queries = data
+    flat = build_store(str(tmp_path / "flat"), vectors, queries, "flat", batch=1000)
+    store = build_store(
+        str(tmp_path / quantization), vectors, queries, "flat", batch=1000,
+        quantization=quantization, index_train_size=2000, rerank_factor=30
+    )
+
+    assert store.quantizer is not None
+    assert all(s.codes is not None for s in store._segments.values())
+    assert top_ids(store, queries) == top_ids(flat, queries)
+
+
+def test_quantizer_persists_and_combines_with_ivf(tmp_path, data):
+    vectors, queries = data
+    path = str(tmp_path / "store")
+    store = build_store(
+        path, vectors, queries, "ivf", batch=500, nlist=16, index_train_size=1000,
+        quantization="pq", pq_subspaces=8, max_segments=3
+    )
+    store.merge(all_segments=True)
+    expected = top_ids(store, queries)
+
+    reopened = NumpyVectorStore(path, embedding_function=_QueryVectors(queries), index="ivf", quantization="pq")
+
+    assert reopened.quantizer.code_size == 8
+    assert all(isinstance(s.codes, np.memmap) for s in reopened._segments.values())
+    (segment,) = reopened._segments.values()
+    assert segment.codes.shape == (reopened.count(), 8)
+    assert top_ids(reopened, queries) == expected
+
+
+def test_unknown_quantization_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        NumpyVectorStore(str(tmp_path), embedding_function=None, quantization="fp4")
+
+
+def test_default_subspaces_divide_dimension():
+    assert default_subspaces(384) == 48
+    assert default_subspaces(100) == 10
+    assert default_subspaces(7) == 1
+
+
+def test_quantization_benchmark_runs():
+    results = run(rows=3000, dim=16, clusters=20, queries=10, k=5, pq_subspaces=(4,), rerank_factors=(64,))
+    assert [row["recall@5"] for row in results["settings"]] == [1.0, 1.0, 1.0]
+    assert "rerank" in format_results(results)
@@ -0,0 +1,100 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from gamma_engine.core.ingestion.embeddings import HashingEmbeddings
+from gamma_engine.core.rag.base import RAGProvider
+from gamma_engine.core.rag.fusion import dedup_passages, merge_corpus_results
+from gamma_engine.core.rag.local import LocalRAGProvider, _CorpusHits
+from gamma_engine.tools.rag_tool import KnowledgeBaseSearchTool
+
+
+@pytest.fixture
+def provider(mocker, tmp_path):
+    embedder = HashingEmbeddings(dim=64)
+    embedder.model = object()  # stands in for a loaded sentence-transformers model
+    mocker.patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings", return_value=embedder)
+    return LocalRAGProvider(persistence_path=str(tmp_path), vector_backend="numpy")
+
+
+def test_local_query_many_merges_corpora_and_embeds_once(provider, mocker):
+    provider.add_texts("session-1-corpus", ["the deploy pipeline uses canary releases", "lunch menu"], ids=["s1", "s2"])
+    provider.add_texts("ltm-1", ["user asked about canary releases in the deploy pipeline yesterday"], ids=["l1"])
+    embed = mocker.spy(provider.embedder, "embed_text")
+
+    results = provider.query_many(["session-1-corpus", "ltm-1", "never-written"], "canary deploy pipeline", num_results=3)
+
+    assert embed.call_count == 1
+    assert {(r["corpus"], r["id"]) for r in results[:2]} == {("session-1-corpus", "s1"), ("ltm-1", "l1")}
+    assert all(r["vector_score"] is not None for r in results[:2])
+
+
+def test_local_query_many_drops_near_duplicates(provider):
+    text = "the staging database is rebuilt every night at two in the morning"
+    provider.add_texts("session-1-corpus", [text], ids=["a"])
+    provider.add_texts("ltm-1", [text + "."], ids=["b"])
+
+    results = provider.query_many(["session-1-corpus", "ltm-1"], "staging database rebuilt", num_results=5)
+
+    assert len(results) == 1
+
+
+def test_fuse_scales_bm25_per_corpus(provider):
+    def keyword_hits(scores):
+        hits = _CorpusHits()
+        hits.keyword = scores
+        hits.records = {id_: (id_, {}) for id_, _ in scores}
+        return hits
+
+    # A large corpus yields larger raw BM25 scores than a small one
+    fused = provider._fuse([
+        ("big", keyword_hits([("a1", 20.0), ("a2", 10.0)])),
+        ("small", keyword_hits([("b1", 2.0)]))
+    ], num_results=3)
+
+    assert [r["id"] for r in fused] == ["a1", "b1", "a2"]
+    assert fused[1]["bm25_score"] == 2.0
+
+
+def test_default_query_many_runs_corpora_concurrently():
+    class SlowProvider(RAGProvider):
+        is_configured = True
+        create_or_get_corpus = upload_document_to_corpus = None
+
+        def __init__(self):
+            self.barrier = threading.Barrier(3, timeout=2)
+
+        def query_rag_corpus(self, corpus_name, query_text, num_results=5):
+            self.barrier.wait()  # only passes if all three corpora are queried at once
+            return [{"content": f"{corpus_name} passage {i}"} for i in range(2)]
+
+    results = SlowProvider().query_many(["a", "b", "c"], "q", num_results=4)
+
+    # Unscored results are interleaved by rank
+    assert [r["corpus"] for r in results] == ["a", "b", "c", "a"]
+
+
+def test_merge_orders_by_score_and_dedups():
+    merged = merge_corpus_results({
+        "a": [{"content": "alpha beta gamma delta", "score": 0.4}],
+        "b": [{"content": "alpha beta gamma delta", "score": 0.9}, {"content": "other text here", "score": 0.1}]
+    }, num_results=5)
+
+    assert [(r["corpus"], r["score"]) for r in merged] == [("b", 0.9), ("b", 0.1)]
+    assert len(dedup_passages([{"content": "one two three four"}, {"content": "five six seven"}])) == 2
+
+
+def test_search_tool_fans_out_to_additional_corpora():
+    rag = MagicMock()
+    rag.is_configured = True
+    # Display names resolve to provider corpus names (e.g. Vertex resource names)
+    rag.create_or_get_corpus.side_effect = lambda name: f"corpora/{name}"
+    rag.query_many.return_value = [{"content": "fact", "source_uri": "ltm", "corpus": "ltm-1", "score": 0.8}]
+    tool = KnowledgeBaseSearchTool(rag, corpus_display_name="session-1-corpus", additional_corpora=["ltm-1"])
+
+    output = tool.execute("query", num_results=2)
+
+    rag.query_many.assert_called_once_with(["corpora/session-1-corpus", "corpora/ltm-1"], "query", 2)
+    rag.query_rag_corpus.assert_not_called()
+    assert "[ltm-1]" in output
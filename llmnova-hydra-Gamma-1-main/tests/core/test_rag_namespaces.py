@@ -0,0 +1,132 @@
+import os
+import threading
+
+import pytest
+
+from gamma_engine.core.ingestion.embeddings import HashingEmbeddings
+from gamma_engine.core.rag.local import LocalRAGProvider, corpus_namespace
+
+
+@pytest.fixture
+def provider(mocker, tmp_path):
+    embedder = HashingEmbeddings(dim=64)
+    embedder.model = object()  # stands in for a loaded sentence-transformers model
+    mocker.patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings", return_value=embedder)
+    provider = LocalRAGProvider(persistence_path=str(tmp_path), vector_backend="numpy")
+    assert provider.is_configured
+    return provider
+
+
+def test_queries_only_see_their_own_corpus(provider):
+    provider.add_texts("session-a-corpus", ["the deploy uses blue green rollout"], ids=["a1"])
+    provider.add_texts("session-b-corpus", ["the deploy uses canary rollout"], ids=["b1"])
+
+    results = provider.query_rag_corpus("session-a-corpus", "deploy rollout")
+
+    assert [r["id"] for r in results] == ["a1"]
+    assert provider.corpus("session-b-corpus").vector_store.count() == 1
+    assert provider.vector_store.count() == 0  # default corpus untouched
+
+
+def test_unknown_corpus_is_not_created_by_queries(provider, tmp_path):
+    assert provider.query_rag_corpus("never-written", "anything") == []
+    assert provider.corpus("never-written", create=False) is None
+    assert not any(name.startswith("never-written") for name in os.listdir(tmp_path))
+
+
+def test_delete_corpus_removes_only_that_corpus(provider, tmp_path):
+    provider.add_texts("ltm-s1", ["fact one"], ids=["1"])
+    provider.add_texts("ltm-s2", ["fact two"], ids=["2"])
+    namespace = corpus_namespace("ltm-s1")
+
+    assert provider.delete_corpus("ltm-s1")
+
+    assert provider.query_rag_corpus("ltm-s1", "fact") == []
+    assert not any(name.startswith(namespace) for name in os.listdir(tmp_path))
+    assert [r["id"] for r in provider.query_rag_corpus("ltm-s2", "fact")] == ["2"]
+    assert not provider.delete_corpus(provider.collection_name)
+
+
+def test_evicted_corpora_reopen_from_disk(provider, mocker):
+    mocker.patch("gamma_engine.core.rag.local.settings.rag_max_open_corpora", 1)
+    provider.add_texts("ltm-s1", ["fact one"], ids=["1"])
+    provider.add_texts("ltm-s2", ["fact two"], ids=["2"])
+
+    assert len(provider._corpora) == 1
+    assert [r["id"] for r in provider.query_rag_corpus("ltm-s1", "fact")] == ["1"]
+
+
+def test_corpus_namespace_is_valid_and_unique():
+    a, b = corpus_namespace("session/1 corpus"), corpus_namespace("session 1/corpus")
+    assert a != b
+    assert a.startswith("session-1-corpus-")
+    assert len(corpus_namespace("x" * 200)) <= 63
+    assert corpus_namespace("!!").startswith("corpus-")
+
+
+def test_evicted_namespace_closes_after_its_last_lease(provider, mocker):
+    mocker.patch("gamma_engine.core.rag.local.settings.rag_max_open_corpora", 1)
+    provider.add_texts("ltm-s1", ["fact one"], ids=["1"])
+
+    with provider._lease("ltm-s1") as held:
+        close = mocker.spy(held, "close")
+        provider.add_texts("ltm-s2", ["fact two"], ids=["2"])  # evicts ltm-s1
+        close.assert_not_called()
+        # Needed again while still leased: the same instance is reused, not reopened
+        assert provider.corpus("ltm-s1") is held
+        provider.add_texts("ltm-s2", ["fact three"], ids=["3"])
+    close.assert_called_once()
+    assert provider.corpus("ltm-s1") is not held
+
+
+def test_delete_waits_for_leases(provider):
+    provider.add_texts("ltm-s1", ["fact one"], ids=["1"])
+    deleted = threading.Event()
+
+    with provider._lease("ltm-s1") as held:
+        deleter = threading.Thread(target=lambda: provider.delete_corpus("ltm-s1") and deleted.set())
+        deleter.start()
+        assert not deleted.wait(0.2)
+        assert held.vector_store.count() == 1
+    deleter.join(5)
+
+    assert deleted.is_set()
+    assert provider.query_rag_corpus("ltm-s1", "fact") == []
+
+
+def test_opening_a_corpus_does_not_block_other_corpora(provider, mocker):
+    provider.add_texts("ltm-s1", ["fact one"], ids=["1"])
+    opening, release = threading.Event(), threading.Event()
+    open_namespace = provider._open_namespace
+
+    def slow_open(collection_name):
+        opening.set()
+        release.wait(5)  # e.g. rebuilding a large keyword index
+        return open_namespace(collection_name)
+
+    mocker.patch.object(provider, "_open_namespace", side_effect=slow_open)
+    opener = threading.Thread(target=lambda: provider.corpus("ltm-s2"))
+    opener.start()
+    assert opening.wait(5)
+
+    try:
+        assert [r["id"] for r in provider.query_rag_corpus("ltm-s1", "fact")] == ["1"]
+        assert opener.is_alive()  # served while ltm-s2 was still opening
+    finally:
+        release.set()
+        opener.join(5)
+    assert provider._open_namespace.call_count == 1
+
+
+def test_unwritten_corpora_read_legacy_default_corpus(provider, mocker):
+    provider.add_texts(provider.collection_name, ["fact stored before namespaces"], ids=["legacy"])
+    provider.create_or_get_corpus("ltm-system_shared")
+
+    assert [r["id"] for r in provider.query_rag_corpus("ltm-system_shared", "fact")] == ["legacy"]
+    assert [r["id"] for r in provider.query_many(["ltm-a", "ltm-b"], "fact")] == ["legacy"]
+
+    provider.add_texts("ltm-system_shared", ["fact stored after"], ids=["new"])
+    assert [r["id"] for r in provider.query_rag_corpus("ltm-system_shared", "fact")] == ["new"]
+
+    mocker.patch("gamma_engine.core.rag.local.settings.rag_legacy_corpus_fallback", False)
+    assert provider.query_rag_corpus("ltm-a", "fact") == []
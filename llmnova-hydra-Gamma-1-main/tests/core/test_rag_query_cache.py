@@ -0,0 +1,129 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from gamma_engine.core.ingestion.embeddings import HashingEmbeddings
+from gamma_engine.core.metrics import get_metrics_collector
+from gamma_engine.core.rag.local import LocalRAGProvider
+from gamma_engine.core.rag.query_cache import QueryLRU, RAGResultCache
+from gamma_engine.core.rag_service import SharedRAGProvider
+
+
+@pytest.fixture
+def backend():
+    provider = MagicMock()
+    provider.is_configured = True
+    provider.query_rag_corpus.side_effect = lambda corpus, query, k: [{"content": f"{corpus}: {query}"}]
+    provider.query_many.side_effect = lambda corpora, query, k: [{"content": f"{c}: {query}", "corpus": c} for c in corpora]
+    return provider
+
+
+@pytest.fixture
+def shared(backend):
+    return SharedRAGProvider(lambda: backend, name="test", result_cache=RAGResultCache(max_entries=16, ttl_seconds=60))
+
+
+def test_repeated_queries_are_served_from_cache(shared, backend):
+    first = shared.query_rag_corpus("session-1", "deploy  steps", 3)
+    first[0]["content"] = "mutated by caller"
+
+    again = shared.query_rag_corpus("session-1", "deploy steps", 3)
+
+    assert backend.query_rag_corpus.call_count == 1
+    assert again == [{"content": "session-1: deploy  steps"}]
+    assert shared.result_cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+    shared.query_rag_corpus("session-1", "deploy steps", 5)  # k is part of the key
+    assert backend.query_rag_corpus.call_count == 2
+
+
+def test_writes_invalidate_only_their_corpus(shared, backend):
+    shared.query_many(["session-1", "ltm-1"], "q", 3)
+    shared.query_rag_corpus("session-2", "q", 3)
+
+    shared.upload_document_to_corpus("ltm-1", "/tmp/doc.txt", "doc")
+    shared.query_many(["session-1", "ltm-1"], "q", 3)
+    shared.query_rag_corpus("session-2", "q", 3)
+
+    assert backend.query_many.call_count == 2
+    assert backend.query_rag_corpus.call_count == 1
+
+    shared.add_texts("session-2", ["fact"])
+    shared.query_rag_corpus("session-2", "q", 3)
+    shared.delete_corpus("session-2")
+    shared.query_rag_corpus("session-2", "q", 3)
+    assert backend.query_rag_corpus.call_count == 3
+
+
+def test_default_corpus_aliases_share_invalidation(shared, backend):
+    backend.collection_name = "gamma_knowledge_base"
+    shared.query_rag_corpus("gamma_knowledge_base", "q", 3)
+    shared.query_rag_corpus("", "q", 3)
+    assert backend.query_rag_corpus.call_count == 1
+
+    shared.add_texts(None, ["fact"])
+    shared.query_rag_corpus("gamma_knowledge_base", "q", 3)
+    assert backend.query_rag_corpus.call_count == 2
+
+
+def test_bulk_ingest_without_provider_returns_none():
+    shared = SharedRAGProvider(lambda: None, name="missing")
+    assert shared.bulk_ingest("c", ["/tmp/docs"]) is None
+
+
+def test_result_stored_after_a_concurrent_write_is_not_served(shared):
+    cache = shared.result_cache
+    key = cache.key(["c"], "q", 3)
+    cache.invalidate("c")  # a write lands while the query runs
+    cache.set(key, [{"content": "stale"}])
+
+    assert cache.get(cache.key(["c"], "q", 3)) is None
+
+
+def test_empty_results_are_not_cached(shared, backend):
+    backend.query_rag_corpus.side_effect = lambda corpus, query, k: []
+    shared.query_rag_corpus("c", "q", 3)
+    shared.query_rag_corpus("c", "q", 3)
+    assert backend.query_rag_corpus.call_count == 2
+
+
+def test_lru_evicts_and_expires(monkeypatch):
+    cache = QueryLRU("test", max_entries=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts b, the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    clock = time.monotonic() + 11
+    monkeypatch.setattr("gamma_engine.core.rag.query_cache.time.monotonic", lambda: clock)
+    assert cache.get("c") is None
+
+
+def test_hit_rate_metrics_are_exported():
+    metrics = get_metrics_collector()
+    metrics.enable()
+    cache = QueryLRU("metrics-test")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    gauge = metrics.get_metric("rag.query_cache.hit_rate", labels={"cache": "metrics-test"})
+    assert gauge.value == 0.5
+
+
+def test_local_provider_embeds_a_repeated_query_once(mocker, tmp_path):
+    embedder = HashingEmbeddings(dim=64)
+    embedder.model = object()  # stands in for a loaded sentence-transformers model
+    mocker.patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings", return_value=embedder)
+    provider = LocalRAGProvider(persistence_path=str(tmp_path), vector_backend="numpy")
+    provider.add_texts("c", ["canary deploys"], ids=["1"])
+    embed = mocker.spy(embedder, "embed_text")
+
+    provider.query_rag_corpus("c", "canary")
+    provider.query_many(["c"], "canary ")
+
+    assert embed.call_count == 1
+    assert provider.query_embeddings.hits == 1
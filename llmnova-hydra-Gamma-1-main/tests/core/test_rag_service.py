@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from gamma_engine.core import rag_service
+from gamma_engine.core.rag_service import SharedRAGProvider, get_shared_rag_provider
+
+
+class FakeLocalProvider:
+    instances = 0
+
+    def __init__(self, persistence_path: str = "./chroma_db", collection_name: str = "gamma_knowledge_base"):
+        type(self).instances += 1
+        time.sleep(0.05)  # simulate model load
+        self.persistence_path = persistence_path
+        self.is_configured = True
+
+    def query_rag_corpus(self, corpus_name, query_text, num_results=5):
+        return [{"content": query_text}]
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    FakeLocalProvider.instances = 0
+    monkeypatch.setattr(rag_service, "_shared_providers", {})
+    monkeypatch.setattr(rag_service, "LocalRAGProvider", FakeLocalProvider)
+
+
+def test_equivalent_configs_share_one_lazy_instance():
+    a = get_shared_rag_provider("local")
+    b = get_shared_rag_provider("LOCAL", persistence_path="chroma_db")
+
+    assert a is b
+    assert FakeLocalProvider.instances == 0
+    assert not a.is_ready
+
+    assert a.query_rag_corpus("c", "hello") == [{"content": "hello"}]
+    assert a.is_ready
+    assert FakeLocalProvider.instances == 1
+    assert get_shared_rag_provider("local", persistence_path="/elsewhere") is not a
+
+
+def test_concurrent_first_use_loads_once():
+    shared = get_shared_rag_provider("local")
+    threads = [threading.Thread(target=lambda: shared.is_configured) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert FakeLocalProvider.instances == 1
+
+
+def test_warm_loads_in_background_and_reports_status():
+    shared = get_shared_rag_provider("local")
+
+    shared.warm().join(timeout=2)
+
+    assert shared.is_ready
+    assert shared.persistence_path == "./chroma_db"
+    assert rag_service.rag_providers_status() == [
+        {
+            "name": "local:FakeLocalProvider", "ready": True, "configured": True,
+            "query_cache": {"entries": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+        }
+    ]
+
+
+def test_failed_load_is_not_configured():
+    def broken():
+        raise RuntimeError("model download failed")
+
+    shared = SharedRAGProvider(broken, name="broken")
+
+    assert shared.is_configured is False
+    assert shared.query_rag_corpus("c", "q") == []
+    assert shared.add_texts("c", ["x"]) == []
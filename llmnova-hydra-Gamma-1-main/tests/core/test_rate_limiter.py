@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+from gamma_engine.core.rate_limiter import (
+    LLMGovernor,
+    Priority,
+    estimate_tokens,
+    is_rate_limit_error,
+    llm_priority,
+    retry_after_seconds,
+)
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self, retry_after="0"):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = MagicMock(headers={"retry-after": retry_after})
+
+
+@pytest.fixture
+def governor():
+    gov = LLMGovernor(name="test:model", max_concurrency=4, max_retries=3)
+    gov._wait_strategy = lambda: (lambda retry_state: 0)
+    return gov
+
+
+def test_rate_limit_error_detection():
+    error = FakeRateLimitError(retry_after="2")
+    assert is_rate_limit_error(error)
+    assert retry_after_seconds(error) == 2.0
+    assert not is_rate_limit_error(ValueError("bad request"))
+
+
+def test_throttle_halves_limits_and_success_recovers(governor):
+    governor.on_throttle(retry_after=0.01)
+    assert governor.scale == 0.5
+    assert governor.concurrency_limit == 2
+    governor.on_success()
+    assert governor.scale == pytest.approx(0.55)
+
+
+def test_call_retries_throttled_attempts(governor):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeRateLimitError()
+        return "ok"
+
+    assert governor.call(flaky) == "ok"
+    assert len(attempts) == 3
+
+
+def test_call_does_not_retry_other_errors(governor):
+    fn = MagicMock(side_effect=ValueError("invalid"))
+    with pytest.raises(ValueError):
+        governor.call(fn)
+    assert fn.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_acall_retries_and_releases_slots(governor):
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FakeRateLimitError()
+        return "ok"
+
+    assert await governor.acall(flaky) == "ok"
+    assert governor._in_flight == 0
+
+
+def test_interactive_callers_are_admitted_before_background():
+    governor = LLMGovernor(name="test:priority", max_concurrency=1)
+    order = []
+
+    def worker(priority, label):
+        with llm_priority(priority):
+            with governor.slot():
+                order.append(label)
+
+    with governor.slot():
+        background = threading.Thread(target=worker, args=(Priority.BACKGROUND, "background"))
+        background.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=worker, args=(Priority.INTERACTIVE, "interactive"))
+        interactive.start()
+        time.sleep(0.05)
+
+    background.join(5)
+    interactive.join(5)
+    assert order == ["interactive", "background"]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens([{"role": "user", "content": "x" * 400}]) == 101
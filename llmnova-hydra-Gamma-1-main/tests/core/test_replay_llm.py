@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import MagicMock
+
+from gamma_engine.core.replay_llm import CassetteMiss, ReplayLLMProvider, fixed_latency, recorded_latency
+from gamma_engine.interfaces.llm_provider import Message
+
+HISTORY = [{"role": "user", "content": "hello"}]
+
+
+@pytest.fixture
+def upstream():
+    llm = MagicMock()
+    llm.model = "gpt-4o"
+    llm.chat.side_effect = lambda history, tools=None, **kwargs: Message(
+        role="assistant", content=f"reply to {history[-1]['content']}"
+    )
+    return llm
+
+
+def test_record_then_replay_by_hash(tmp_path, upstream):
+    cassette = str(tmp_path / "cassette.json")
+    recorder = ReplayLLMProvider(cassette, mode="record", upstream=upstream)
+    recorder.chat(HISTORY)
+    recorder.chat([{"role": "user", "content": "second"}])
+
+    replay = ReplayLLMProvider(cassette, match="hash")
+    # Out of recorded order: matched by request hash, not position
+    assert replay.chat([{"role": "user", "content": "second"}]).content == "reply to second"
+    assert replay.chat(HISTORY).content == "reply to hello"
+    with pytest.raises(CassetteMiss):
+        replay.chat([{"role": "user", "content": "never recorded"}])
+
+
+def test_hash_then_sequence_falls_back_in_order(tmp_path, upstream):
+    cassette = str(tmp_path / "cassette.json")
+    recorder = ReplayLLMProvider(cassette, mode="record", upstream=upstream)
+    recorder.chat(HISTORY)
+
+    replay = ReplayLLMProvider(cassette)
+    assert replay.chat([{"role": "user", "content": "different"}]).content == "reply to hello"
+    replay.rewind()
+    assert replay.chat(HISTORY).content == "reply to hello"
+
+
+@pytest.mark.asyncio
+async def test_replay_rehydrates_tool_calls_and_simulates_latency():
+    scripted = Message(
+        role="assistant",
+        content=None,
+        tool_calls=[{"id": "call_1", "function": {"name": "echo", "arguments": "{}"}}]
+    )
+    replay = ReplayLLMProvider.from_messages([scripted], latency=fixed_latency(0.01))
+
+    response = await replay.achat(HISTORY)
+
+    assert response.tool_calls[0].function.name == "echo"
+    assert replay.calls == 1
+    assert replay.simulated_seconds == pytest.approx(0.01)
+
+
+def test_recorded_latency_scales_observed_time():
+    latency = recorded_latency(scale=0.5)
+    assert latency({"latency": 2.0}) == 1.0
+
+
+def test_record_requires_upstream():
+    with pytest.raises(ValueError):
+        ReplayLLMProvider(mode="record")
+
+
+def test_agent_loop_benchmark_runs_offline(tmp_path, monkeypatch):
+    from benchmarks.agent_loop import run_all
+
+    monkeypatch.chdir(tmp_path)
+    results = run_all(iterations=1)
+
+    by_name = {r.name: r for r in results}
+    assert by_name["agent.run"].steps == 7
+    assert by_name["planning_flow"].steps == 11
+    assert by_name["brain.decompose"].steps == 2
+    assert all(r.overhead_ms_per_step >= 0 for r in results)
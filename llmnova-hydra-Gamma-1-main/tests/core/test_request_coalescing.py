@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+from gamma_engine.core.request_coalescing import RedisFlightLock, SingleFlight
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow_fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while flight.in_flight() == 0:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_tasks_share_one_call_and_errors_propagate():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    assert await asyncio.gather(*[flight.ado("k", fetch) for _ in range(4)]) == ["result"] * 4
+    assert len(calls) == 1
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    outcomes = await asyncio.gather(flight.ado("e", failing), flight.ado("e", failing), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flight.ado("k", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.ado("k", fetch))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+def test_redis_flight_lock_waits_for_leader_result():
+    client = MagicMock()
+    client.set.return_value = False  # someone else holds the lock
+    client.exists.return_value = True
+    lock = RedisFlightLock(lambda: client, poll_interval=0.001, wait_timeout=1)
+
+    assert lock.acquire("k") is None
+    probes = iter([None, None, "shared"])
+    assert lock.wait("k", lambda: next(probes)) == "shared"
+
+
+def test_redis_flight_lock_without_redis_always_leads():
+    lock = RedisFlightLock(lambda: None)
+    token = lock.acquire("k")
+    assert token
+    lock.release("k", token)
@@ -0,0 +1,179 @@
+import json
+import os
+
+import pytest
+
+from gamma_engine.core.memory import EpisodicMemory
+from gamma_engine.core.session_journal import SessionJournal
+from gamma_engine.core.tokenizer import HeuristicTokenizer
+from gamma_engine.interfaces.llm_provider import Message
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return SessionJournal(str(tmp_path / "s1" / "history.jsonl"), fsync_policy="always")
+
+
+def msg(role, content):
+    return Message(role=role, content=content)
+
+
+def contents(messages):
+    return [m.content for m in messages]
+
+
+def test_append_and_reload_continues_sequence(journal):
+    for i in range(3):
+        journal.append(msg("user", f"m{i}"))
+    journal.close()
+
+    reopened = SessionJournal(journal.path)
+    assert contents(reopened.load_all()) == ["m0", "m1", "m2"]
+    extra = msg("user", "m3")
+    reopened.append(extra)
+    assert extra._journal_seq == 3
+
+
+def test_edits_replay_and_compaction_folds_them(journal):
+    messages = [msg("user", f"m{i}") for i in range(5)]
+    for m in messages:
+        journal.append(m)
+    system = msg("system", "prompt")
+    journal.insert(messages[0], system)
+    journal.replace(messages[0:3], msg("system", "Previous Context: summary"))
+
+    expected = ["prompt", "Previous Context: summary", "m3", "m4"]
+    assert contents(journal.load_all()) == expected
+
+    journal.compact()
+    with open(journal.path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["op"] for r in records] == ["append"] * 4
+    assert contents(journal.load_all()) == expected
+
+
+def test_load_tail_reads_only_what_fits(journal):
+    tokenizer = HeuristicTokenizer()
+    journal.append(msg("system", "prompt"))
+    for i in range(50):
+        journal.append(msg("user", f"{i:02d}" + "x" * 38))  # 10 + 4 overhead tokens each
+
+    tail = journal.load_tail(token_budget=50, tokenizer=tokenizer)
+
+    # 6 tokens for the pinned prompt leave room for the newest 3 messages
+    assert contents(tail)[0] == "prompt"
+    assert [c[:2] for c in contents(tail)[1:]] == ["47", "48", "49"]
+
+
+def test_load_tail_replays_only_from_the_first_edit(journal):
+    tokenizer = HeuristicTokenizer()
+    messages = [msg("user", f"m{i}") for i in range(4)]
+    for m in messages:
+        journal.append(m)
+    journal.replace(messages[1:3], None)
+    journal.close()
+
+    reopened = SessionJournal(journal.path)
+    assert contents(reopened.load_tail(1000, tokenizer)) == ["m0", "m3"]
+    # Edits stay as records until compact_after is reached
+    with open(journal.path) as f:
+        assert [json.loads(line)["op"] for line in f] == ["append"] * 4 + ["replace"]
+    assert reopened.dead_records == 3
+
+
+def test_load_tail_keeps_summary_of_an_older_span(journal):
+    tokenizer = HeuristicTokenizer()
+    journal.append(msg("system", "prompt"))
+    messages = [msg("user", f"{i:02d}" + "x" * 38) for i in range(10)]
+    for m in messages:
+        journal.append(m)
+    journal.replace(messages[0:6], msg("system", "Previous Context: 00-05"))
+    journal.append(msg("user", "10" + "x" * 38))
+    journal.close()
+
+    tail = SessionJournal(journal.path).load_tail(token_budget=60, tokenizer=tokenizer)
+
+    assert contents(tail)[:2] == ["prompt", "Previous Context: 00-05"]
+    assert [c[:2] for c in contents(tail)[2:]] == ["08", "09", "10"]
+
+
+def test_load_tail_without_edits_marker_replays_everything(journal):
+    tokenizer = HeuristicTokenizer()
+    messages = [msg("user", f"m{i}") for i in range(4)]
+    for m in messages:
+        journal.append(m)
+    journal.replace(messages[1:3], None)
+    journal.close()
+    os.remove(journal.edits_path)
+
+    assert contents(SessionJournal(journal.path).load_tail(1000, tokenizer)) == ["m0", "m3"]
+    with open(journal.path) as f:
+        assert [json.loads(line)["op"] for line in f] == ["append", "append"]
+
+
+def test_dead_records_are_derived_from_the_file(journal):
+    messages = [msg("user", f"m{i}") for i in range(4)]
+    for m in messages:
+        journal.append(m)
+    journal.replace(messages[0:2], msg("system", "Previous Context: m0 m1"))
+    journal.close()
+
+    reopened = SessionJournal(journal.path)
+    reopened.load_all()
+    assert reopened.dead_records == 2
+
+
+def test_torn_last_line_is_ignored(journal):
+    journal.append(msg("user", "intact"))
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"seq": 1, "op": "app')
+
+    assert contents(SessionJournal(journal.path).load_all()) == ["intact"]
+
+
+def test_migrates_legacy_memory_json(tmp_path, journal):
+    legacy = tmp_path / "s1" / "memory.json"
+    legacy.parent.mkdir(parents=True, exist_ok=True)
+    legacy.write_text(json.dumps([{"role": "user", "content": "old"}, {"role": "assistant", "content": "reply"}]))
+
+    assert journal.migrate_from_json(str(legacy))
+    assert contents(journal.load_all()) == ["old", "reply"]
+    assert not legacy.exists()
+    assert (tmp_path / "s1" / "memory.json.migrated").exists()
+
+
+def test_episodic_memory_persists_through_journal(tmp_path, mocker):
+    mocker.patch("gamma_engine.core.memory.get_redis_client", return_value=None)
+    mocker.patch("gamma_engine.core.memory.LongTermMemory")
+
+    memory = EpisodicMemory(session_id="journaled", storage_path=str(tmp_path))
+    memory.add("user", "hello")
+    memory.add("assistant", "hi")
+    memory.insert(0, msg("system", "prompt"))
+    memory._replace_range(1, 2, msg("system", "Previous Context: greeting"))
+    memory.save_to_file()
+
+    reloaded = EpisodicMemory(session_id="journaled", storage_path=str(tmp_path))
+    assert contents(reloaded.messages) == ["prompt", "Previous Context: greeting", "hi"]
+
+
+def test_edits_are_compacted_only_after_compact_after(tmp_path, mocker):
+    mocker.patch("gamma_engine.core.memory.get_redis_client", return_value=None)
+    mocker.patch("gamma_engine.core.memory.LongTermMemory")
+
+    memory = EpisodicMemory(session_id="compacting", storage_path=str(tmp_path))
+    memory.journal.compact_after = 4
+    for i in range(4):
+        memory.add("user", f"m{i}")
+    memory._replace_range(0, 2, msg("system", "Previous Context: m0 m1"))
+    memory.save_to_file()
+    with open(memory.journal.path) as f:
+        assert "replace" in {json.loads(line)["op"] for line in f}
+
+    memory._replace_range(1, 2, None)
+    memory.save_to_file()
+
+    with open(memory.journal.path) as f:
+        assert {json.loads(line)["op"] for line in f} == {"append"}
+    assert contents(memory.journal.load_all()) == ["Previous Context: m0 m1", "m3"]
@@ -0,0 +1,60 @@
+import base64
+
+from gamma_engine.core.tokenizer import (
+    IMAGE_TOKENS,
+    MESSAGE_OVERHEAD_TOKENS,
+    BPETokenizer,
+    HeuristicTokenizer,
+    context_budget,
+    context_window,
+    count_message_tokens,
+)
+from gamma_engine.interfaces.llm_provider import Message
+
+
+def _write_ranks(path, tokens):
+    lines = [f"{base64.b64encode(t).decode()} {rank}" for rank, t in enumerate(tokens)]
+    path.write_text("\n".join(lines))
+
+
+def test_heuristic_tokenizer():
+    tokenizer = HeuristicTokenizer()
+    assert tokenizer.count("") == 0
+    assert tokenizer.count("abcd") == 1
+    assert tokenizer.count("abcde") == 2
+
+
+def test_bpe_merges_lowest_rank_first(tmp_path):
+    single_bytes = [bytes([b]) for b in range(256)]
+    ranks_file = tmp_path / "tiny.tiktoken"
+    _write_ranks(ranks_file, single_bytes + [b"he", b"ll", b"hell", b"hello", b" w", b" wo"])
+    tokenizer = BPETokenizer.from_file(str(ranks_file))
+
+    # "hello" is a single token; " world" -> " wo" + "r" + "l" + "d"
+    assert tokenizer.count("hello") == 1
+    assert tokenizer.count("hello world") == 5
+    # Memoized pieces give the same answer
+    assert tokenizer.count("hello world") == 5
+
+
+def test_message_count_is_cached_and_includes_tools_and_images():
+    tokenizer = HeuristicTokenizer()
+    message = Message(
+        role="assistant",
+        content="abcdefgh",
+        base64_image="aGVsbG8=",
+        tool_calls=[{"id": "1", "function": {"name": "echo", "arguments": "{}"}}]
+    )
+    expected = MESSAGE_OVERHEAD_TOKENS + 2 + 1 + 1 + IMAGE_TOKENS
+    assert count_message_tokens(message, tokenizer) == expected
+
+    message.content = "changed"  # cached value is reused; messages are treated as immutable
+    assert count_message_tokens(message, tokenizer) == expected
+
+
+def test_context_budgets_per_model():
+    assert context_window("gpt-4o-mini") == 128_000
+    assert context_window("gpt-4") == 8_192
+    assert context_window("claude-3-opus-20240229") == 200_000
+    assert context_window("unknown-model") == 8_192
+    assert context_budget("gpt-4o", reserved_output_tokens=1000) == 127_000
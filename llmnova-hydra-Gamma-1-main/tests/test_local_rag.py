@@ -1,7 +1,8 @@
 import os
 import shutil
+import tempfile
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 import sys
 
 # Ensure gamma_engine is in path
@@ -33,6 +34,10 @@ class TestLocalRAG(unittest.TestCase):
         self.mock_embedder = MagicMock()
         self.mock_loader = MagicMock()
 
+        # Keyword index and manifest files go here rather than the default ./chroma_db
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
     @patch("gamma_engine.core.rag.local.ChromaVectorStore")
     @patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings")
     def test_initialization(self, mock_embed_cls, mock_store_cls):
@@ -47,7 +52,7 @@ class TestLocalRAG(unittest.TestCase):
             # Re-reload module to apply HAS_LOCAL_RAG_DEPS patch if needed, or just rely on mocked imports above.
             # Because we mocked sys.modules["chromadb"], ImportError won't happen, so HAS_LOCAL_RAG_DEPS should be True.
 
-            provider = LocalRAGProvider()
+            provider = LocalRAGProvider(persistence_path=self.tmp)
             # If initialization succeeds, it means deps were found (mocked)
             self.assertTrue(provider.is_configured)
             mock_embed_cls.assert_called_once()
@@ -64,19 +69,52 @@ class TestLocalRAG(unittest.TestCase):
         mock_store_cls.return_value = self.mock_vector_store
 
         mock_loader = MagicMock()
-        mock_loader.load.return_value = "Test Content"
+        mock_loader.iter_blocks.return_value = iter(["page 1"])
         mock_factory.get_loader.return_value = mock_loader
 
-        mock_processor.chunk_text.return_value = ["Test Content"]
+        chunk = MagicMock(text="Test Content", index=0)
+        chunk.metadata.return_value = {"source": "doc1", "chunk_index": 0, "page_start": 1, "page_end": 1}
+        mock_processor.iter_chunks.return_value = iter([chunk])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "test.txt")
+            with open(file_path, "w") as f:
+                f.write("page 1")
+            provider = LocalRAGProvider(persistence_path=tmp)
+            provider.upload_document_to_corpus("test_corpus", file_path, "doc1")
+
+            # Verify pipeline calls: pages are streamed into the chunker
+            mock_factory.get_loader.assert_called_with(file_path)
+            mock_loader.iter_blocks.assert_called_with(file_path)
+            mock_processor.iter_chunks.assert_called()
+            kwargs = self.mock_vector_store.upsert_texts.call_args.kwargs
+            self.assertEqual(kwargs["texts"], ["Test Content"])
+            self.assertEqual(kwargs["metadatas"], [{"source": "doc1", "chunk_index": 0, "page_start": 1, "page_end": 1}])
+            self.assertTrue(kwargs["ids"][0].startswith("doc1_"))
+
+            # Re-uploading the same file is a no-op
+            provider.upload_document_to_corpus("test_corpus", file_path, "doc1")
+            self.assertEqual(self.mock_vector_store.upsert_texts.call_count, 1)
 
-        provider = LocalRAGProvider()
-        provider.upload_document_to_corpus("test_corpus", "test.txt", "doc1")
+    @patch("gamma_engine.core.rag.local.ChromaVectorStore")
+    @patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings")
+    def test_add_texts_embeds_and_upserts_once(self, mock_embed_cls, mock_store_cls):
+        mock_embed_cls.return_value = self.mock_embedder
+        self.mock_embedder.model = MagicMock()
+        self.mock_embedder.embed_text.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        mock_store_cls.return_value = self.mock_vector_store
+
+        provider = LocalRAGProvider(persistence_path=self.tmp)
+        ids = provider.add_texts("ltm-s1", ["fact one", "fact two"], ids=["a", "b"])
 
-        # Verify pipeline calls
-        mock_factory.get_loader.assert_called_with("test.txt")
-        mock_loader.load.assert_called_with("test.txt")
-        mock_processor.chunk_text.assert_called()
-        self.mock_vector_store.add_texts.assert_called()
+        self.assertEqual(ids, ["a", "b"])
+        self.mock_embedder.embed_text.assert_called_once_with(["fact one", "fact two"])
+        self.mock_vector_store.upsert_texts.assert_called_once_with(
+            texts=["fact one", "fact two"],
+            metadatas=[{"source": "ltm-s1"}, {"source": "ltm-s1"}],
+            ids=["a", "b"],
+            embeddings=[[0.1, 0.2], [0.3, 0.4]]
+        )
 
     @patch("gamma_engine.core.rag.local.ChromaVectorStore")
     @patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings")
@@ -87,16 +125,46 @@ class TestLocalRAG(unittest.TestCase):
 
         # Mock search results
         self.mock_vector_store.similarity_search.return_value = {
+            'ids': [['doc1_a']],
             'documents': [['Result Content']],
-            'metadatas': [[{'source': 'doc1'}]]
+            'metadatas': [[{'source': 'doc1'}]],
+            'distances': [[0.4]]
         }
+        self.mock_vector_store.similarity.side_effect = lambda d: 1.0 - d / 2.0
 
-        provider = LocalRAGProvider()
+        provider = LocalRAGProvider(persistence_path=self.tmp)
+        provider.create_or_get_corpus("test_corpus")
         results = provider.query_rag_corpus("test_corpus", "query")
 
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0]['content'], 'Result Content')
-        self.mock_vector_store.similarity_search.assert_called_with("query", k=5)
+        self.assertAlmostEqual(results[0]['vector_score'], 0.8)
+        self.mock_vector_store.similarity_search.assert_called_with("query", k=20, query_embedding=ANY)
+
+    @patch("gamma_engine.core.rag.local.ChromaVectorStore")
+    @patch("gamma_engine.core.rag.local.SentenceTransformerEmbeddings")
+    def test_query_fuses_keyword_matches(self, mock_embed_cls, mock_store_cls):
+        mock_embed_cls.return_value = self.mock_embedder
+        self.mock_embedder.model = MagicMock()
+        mock_store_cls.return_value = self.mock_vector_store
+        self.mock_vector_store.similarity.side_effect = lambda d: 1.0 - d / 2.0
+
+        provider = LocalRAGProvider(persistence_path=self.tmp)
+        provider.corpus("test_corpus").keyword_index.upsert(["b", "c"], ["connection failed with ERR_CONN_RESET", "unrelated text"])
+        self.mock_vector_store.similarity_search.return_value = {
+            'ids': [['a', 'b']],
+            'documents': [['dense only', 'connection failed with ERR_CONN_RESET']],
+            'metadatas': [[{'source': 'x'}, {'source': 'y'}]],
+            'distances': [[0.2, 0.6]]
+        }
+
+        results = provider.query_rag_corpus("test_corpus", "err_conn_reset", num_results=2)
+
+        # Found by both retrievers, so it outranks the dense-only top hit
+        self.assertEqual([r['id'] for r in results], ['b', 'a'])
+        self.assertGreater(results[0]['bm25_score'], 0)
+        self.assertIsNone(results[1]['bm25_score'])
+        self.assertGreater(results[0]['score'], results[1]['score'])
 
 if __name__ == "__main__":
     unittest.main()